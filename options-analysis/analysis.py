@@ -1,24 +1,110 @@
+import numpy as np
 import pandas as pd
 import re
 import glob
+import hashlib
+import importlib.util
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 
+from html_report import REPORT_FILE, write_html_report
+from trades import build_trades, print_trade_summary
+
 # ── Data Loading & Cleaning ─────────────────────────────────────────────────
+#
+# Fidelity exports carry blank comma rows above the header and a multi-line
+# disclaimer + "Date downloaded" footer below the data. The loader finds the
+# header line directly, reads only the columns the pipeline uses with explicit
+# dtypes, and drops footer rows by failing the date parse.
+#
+# Each file's cleaned frame is cached as Parquet in CACHE_DIR, keyed by
+# path + size + mtime (+ loader version), so unchanged quarterly exports load
+# from cache. Parquet needs pyarrow; without it the cache is skipped silently.
+
+DATE_START = '2025-01-01'
+DATE_END   = '2026-03-31'
+CACHE_DIR  = 'data/.cache'
+_LOADER_VERSION = 2
+
+TEXT_COLS    = ['Account', 'Action', 'Symbol', 'Type', 'Settlement Date']
+NUMERIC_COLS = ['Price', 'Quantity', 'Commission', 'Fees', 'Amount']
+USECOLS      = ['Run Date'] + TEXT_COLS + NUMERIC_COLS
+DTYPES       = {**{c: 'string' for c in ['Run Date'] + TEXT_COLS}, **{c: 'float64' for c in NUMERIC_COLS}}
+
+def _find_header_row(fp, max_scan=50):
+    with open(fp, encoding='utf-8-sig', errors='replace') as f:
+        for i, line in enumerate(f):
+            if line.startswith('Run Date'):
+                return i
+            if i >= max_scan:
+                break
+    raise ValueError(f'no "Run Date" header in first {max_scan} lines')
+
+def _cache_path(fp):
+    st = os.stat(fp)
+    key = f'{os.path.abspath(fp)}|{st.st_size}|{st.st_mtime_ns}|{_LOADER_VERSION}'
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest()[:16] + '.parquet')
+
+def _clean_chunk(df, date_range=(DATE_START, DATE_END)):
+    df['Run Date'] = pd.to_datetime(df['Run Date'], format='%m/%d/%Y', errors='coerce')
+    return _in_range(df.dropna(subset=['Run Date']), date_range).reset_index(drop=True)
+
+def _in_range(df, date_range):
+    """Rows inside date_range=(start, end), inclusive; date_range=None keeps everything."""
+    if date_range is None:
+        return df
+    start, end = date_range
+    return df[(df['Run Date'] >= start) & (df['Run Date'] <= end)]
+
+def _read_export(fp, chunksize=None, date_range=(DATE_START, DATE_END)):
+    reader = pd.read_csv(
+        fp, skiprows=_find_header_row(fp), usecols=lambda c: c in USECOLS,
+        dtype=DTYPES, skip_blank_lines=True, encoding='utf-8-sig', chunksize=chunksize,
+    )
+    if chunksize is None:
+        return _clean_chunk(reader, date_range)
+    return (_clean_chunk(chunk, date_range) for chunk in reader)
+
+def load_file(fp, use_cache=True, date_range=(DATE_START, DATE_END)):
+    """
+    Clean one Fidelity export, served from the Parquet cache when unchanged.
+    The cache holds every dated row; date_range is applied after reading.
+    """
+    cache = _cache_path(fp) if use_cache else None
+    if cache and os.path.exists(cache):
+        try:
+            return _in_range(pd.read_parquet(cache), date_range).reset_index(drop=True)
+        except Exception:
+            pass
+    df = _read_export(fp, date_range=None)
+    if cache:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_parquet(cache, index=False)
+        except ImportError:
+            pass   # pyarrow not installed — cache disabled
+        except Exception as e:
+            print(f"Cache write failed for {fp}: {e}")
+    return _in_range(df, date_range).reset_index(drop=True)
 
-def load_and_clean(file_paths):
+def load_and_clean(file_paths, use_cache=True, date_range=(DATE_START, DATE_END)):
+    """
+    Cleaned, de-duplicated transactions of all file_paths. date_range limits
+    the analysis window (default DATE_START..DATE_END); None keeps every row,
+    e.g. for ledger reconciliation, which must see the latest fills.
+    """
     dfs = []
     for fp in file_paths:
         try:
-            df = pd.read_csv(fp)
-            dfs.append(df)
+            dfs.append(load_file(fp, use_cache=use_cache, date_range=date_range))
         except Exception as e:
             print(f"Error loading {fp}: {e}")
-    raw = pd.concat(dfs, ignore_index=True)
-    raw['Run Date'] = pd.to_datetime(raw['Run Date'], format='%m/%d/%Y', errors='coerce')
-    df = raw.dropna(subset=['Run Date']).copy()
-    df = df[(df['Run Date'] >= '2025-01-01') & (df['Run Date'] <= '2026-03-31')]
+    df = pd.concat(dfs, ignore_index=True)
     return df.drop_duplicates()
 
 def parse_action_type(action):
@@ -42,28 +128,242 @@ def parse_underlying(symbol):
     m = re.match(r'([A-Z]+)', s)
     return m.group(1) if m else s
 
+# Fidelity option symbol: optional '-', root, YYMMDD expiry, C/P, strike
+#   -NVDA250328P94  -> NVDA, 2025-03-28, PUT, 94.0
+OPTION_SYMBOL_RE = r'^-?\s*([A-Z]+)(\d{6})([CP])(\d+(?:\.\d+)?)$'
+
+ACTION_TYPES = ['ASSIGNED', 'BUY_CLOSE', 'BUY_OPEN', 'EXPIRED', 'OTHER', 'SELL_CLOSE', 'SELL_OPEN']
+OPTION_TYPES = ['CALL', 'PUT', 'UNKNOWN']
+WEEKDAYS     = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def _map_unique(values, fn, categories=None, factorized=None):
+    # Run a scalar parser once per distinct value, then broadcast by code —
+    # exports repeat the same few hundred Action/Symbol strings thousands of times.
+    codes, uniques = factorized if factorized is not None else pd.factorize(values, use_na_sentinel=False)
+    mapped = [fn(u) for u in uniques]
+    if categories is None:
+        categories = sorted(set(mapped))
+    lookup = {c: i for i, c in enumerate(categories)}
+    return pd.Categorical.from_codes(np.array([lookup[m] for m in mapped], dtype=np.int32)[codes], categories=categories)
+
+def parse_option_symbols(symbols):
+    """
+    Vectorized option symbol parse. Returns a DataFrame aligned to `symbols`
+    with expiry (datetime64), strike (float) and put_call ('PUT'/'CALL');
+    all NaN/NaT for non-option symbols (stock, cash sweep).
+    """
+    codes, uniques = pd.factorize(pd.Series(symbols), use_na_sentinel=False)
+    parts = pd.Series(uniques, dtype='string').str.strip().str.extract(OPTION_SYMBOL_RE)
+    parsed = pd.DataFrame({
+        'expiry':   pd.to_datetime(parts[1], format='%y%m%d', errors='coerce'),
+        'strike':   pd.to_numeric(parts[3], errors='coerce'),
+        'put_call': parts[2].map({'P': 'PUT', 'C': 'CALL'}).astype('category'),
+    })
+    out = parsed.iloc[codes].reset_index(drop=True)
+    out.index = pd.Series(symbols).index
+    return out
+
 def enrich(df):
-    df['action_type'] = df['Action'].apply(parse_action_type)
-    df['option_type'] = df['Action'].apply(parse_option_type)
-    df['underlying']  = df['Symbol'].apply(parse_underlying)
-    df['weekday']     = df['Run Date'].dt.day_name()
+    actions = pd.factorize(df['Action'], use_na_sentinel=False)
+    df['action_type'] = _map_unique(df['Action'], parse_action_type, ACTION_TYPES, factorized=actions)
+    df['option_type'] = _map_unique(df['Action'], parse_option_type, OPTION_TYPES, factorized=actions)
+    df['underlying']  = _map_unique(df['Symbol'], parse_underlying)
+    df['weekday']     = pd.Categorical.from_codes(df['Run Date'].dt.weekday, categories=WEEKDAYS, ordered=True)
+    df['Account']     = df['Account'].astype('category')
+    df[['expiry', 'strike', 'put_call']] = parse_option_symbols(df['Symbol'])
     for col in ['Amount', 'Price', 'Quantity', 'Commission', 'Fees']:
         df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    df['month']     = df['Run Date'].dt.to_period('M')
-    df['month_str'] = df['month'].astype(str)
+    df['month'] = df['Run Date'].dt.to_period('M')
+    month_codes, months = pd.factorize(df['month'])
+    df['month_str'] = months.astype(str).to_numpy(dtype=object)[month_codes]
     return df
 
+# ── Aggregate Cube ──────────────────────────────────────────────────────────
+#
+# Everything print_summary() and make_charts() show is a slice of one compact
+# cube: month × underlying × account × option_type × weekday × action_type,
+# holding the Amount sum, fee sum, transaction count and first/last trade
+# date per cell. It is built in a single groupby, a few thousand cells no
+# matter how many transactions, and kept on disk in AGG_STORE_DIR so it is
+# folded forward instead of rebuilt on every run:
+#
+#   cube.csv          one row per non-empty cell
+#   seen_hashes.npy   sorted uint64 hash of every transaction already folded in
+#   files.json        export files (path|size|mtime) already folded in
+#
+# update_aggregates() skips files listed in files.json outright; for a new or
+# changed export only rows whose hash is not in seen_hashes are enriched and
+# added, so a new quarterly file costs work proportional to that file. The
+# hash covers the cleaned raw columns, which makes it the same identity
+# load_and_clean() uses for drop_duplicates(). Changing DATE_START/DATE_END or
+# the loader resets the store.
+
+AGG_STORE_DIR  = 'data/.aggregates'
+_AGG_VERSION   = 3
+CUBE_DIMENSIONS = {
+    'month':       'month_str',
+    'underlying':  'underlying',
+    'account':     'Account',
+    'option_type': 'option_type',
+    'weekday':     'weekday',
+    'action_type': 'action_type',
+}
+_CUBE_SUMS  = ['amount', 'fees', 'count']
+_CUBE_COLS  = list(CUBE_DIMENSIONS) + _CUBE_SUMS + ['first_date', 'last_date']
+CHUNK_ROWS  = 50_000
+
+def row_hashes(df):
+    """Stable uint64 identity of each cleaned (pre-enrich) transaction row."""
+    raw = df.reindex(columns=USECOLS).copy()
+    raw['Run Date'] = raw['Run Date'].astype('datetime64[ns]')
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+def build_cube(df):
+    """Aggregate cube of an enriched frame — one row per non-empty cell."""
+    if df.empty:
+        return merge_cubes()
+    cells = pd.DataFrame({dim: df[col] for dim, col in CUBE_DIMENSIONS.items()})
+    cells['amount'] = df['Amount'].to_numpy()
+    cells['fees']   = (df['Commission'] + df['Fees']).to_numpy()
+    cells['count']  = 1
+    cells['date']   = df['Run Date'].to_numpy()
+    cube = cells.groupby(list(CUBE_DIMENSIONS), observed=True, sort=False).agg(
+        amount=('amount', 'sum'), fees=('fees', 'sum'), count=('count', 'sum'),
+        first_date=('date', 'min'), last_date=('date', 'max'),
+    ).reset_index()
+    for dim in CUBE_DIMENSIONS:
+        cube[dim] = cube[dim].astype(str)
+    return merge_cubes(cube)
+
+def merge_cubes(*cubes):
+    cubes = [c for c in cubes if c is not None and not c.empty]
+    if not cubes:
+        return pd.DataFrame(columns=_CUBE_COLS)
+    merged = pd.concat(cubes, ignore_index=True).groupby(list(CUBE_DIMENSIONS), sort=True).agg(
+        amount=('amount', 'sum'), fees=('fees', 'sum'), count=('count', 'sum'),
+        first_date=('first_date', 'min'), last_date=('last_date', 'max'),
+    )
+    # Dollar sums are rounded to cents so the totals do not depend on the
+    # order batches were folded in (file by file, chunk by chunk or all at once)
+    merged[['amount', 'fees']] = merged[['amount', 'fees']].round(2)
+    return merged.reset_index()
+
+def _store_signature():
+    return f'{_AGG_VERSION}|{_LOADER_VERSION}|{DATE_START}|{DATE_END}'
+
+def _file_key(fp):
+    st = os.stat(fp)
+    return f'{os.path.abspath(fp)}|{st.st_size}|{st.st_mtime_ns}'
+
+def _empty_store():
+    return {'cube': merge_cubes(), 'seen': np.empty(0, dtype=np.uint64), 'files': []}
+
+def load_store(store_dir=AGG_STORE_DIR):
+    """Returns {'cube', 'seen', 'files'}; an empty store if missing or stale."""
+    empty = _empty_store()
+    try:
+        with open(os.path.join(store_dir, 'files.json')) as f:
+            meta = json.load(f)
+        if meta.get('signature') != _store_signature():
+            return empty
+        cube = pd.read_csv(os.path.join(store_dir, 'cube.csv'), dtype={dim: str for dim in CUBE_DIMENSIONS},
+                           parse_dates=['first_date', 'last_date'])
+        seen = np.load(os.path.join(store_dir, 'seen_hashes.npy'))
+    except (OSError, ValueError):
+        return empty
+    return {'cube': cube, 'seen': seen, 'files': meta.get('files', [])}
+
+def save_store(store, store_dir=AGG_STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    store['cube'].to_csv(os.path.join(store_dir, 'cube.csv'), index=False)
+    np.save(os.path.join(store_dir, 'seen_hashes.npy'), store['seen'])
+    with open(os.path.join(store_dir, 'files.json'), 'w') as f:
+        json.dump({'signature': _store_signature(), 'files': store['files']}, f, indent=2)
+
+def fold_new_rows(store, df):
+    """
+    Fold the rows of a cleaned (not yet enriched) frame that the store has
+    not seen into its cube. Returns the number of rows added.
+    """
+    hashes = row_hashes(df)
+    _, first = np.unique(hashes, return_index=True)       # duplicates within df
+    keep = np.zeros(len(df), dtype=bool)
+    keep[first] = True
+    if len(store['seen']):
+        pos = np.searchsorted(store['seen'], hashes).clip(max=len(store['seen']) - 1)
+        keep &= store['seen'][pos] != hashes
+    if not keep.any():
+        return 0
+    new = enrich(df[keep].reset_index(drop=True))
+    store['cube'] = merge_cubes(store['cube'], build_cube(new))
+    store['seen'] = np.union1d(store['seen'], hashes[keep])
+    return int(keep.sum())
+
+def _fold_files(store, file_paths, use_cache=True, chunksize=None):
+    done = set(store['files'])
+    added = 0
+    for fp in file_paths:
+        try:
+            key = _file_key(fp)
+            if key in done:
+                continue
+            chunks = _read_export(fp, chunksize) if chunksize else [load_file(fp, use_cache=use_cache)]
+            for chunk in chunks:
+                added += fold_new_rows(store, chunk)
+            path = key.split('|', 1)[0]
+            store['files'] = [k for k in store['files'] if k.split('|', 1)[0] != path] + [key]
+        except Exception as e:
+            print(f"Error loading {fp}: {e}")
+    return added, set(store['files']) != done
+
+def update_aggregates(file_paths, store_dir=AGG_STORE_DIR, use_cache=True, chunksize=None):
+    """
+    Bring the on-disk aggregate store up to date with file_paths; returns the
+    cube. With chunksize, new exports are streamed (see stream_aggregates).
+    """
+    store = load_store(store_dir)
+    added, changed = _fold_files(store, file_paths, use_cache, chunksize)
+    if added or changed:
+        save_store(store, store_dir)
+    print(f"Aggregate store: {added:,} new transactions folded in ({len(store['seen']):,} total)")
+    return store['cube']
+
+def stream_aggregates(file_paths, chunksize=CHUNK_ROWS):
+    """
+    Out-of-core path: read each export chunksize rows at a time, clean →
+    enrich → cube each chunk and merge it into the running cube, then drop
+    it. Peak memory is one chunk plus the cube (bounded by the dimension
+    cardinalities) plus 8 bytes per distinct transaction for the dedup
+    hashes — never the full history. Same result as
+    build_cube(enrich(load_and_clean(file_paths))). Nothing is persisted.
+    """
+    store = _empty_store()
+    _fold_files(store, file_paths, use_cache=False, chunksize=chunksize)
+    return store['cube']
+
+def cube_slice(cube, dim, value='amount', **filters):
+    """
+    Sum of `value` along one cube dimension, after keeping only cells that
+    match `filters` (e.g. action_type='SELL_OPEN'). Indexed by the dimension
+    value and named like the source column, like the groupby it replaces.
+    """
+    for col, want in filters.items():
+        cube = cube[cube[col].isin([want] if isinstance(want, str) else want)]
+    out = cube.groupby(dim, sort=True)[value].sum()
+    out.index.name = CUBE_DIMENSIONS[dim]
+    return out
+
 # ── Analysis ────────────────────────────────────────────────────────────────
 
-def print_summary(df):
+def print_summary(cube):
+    monthly = cube_slice(cube, 'month')
     print('=' * 50)
     print('SUMMARY')
     print('=' * 50)
-    print(f"Total transactions : {len(df):,}")
-    print(f"Date range         : {df['Run Date'].min().date()} to {df['Run Date'].max().date()}")
-    print(f"Total Net P&L      : ${df['Amount'].sum():,.2f}")
-    print(f"Total Fees Paid    : ${(df['Commission'] + df['Fees']).sum():,.2f}")
-    monthly = df.groupby('month_str')['Amount'].sum()
+    print(f"Total transactions : {int(cube_slice(cube, 'month', 'count').sum()):,}")
+    print(f"Date range         : {cube['first_date'].min().date()} to {cube['last_date'].max().date()}")
+    print(f"Total Net P&L      : ${monthly.sum():,.2f}")
+    print(f"Total Fees Paid    : ${cube_slice(cube, 'month', 'fees').sum():,.2f}")
     win_rate = (monthly > 0).sum() / len(monthly)
     print(f"Monthly Win Rate   : {win_rate:.0%} ({(monthly > 0).sum()}/{len(monthly)} months)")
     print()
@@ -71,23 +371,24 @@ def print_summary(df):
     print(monthly.to_string())
     print()
     print('── P&L by Account ──')
-    print(df.groupby('Account')['Amount'].sum().sort_values(ascending=False).to_string())
+    print(cube_slice(cube, 'account').sort_values(ascending=False).to_string())
     print()
     print('── P&L by Underlying (worst to best) ──')
-    print(df.groupby('underlying')['Amount'].sum().sort_values().to_string())
+    print(cube_slice(cube, 'underlying').sort_values().to_string())
     print()
     print('── PUT vs CALL ──')
-    print(df.groupby('option_type')['Amount'].sum().to_string())
+    print(cube_slice(cube, 'option_type').to_string())
 
 # ── Visualizations ──────────────────────────────────────────────────────────
 
 def _month_label(m):
     return m[-2:] + "'" + m[2:4]
 
-def make_charts(df, out_dir='charts'):
-    os.makedirs(out_dir, exist_ok=True)
+def build_figures(cube):
+    """The seven report figures, keyed by output file name."""
+    figures = {}
 
-    monthly = df.groupby('month_str')['Amount'].sum().reset_index()
+    monthly = cube_slice(cube, 'month').reset_index()
     monthly.columns = ['month', 'pnl']
     monthly['cum_pnl'] = monthly['pnl'].cumsum()
     monthly['label'] = monthly['month'].apply(_month_label)
@@ -115,10 +416,10 @@ def make_charts(df, out_dir='charts'):
     fig1.update_yaxes(title_text='P&L ($)', tickformat='$,.0f', row=1, col=1)
     fig1.update_yaxes(title_text='Cumul. ($)', tickformat='$,.0f', row=2, col=1)
     fig1.update_xaxes(title_text='Month', row=2, col=1)
-    fig1.write_image(f'{out_dir}/chart1_monthly_pnl.png')
+    figures['chart1_monthly_pnl.png'] = fig1
 
     # Chart 2: Ticker P&L horizontal bar
-    und_pnl = df.groupby('underlying')['Amount'].sum().sort_values()
+    und_pnl = cube_slice(cube, 'underlying').sort_values()
     top_combo = pd.concat([und_pnl.head(4), und_pnl.tail(10)])
     fig2 = go.Figure(go.Bar(
         x=top_combo.values,
@@ -134,10 +435,10 @@ def make_charts(df, out_dir='charts'):
         xaxis=dict(title_text='Net P&L ($)', tickformat='$,.0f'),
         height=700, margin=dict(l=100, r=80, t=120, b=60)
     )
-    fig2.write_image(f'{out_dir}/chart2_ticker_pnl.png')
+    figures['chart2_ticker_pnl.png'] = fig2
 
     # Chart 3: PUT vs CALL donut
-    opt_pnl = df[df['option_type'].isin(['PUT', 'CALL'])].groupby('option_type')['Amount'].sum().reset_index()
+    opt_pnl = cube_slice(cube, 'option_type').reindex(['CALL', 'PUT']).dropna().rename('Amount').reset_index()
     fig3 = go.Figure(go.Pie(
         labels=opt_pnl['option_type'], values=opt_pnl['Amount'].abs(),
         hole=0.4, marker_colors=['#00d4a8', '#e74c3c'],
@@ -148,10 +449,10 @@ def make_charts(df, out_dir='charts'):
                        "<span style='font-size:16px;font-weight:normal;'>PUT: +$31,496 | CALL: -$2,815</span>"},
         legend=dict(orientation='v', x=1.0)
     )
-    fig3.write_image(f'{out_dir}/chart3_put_vs_call.png')
+    figures['chart3_put_vs_call.png'] = fig3
 
     # Chart 4: Monthly trade count
-    tc = df[df['action_type'] == 'SELL_OPEN'].groupby('month_str').size().reset_index()
+    tc = cube_slice(cube, 'month', 'count', action_type='SELL_OPEN').reset_index()
     tc.columns = ['month', 'count']
     fig4 = go.Figure(go.Bar(
         x=tc['month'].apply(_month_label), y=tc['count'],
@@ -164,13 +465,13 @@ def make_charts(df, out_dir='charts'):
         xaxis=dict(title_text='Month'),
         yaxis=dict(title_text='# of Trades')
     )
-    fig4.write_image(f'{out_dir}/chart4_trade_count.png')
+    figures['chart4_trade_count.png'] = fig4
 
     # Chart 5: Account P&L
-    acct = df.groupby('Account')['Amount'].sum().sort_values(ascending=False).reset_index()
+    acct = cube_slice(cube, 'account').sort_values(ascending=False).rename('Amount').reset_index()
     name_map = {'Individual': 'Individual', 'Rollover IRA': 'Rollover IRA',
                 'ROTH IRA': 'Roth IRA', 'Health Savings Account': 'HSA'}
-    acct['short'] = acct['Account'].map(name_map).fillna(acct['Account'])
+    acct['short'] = acct['Account'].astype(str).map(name_map).fillna(acct['Account'].astype(str))
     fig5 = go.Figure(go.Bar(
         x=acct['short'], y=acct['Amount'],
         marker_color=['#3498db', '#9b59b6', '#e67e22', '#1abc9c'],
@@ -184,11 +485,11 @@ def make_charts(df, out_dir='charts'):
         yaxis=dict(title_text='Net P&L ($)', tickformat='$,.0f'),
         margin=dict(l=80, r=40, t=120, b=60)
     )
-    fig5.write_image(f'{out_dir}/chart5_account_pnl.png')
+    figures['chart5_account_pnl.png'] = fig5
 
     # Chart 6: Weekday P&L
     wday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    wday = df.groupby('weekday')['Amount'].sum().reindex(wday_order).reset_index()
+    wday = cube_slice(cube, 'weekday').reindex(wday_order).rename('Amount').reset_index()
     fig6 = go.Figure(go.Bar(
         x=wday['weekday'], y=wday['Amount'],
         marker_color=['#e74c3c' if v < 0 else '#00d4a8' for v in wday['Amount']],
@@ -200,10 +501,10 @@ def make_charts(df, out_dir='charts'):
         xaxis=dict(title_text='Day of Week'),
         yaxis=dict(title_text='Net P&L ($)', tickformat='$,.0f')
     )
-    fig6.write_image(f'{out_dir}/chart6_weekday_pnl.png')
+    figures['chart6_weekday_pnl.png'] = fig6
 
     # Chart 7: Ticker frequency
-    freq = df[df['action_type'] == 'SELL_OPEN'].groupby('underlying').size().sort_values(ascending=False).head(12)
+    freq = cube_slice(cube, 'underlying', 'count', action_type='SELL_OPEN').sort_values(ascending=False).head(12)
     fig7 = go.Figure(go.Bar(
         x=freq.values,
         y=[f'  {t}' for t in freq.index],
@@ -218,20 +519,145 @@ def make_charts(df, out_dir='charts'):
         xaxis=dict(title_text='Trades'),
         height=500, margin=dict(l=90, r=60, t=120, b=60)
     )
-    fig7.write_image(f'{out_dir}/chart7_ticker_frequency.png')
+    figures['chart7_ticker_frequency.png'] = fig7
+
+    return figures
 
-    print(f'✅  7 charts saved to ./{out_dir}/')
+# ── Chart Rendering ─────────────────────────────────────────────────────────
+#
+# kaleido export is the slow part of a run, so figures are rendered across a
+# process pool and only when they changed: each figure's JSON (data + layout,
+# i.e. everything that ends up in the PNG) is hashed together with the export
+# scale and compared with RENDER_CACHE_FILE in the output folder. Preview
+# mode exports at PREVIEW_SCALE — its hashes differ, so the next full-size
+# run re-renders.
+
+RENDER_CACHE_FILE = '.render_cache.json'
+PREVIEW_SCALE     = 0.5
+
+def _render_figure(fig_json, path, scale):
+    pio.from_json(fig_json).write_image(path, scale=scale)
+
+def render_figures(figures, out_dir='charts', preview=False, max_workers=None):
+    """Write figures as PNGs, skipping unchanged ones. Returns (rendered, skipped)."""
+    os.makedirs(out_dir, exist_ok=True)
+    scale = PREVIEW_SCALE if preview else 1.0
+    cache_file = os.path.join(out_dir, RENDER_CACHE_FILE)
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    jobs = {}
+    for name, fig in figures.items():
+        fig_json = fig.to_json()
+        digest = hashlib.sha1(f'{scale}|{fig_json}'.encode()).hexdigest()
+        if cache.get(name) == digest and os.path.exists(os.path.join(out_dir, name)):
+            continue
+        jobs[name] = (fig_json, digest)
+
+    rendered = 0
+    if jobs:
+        workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_render_figure, fig_json, os.path.join(out_dir, name), scale): (name, digest)
+                for name, (fig_json, digest) in jobs.items()
+            }
+            for fut in as_completed(futures):
+                name, digest = futures[fut]
+                try:
+                    fut.result()
+                    cache[name] = digest
+                    rendered += 1
+                except Exception as e:
+                    cache.pop(name, None)
+                    print(f"Render failed for {name}: {e}")
+        with open(cache_file, 'w') as f:
+            json.dump(cache, f, indent=2)
+    return rendered, len(figures) - len(jobs)
+
+def make_charts(cube, out_dir='charts', preview=False, max_workers=None):
+    rendered, skipped = render_figures(build_figures(cube), out_dir, preview, max_workers)
+    mode = ' (preview)' if preview else ''
+    print(f'✅  {rendered} charts rendered{mode}, {skipped} unchanged → ./{out_dir}/')
 
 # ── Main ────────────────────────────────────────────────────────────────────
+#
+# The summary and charts come from the aggregate store, which folds in only
+# new exports. The outputs that need the full enriched history — the cleaned
+# CSV, the trade table and the report's transaction scatter — are rebuilt only
+# when the export set they were built from changed: OUTPUTS_STAMP records the
+# store signature (versions + DATE_START/DATE_END) and the path|size|mtime of
+# every export, so an added, removed or replaced file or a new date window
+# triggers a rebuild whatever its mtime. --full forces one (e.g. after a code
+# change), so a rerun on unchanged exports does not re-parse every quarter.
+
+CLEANED_FILE   = 'data/options_cleaned.csv'
+TRADES_FILE    = 'data/trades.csv'
+DETAIL_OUTPUTS = [CLEANED_FILE, TRADES_FILE, REPORT_FILE]
+OUTPUTS_STAMP  = os.path.join(AGG_STORE_DIR, 'outputs.json')
+
+def outputs_stamp(file_paths):
+    return {'signature': _store_signature(), 'files': sorted(_file_key(fp) for fp in file_paths)}
+
+def outputs_current(file_paths, outputs=DETAIL_OUTPUTS):
+    """True if every output exists and was built from exactly these exports and date window."""
+    if not all(os.path.exists(fp) for fp in outputs):
+        return False
+    try:
+        with open(OUTPUTS_STAMP) as f:
+            return json.load(f) == outputs_stamp(file_paths)
+    except (OSError, ValueError):
+        return False
+
+def save_outputs_stamp(file_paths):
+    os.makedirs(os.path.dirname(OUTPUTS_STAMP), exist_ok=True)
+    with open(OUTPUTS_STAMP, 'w') as f:
+        json.dump(outputs_stamp(file_paths), f, indent=2)
+
+def export_pngs(cube, preview=False):
+    """make_charts(), reporting a failed export (e.g. kaleido missing) instead of raising."""
+    # checked up front so a missing install is one line, not one error per chart
+    if importlib.util.find_spec('kaleido') is None:
+        print("PNG export skipped (No module named 'kaleido') — report.html has the same charts.")
+        return
+    try:
+        make_charts(cube, preview=preview)
+    except Exception as e:
+        print(f'PNG export skipped ({e}) — report.html has the same charts.')
 
 if __name__ == '__main__':
     files = glob.glob('data/Accounts_History*.csv')
     if not files:
         print('No CSV files found in data/. Add Fidelity export files and retry.')
     else:
-        df = load_and_clean(files)
-        df = enrich(df)
-        print_summary(df)
-        df.to_csv('data/options_cleaned.csv', index=False)
-        print('\nSaved cleaned data → data/options_cleaned.csv')
-        make_charts(df)
+        preview = '--preview' in sys.argv   # low-res PNGs for a quick look
+        pngs = '--png' in sys.argv or preview   # static PNGs need kaleido; the HTML report does not
+        if '--stream' in sys.argv:
+            # Multi-year histories: bounded memory, summary + report (no scatter) + optional PNGs
+            cube = stream_aggregates(files)
+            print_summary(cube)
+            write_html_report(cube)
+            if pngs:
+                export_pngs(cube, preview)
+            sys.exit(0)
+        cube = update_aggregates(files)
+        print_summary(cube)
+        if '--full' in sys.argv or not outputs_current(files):
+            df = enrich(load_and_clean(files))
+            df.to_csv(CLEANED_FILE, index=False)
+            print(f'\nSaved cleaned data → {CLEANED_FILE}')
+            trades = build_trades(df)
+            print()
+            print_trade_summary(trades)
+            trades.to_csv(TRADES_FILE, index=False)
+            print(f'\nSaved per-trade table → {TRADES_FILE}')
+            write_html_report(cube, df)
+            save_outputs_stamp(files)
+        else:
+            print(f'\n{CLEANED_FILE}, {TRADES_FILE} and {REPORT_FILE} are up to date with the exports — '
+                  'not rebuilt (--full forces a rebuild).')
+        if pngs:
+            export_pngs(cube, preview)
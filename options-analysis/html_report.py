@@ -0,0 +1,220 @@
+import json
+import numpy as np
+import pandas as pd
+from plotly.offline import get_plotlyjs
+
+# ── Interactive HTML Report ─────────────────────────────────────────────────
+#
+# One self-contained HTML file (plotly.js inlined, works offline) built from:
+#   - the aggregate cube (analysis.build_cube) for every summary chart, and
+#   - optionally the enriched transactions for a WebGL (scattergl) scatter.
+#
+# Both are embedded as compact columnar JSON: dimension values are sent once
+# as lookup lists and rows carry integer codes. Account / ticker / put-call
+# filters run in the browser — each change re-sums the cube cells (a few
+# thousand) and filters the transaction arrays in a single typed-array pass,
+# then Plotly.react redraws. No PNG export, no kaleido.
+
+REPORT_FILE = 'report.html'
+TOP_TICKERS = 8      # worst and best tickers shown in the ticker chart (each side)
+
+def _encode(values):
+    codes, uniques = pd.factorize(pd.Series(values).astype(str), sort=True)
+    return codes.astype(int).tolist(), [str(u) for u in uniques]
+
+def _script_json(data):
+    """JSON safe to inline in <script>: a ticker or account name can't close the tag."""
+    text = json.dumps(data, separators=(',', ':'))
+    return text.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+
+def report_data(cube, df=None):
+    """Columnar payload for the page: {'dims', 'cube', 'tx'}."""
+    dims, cube_cols = {}, {}
+    for dim in ['month', 'underlying', 'account', 'option_type', 'weekday']:
+        cube_cols[dim], dims[dim] = _encode(cube[dim])
+    cube_cols['sell_open'] = (cube['action_type'] == 'SELL_OPEN').astype(int).tolist()
+    cube_cols['amount'] = cube['amount'].round(2).tolist()
+    cube_cols['count']  = cube['count'].astype(int).tolist()
+
+    tx = None
+    if df is not None and not df.empty:
+        lookup = lambda dim, col: pd.Categorical(df[col].astype(str), categories=dims[dim]).codes.astype(int).tolist()
+        tx = {
+            'day':         (df['Run Date'].to_numpy().astype('datetime64[D]').astype(np.int64)).tolist(),
+            'amount':      df['Amount'].round(2).tolist(),
+            'account':     lookup('account', 'Account'),
+            'underlying':  lookup('underlying', 'underlying'),
+            'option_type': lookup('option_type', 'option_type'),
+        }
+    return {'dims': dims, 'cube': cube_cols, 'tx': tx}
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Options Trading Analytics</title>
+<style>
+ body{font-family:-apple-system,Segoe UI,Helvetica,Arial,sans-serif;margin:0;background:#f7f8fa;color:#222}
+ header{padding:14px 24px;background:#1f2a36;color:#fff}
+ header h1{font-size:20px;margin:0 0 4px 0}
+ #filters{display:flex;gap:18px;align-items:flex-start;padding:12px 24px;background:#fff;border-bottom:1px solid #ddd}
+ #filters label{font-size:12px;font-weight:600;display:block;margin-bottom:4px}
+ #filters select{min-width:180px}
+ #kpis{display:flex;gap:12px;padding:12px 24px}
+ .kpi{background:#fff;border:1px solid #ddd;border-radius:6px;padding:8px 14px;min-width:140px}
+ .kpi b{display:block;font-size:18px}
+ .grid{display:grid;grid-template-columns:1fr 1fr;gap:12px;padding:0 24px 24px}
+ .card{background:#fff;border:1px solid #ddd;border-radius:6px;height:420px}
+ .wide{grid-column:1 / span 2}
+</style>
+<script>__PLOTLYJS__</script></head>
+<body>
+<header><h1>Options Trading Analytics</h1><div id="subtitle"></div></header>
+<div id="filters">
+ <div><label>Account</label><select id="f-account" multiple size="5"></select></div>
+ <div><label>Ticker</label><select id="f-underlying" multiple size="5"></select></div>
+ <div><label>PUT / CALL</label><select id="f-option_type" multiple size="5"></select></div>
+ <div><label>&nbsp;</label><button id="reset">Reset filters</button><br><small>Ctrl/Cmd-click to select several</small></div>
+</div>
+<div id="kpis"></div>
+<div class="grid">
+ <div class="card wide" id="c-monthly"></div>
+ <div class="card" id="c-ticker"></div>
+ <div class="card" id="c-account"></div>
+ <div class="card" id="c-weekday"></div>
+ <div class="card" id="c-frequency"></div>
+ <div class="card wide" id="c-scatter"></div>
+</div>
+<script>
+const DATA = __DATA__;
+const TOP = __TOP__;
+const D = DATA.dims, C = DATA.cube, T = DATA.tx;
+const FILTERS = ['account', 'underlying', 'option_type'];
+const fmt = v => (v < 0 ? '-$' : '$') + Math.abs(v).toLocaleString(undefined, {maximumFractionDigits: 0});
+const color = v => v < 0 ? '#e74c3c' : '#00d4a8';
+const layout = (title, extra) => Object.assign({title: {text: title, font: {size: 15}},
+  margin: {l: 70, r: 20, t: 50, b: 50}, paper_bgcolor: '#fff', plot_bgcolor: '#fff'}, extra || {});
+
+for (const f of FILTERS) {
+  const sel = document.getElementById('f-' + f);
+  D[f].forEach((v, i) => sel.add(new Option(v, i)));
+  sel.addEventListener('change', render);
+}
+document.getElementById('reset').addEventListener('click', () => {
+  for (const f of FILTERS) for (const o of document.getElementById('f-' + f).options) o.selected = false;
+  render();
+});
+
+function masks() {
+  // Per filter dimension: Uint8Array over codes, or null when nothing selected (= all)
+  const out = {};
+  for (const f of FILTERS) {
+    const picked = [...document.getElementById('f-' + f).selectedOptions].map(o => +o.value);
+    if (!picked.length) { out[f] = null; continue; }
+    const m = new Uint8Array(D[f].length);
+    picked.forEach(i => m[i] = 1);
+    out[f] = m;
+  }
+  return out;
+}
+
+function keep(m, cols, i) {
+  for (const f of FILTERS) if (m[f] && !m[f][cols[f][i]]) return false;
+  return true;
+}
+
+function sums(m, dim, field, onlySellOpen) {
+  const out = new Float64Array(D[dim].length);
+  for (let i = 0; i < C.amount.length; i++) {
+    if (onlySellOpen && !C.sell_open[i]) continue;
+    if (keep(m, C, i)) out[C[dim][i]] += C[field][i];
+  }
+  return out;
+}
+
+function render() {
+  const m = masks();
+
+  // Monthly P&L + cumulative
+  const monthly = sums(m, 'month', 'amount');
+  let run = 0; const cum = Array.from(monthly, v => run += v);
+  const total = run;
+  const trades = sums(m, 'month', 'count').reduce((a, b) => a + b, 0);
+  const wins = monthly.filter(v => v > 0).length, active = monthly.filter(v => v !== 0).length;
+  Plotly.react('c-monthly', [
+    {type: 'bar', x: D.month, y: Array.from(monthly), marker: {color: Array.from(monthly, color)}, name: 'Monthly'},
+    {type: 'scatter', mode: 'lines+markers', x: D.month, y: cum, yaxis: 'y2', name: 'Cumulative',
+     line: {color: '#f39c12', width: 3}},
+  ], layout('Monthly P&L — cumulative ' + fmt(total), {yaxis: {tickformat: '$,.0f'},
+     yaxis2: {overlaying: 'y', side: 'right', tickformat: '$,.0f'}, legend: {orientation: 'h'}}));
+
+  // Ticker P&L: worst + best
+  const und = sums(m, 'underlying', 'amount');
+  const order = [...und.keys()].filter(i => und[i] !== 0).sort((a, b) => und[a] - und[b]);
+  const shown = order.length > 2 * TOP ? order.slice(0, TOP).concat(order.slice(-TOP)) : order;
+  Plotly.react('c-ticker', [{type: 'bar', orientation: 'h', x: shown.map(i => und[i]),
+    y: shown.map(i => D.underlying[i]), marker: {color: shown.map(i => color(und[i]))}}],
+    layout('Net P&L by Ticker', {xaxis: {tickformat: '$,.0f'}, margin: {l: 70, r: 20, t: 50, b: 40}}));
+
+  // Account P&L
+  const acct = sums(m, 'account', 'amount');
+  Plotly.react('c-account', [{type: 'bar', x: D.account, y: Array.from(acct),
+    marker: {color: Array.from(acct, color)}, text: Array.from(acct, fmt), textposition: 'auto'}],
+    layout('Net P&L by Account', {yaxis: {tickformat: '$,.0f'}}));
+
+  // Weekday P&L (calendar order)
+  const wd = sums(m, 'weekday', 'amount');
+  const days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'].filter(d => D.weekday.includes(d));
+  const wdv = days.map(d => wd[D.weekday.indexOf(d)]);
+  Plotly.react('c-weekday', [{type: 'bar', x: days, y: wdv, marker: {color: wdv.map(color)}}],
+    layout('Net P&L by Day of Week', {yaxis: {tickformat: '$,.0f'}}));
+
+  // Opening-trade frequency
+  const freq = sums(m, 'underlying', 'count', true);
+  const top = [...freq.keys()].filter(i => freq[i] > 0).sort((a, b) => freq[b] - freq[a]).slice(0, 12).reverse();
+  Plotly.react('c-frequency', [{type: 'bar', orientation: 'h', x: top.map(i => freq[i]),
+    y: top.map(i => D.underlying[i]), marker: {color: '#9b59b6'}}],
+    layout('New Positions (SELL_OPEN) by Ticker', {margin: {l: 70, r: 20, t: 50, b: 40}}));
+
+  // Transactions — WebGL scatter, one trace per PUT/CALL/UNKNOWN
+  if (T) {
+    const traces = D.option_type.map(name => ({type: 'scattergl', mode: 'markers', name: name,
+      x: [], y: [], marker: {size: 4, opacity: 0.6}}));
+    for (let i = 0; i < T.amount.length; i++) {
+      if (!keep(m, T, i)) continue;
+      const t = traces[T.option_type[i]];
+      t.x.push(T.day[i] * 86400000);
+      t.y.push(T.amount[i]);
+    }
+    const shownTx = traces.reduce((a, t) => a + t.x.length, 0);
+    Plotly.react('c-scatter', traces, layout('Transactions (' + shownTx.toLocaleString() + ')',
+      {yaxis: {tickformat: '$,.0f', title: {text: 'Amount'}}, xaxis: {type: 'date'}}));
+  }
+
+  document.getElementById('kpis').innerHTML =
+    [['Net P&L', fmt(total)], ['Transactions', trades.toLocaleString()],
+     ['Winning months', wins + ' / ' + active]].map(([k, v]) => `<div class="kpi">${k}<b>${v}</b></div>`).join('');
+}
+
+document.getElementById('subtitle').textContent = '__SUBTITLE__';
+if (!T) document.getElementById('c-scatter').style.display = 'none';
+render();
+</script>
+</body></html>
+"""
+
+def write_html_report(cube, df=None, path=REPORT_FILE):
+    """
+    Write the interactive report. `cube` drives every summary chart; pass the
+    enriched transactions as `df` to add the WebGL transaction scatter
+    (omitted in streaming mode, where no full frame exists).
+    """
+    data = report_data(cube, df)
+    months = data['dims']['month']
+    subtitle = f"{months[0]} – {months[-1]} | {int(cube['count'].sum()):,} transactions" if months else ''
+    html = (_PAGE
+            .replace('__DATA__', _script_json(data))
+            .replace('__TOP__', str(TOP_TICKERS))
+            .replace('__SUBTITLE__', subtitle)
+            .replace('__PLOTLYJS__', get_plotlyjs()))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f'✅  Interactive report saved → {path}')
+    return path
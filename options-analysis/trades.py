@@ -0,0 +1,296 @@
+import numpy as np
+import pandas as pd
+
+# ── Trade Lifecycle Matching ────────────────────────────────────────────────
+#
+# Pairs every opening leg (SELL_OPEN / BUY_OPEN) with how it ended
+# (BUY_CLOSE / SELL_CLOSE / EXPIRED / ASSIGNED) FIFO per contract, then groups
+# legs opened together into one trade (e.g. the two legs of a put spread).
+#
+# Contract key: Account, underlying, expiry, strike, put_call, side.
+# side comes from the Quantity sign — SELL_OPEN is negative (short), and a
+# closing leg with positive quantity (BUY_CLOSE, EXPIRED/ASSIGNED of a short)
+# closes a short.
+#
+# Spreads are paired before FIFO, so a contract shared by two spreads (e.g.
+# the same long strike bought on two days) is closed against the spread that
+# actually closed: on each side, the legs of one Account / underlying /
+# expiry / put-call opened (or closed) on one day are aggregated per strike
+# and the k-th lowest short strike is paired with the k-th lowest long strike
+# when both sides have the same number of strikes and the pair the same
+# quantity. An opening pair and a closing pair with identical strikes and
+# quantity form a lot: walking each signature by date, a closing pair takes
+# the oldest opening pair still waiting, and one with none waiting (opened
+# before the data window) is skipped. The lot number is part of the contract
+# key, so its legs only match each other. Legs not in a lot (partial closes,
+# legging out, naked legs) fall back to FIFO per contract. All of it runs on
+# integer codes and sorted numpy arrays — no per-row Python loop and no
+# merges.
+#
+# FIFO is a single sort-merge: each leg covers an interval of cumulative
+# contracts within its key; opens and closes are laid on one global number
+# line (key offset + cumsum) and every breakpoint-delimited segment is matched
+# to its open and close row with searchsorted. No per-row Python loop.
+
+OPEN_ACTIONS  = ['SELL_OPEN', 'BUY_OPEN']
+CLOSE_ACTIONS = ['BUY_CLOSE', 'SELL_CLOSE', 'EXPIRED', 'ASSIGNED']
+CONTRACT_KEY  = ['Account', 'underlying', 'expiry', 'strike', 'put_call', 'side']
+TRADE_KEY     = ['Account', 'underlying', 'expiry', 'put_call', 'open_date']
+SPREAD_KEY    = ['Account', 'underlying', 'expiry', 'put_call']
+_LEG_COLS     = SPREAD_KEY + ['strike', 'Run Date', 'action_type', 'Quantity', 'Amount']
+
+def _legs(df, actions):
+    legs = df.loc[df['action_type'].isin(actions) & df['expiry'].notna() & (df['Quantity'] != 0), _LEG_COLS].copy()
+    legs['qty']   = legs['Quantity'].abs()
+    legs['side']  = np.where(
+        legs['action_type'].isin(['SELL_OPEN']) |
+        (~legs['action_type'].isin(OPEN_ACTIONS) & (legs['Quantity'] > 0)),
+        'SHORT', 'LONG')
+    legs['amount_per_contract'] = legs['Amount'] / legs['qty']
+    legs['row'] = legs.index
+    return legs
+
+def _day_strikes(legs, spread):
+    """Legs summed per (spread, day, short, strike), sorted; plus each leg's row in that table (-1: no strike)."""
+    key = pd.DataFrame({
+        'spread': spread,
+        'day':    legs['Run Date'].to_numpy(),
+        'short':  (legs['side'] == 'SHORT').to_numpy(),
+        'strike': legs['strike'].to_numpy(dtype=float, na_value=np.nan),
+        'qty':    legs['qty'].to_numpy(dtype=float),
+    })
+    g = key.groupby(['spread', 'day', 'short', 'strike'], sort=True)
+    return g['qty'].sum().reset_index(), g.ngroup().fillna(-1).to_numpy(dtype=int)
+
+def _spread_pairs(k):
+    """
+    (short, long) row pairs of _day_strikes(): per spread and day the k-th
+    lowest short strike with the k-th lowest long strike, when both sides
+    have the same number of strikes and the pair the same quantity.
+    """
+    n = len(k)
+    if n == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    spread, day, short, qty = (k[c].to_numpy() for c in ['spread', 'day', 'short', 'qty'])
+    new   = np.r_[True, (spread[1:] != spread[:-1]) | (day[1:] != day[:-1]) | (short[1:] != short[:-1])]
+    gid   = np.cumsum(new) - 1
+    start = np.flatnonzero(new)
+    size  = np.diff(np.r_[start, n])
+    rank  = np.arange(n) - start[gid]
+    # A day's long strikes sort right before its short strikes (short=False first)
+    s  = np.flatnonzero(short & (gid > 0))
+    lg = gid[s] - 1
+    l  = np.minimum(start[lg] + rank[s], n - 1)
+    ok = (~short[start[lg]] & (spread[start[lg]] == spread[s]) & (day[start[lg]] == day[s])
+          & (size[lg] == size[gid[s]]) & (qty[l] == qty[s]))
+    return s[ok], l[ok]
+
+def _tag_lots(opens, closes, spread):
+    """Set legs['lot'] on both sides: lot number, or -1 if not part of a matched open/close spread pair."""
+    sides = []
+    for legs, codes in ((opens, spread[:len(opens)]), (closes, spread[len(opens):])):
+        k, row = _day_strikes(legs, codes)
+        sides.append((k, row) + _spread_pairs(k))
+    pairs = pd.concat([
+        pd.DataFrame({'spread': k['spread'].to_numpy()[s], 'short_k': k['strike'].to_numpy()[s],
+                      'long_k': k['strike'].to_numpy()[l], 'qty': k['qty'].to_numpy()[s],
+                      'day': k['day'].to_numpy()[s], 'step': step})
+        for (k, _, s, l), step in zip(sides, (1, -1))
+    ], ignore_index=True)
+    n_open = len(sides[0][2])
+    pairs['sig'] = pairs.groupby(['spread', 'short_k', 'long_k', 'qty'], sort=False).ngroup()
+    pairs['i']   = np.arange(len(pairs))
+
+    # Per signature, walk the pairs by date (opens before closes on the same
+    # day). A close takes the oldest open still waiting (FIFO); a close with
+    # none waiting (opened before the data window) matches nothing instead of
+    # shifting every later lot of that signature.
+    ev    = pairs.sort_values(['sig', 'day', 'step'], ascending=[True, True, False], kind='stable')
+    sig   = ev['sig']
+    depth = ev['step'].groupby(sig).cumsum()
+    floor = depth.clip(upper=0).groupby(sig).cummin()
+    taken = (ev['step'] < 0) & floor.eq(floor.groupby(sig).shift(fill_value=0))
+    o, c  = ev[ev['step'] > 0], ev[taken]
+    o_sig = o['sig'].to_numpy()
+    first = np.searchsorted(o_sig, c['sig'].to_numpy(), side='left')
+    o_pair = o['i'].to_numpy()[first + c.groupby('sig').cumcount().to_numpy()]
+    c_pair = c['i'].to_numpy() - n_open
+    lot    = np.arange(len(c_pair))
+
+    for (k, row, s, l), legs, idx in zip(sides, (opens, closes), (o_pair, c_pair)):
+        k_lot = np.full(len(k) + 1, -1)            # last slot: legs with no strike row
+        k_lot[s[idx]] = lot
+        k_lot[l[idx]] = lot
+        legs['lot'] = k_lot[row]
+
+def match_legs(df):
+    """
+    FIFO-match opening and closing legs of an enriched transaction frame.
+
+    Returns one row per matched (or still-open / orphan) piece:
+        Account, underlying, expiry, strike, put_call, side, qty,
+        open_row, open_date, open_amount, close_row, close_date,
+        close_action, close_amount, pnl, holding_days, status
+    status: CLOSED | OPEN (no close yet) | ORPHAN_CLOSE (opened before the data window)
+    """
+    opens  = _legs(df, OPEN_ACTIONS)
+    closes = _legs(df, CLOSE_ACTIONS)
+
+    # Spread and contract keys (plus lot) as integer codes shared by both sides
+    legs_keys = pd.concat([opens[CONTRACT_KEY], closes[CONTRACT_KEY]], ignore_index=True)
+    spread = legs_keys.groupby(SPREAD_KEY, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+    _tag_lots(opens, closes, spread)
+    keys = pd.DataFrame({
+        'spread': spread,
+        'strike': legs_keys['strike'].to_numpy(dtype=float, na_value=np.nan),
+        'short':  legs_keys['side'].to_numpy() == 'SHORT',
+        'lot':    np.concatenate([opens['lot'].to_numpy(), closes['lot'].to_numpy()]),
+    })
+    key_codes = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+    _, first  = np.unique(key_codes, return_index=True)
+    key_table = legs_keys.iloc[first].reset_index(drop=True)
+    opens['key'] = key_codes[:len(opens)]
+    closes['key'] = key_codes[len(opens):]
+
+    opens  = opens.sort_values(['key', 'Run Date', 'row'], kind='stable').reset_index(drop=True)
+    closes = closes.sort_values(['key', 'Run Date', 'row'], kind='stable').reset_index(drop=True)
+
+    span = float(max(opens['qty'].sum(), closes['qty'].sum())) + 1.0
+    for legs in (opens, closes):
+        legs['end']   = legs.groupby('key')['qty'].cumsum() + legs['key'] * span
+        legs['start'] = legs['end'] - legs['qty']
+
+    # Every interval boundary on both sides; segments between consecutive
+    # boundaries lie inside exactly one open interval and/or one close interval
+    bounds = np.unique(np.concatenate([
+        opens['start'].to_numpy(), opens['end'].to_numpy(),
+        closes['start'].to_numpy(), closes['end'].to_numpy(),
+    ]))
+    seg_lo, seg_hi = bounds[:-1], bounds[1:]
+    mid = (seg_lo + seg_hi) / 2.0
+
+    def _owner(legs):
+        idx = np.searchsorted(legs['end'].to_numpy(), mid, side='left')
+        ok  = idx < len(legs)
+        idx = np.where(ok, idx, 0)
+        ok &= legs['start'].to_numpy()[idx] <= mid if len(legs) else False
+        return np.where(ok, idx, -1)
+
+    o_idx = _owner(opens)  if len(opens)  else np.full(len(mid), -1)
+    c_idx = _owner(closes) if len(closes) else np.full(len(mid), -1)
+    seg   = pd.DataFrame({'o': o_idx, 'c': c_idx, 'qty': seg_hi - seg_lo,
+                          'key': (mid // span).astype(int)})
+    seg   = seg[(seg['o'] >= 0) | (seg['c'] >= 0)]
+    # Adjacent segments with the same (open, close) pair collapse into one piece
+    seg   = seg.groupby(['key', 'o', 'c'], sort=False, as_index=False)['qty'].sum()
+
+    o = opens.reindex(seg['o'].where(seg['o'] >= 0).to_numpy())
+    c = closes.reindex(seg['c'].where(seg['c'] >= 0).to_numpy())
+    o.index = c.index = seg.index
+    base = key_table.reindex(seg['key'].to_numpy()).set_index(seg.index)
+
+    pieces = base.assign(
+        qty          = seg['qty'].to_numpy(),
+        open_row     = o['row'],
+        open_date    = o['Run Date'],
+        open_amount  = o['amount_per_contract'] * seg['qty'],
+        close_row    = c['row'],
+        close_date   = c['Run Date'],
+        close_action = c['action_type'].astype('object'),
+        close_amount = c['amount_per_contract'] * seg['qty'],
+    )
+    pieces['status'] = np.select(
+        [seg['o'].ge(0) & seg['c'].ge(0), seg['o'].ge(0)],
+        ['CLOSED', 'OPEN'], 'ORPHAN_CLOSE')
+    pieces['pnl'] = pieces['open_amount'].fillna(0) + pieces['close_amount'].fillna(0)
+    pieces['holding_days'] = (pieces['close_date'] - pieces['open_date']).dt.days
+    return pieces.reset_index(drop=True)
+
+def build_trades(df, pieces=None):
+    """
+    Per-trade table: legs opened together (same Account, underlying, expiry,
+    put/call and open date) form one trade — a vertical spread is one trade.
+
+    Columns: Account, underlying, expiry, put_call, open_date, close_date,
+    legs, contracts, short_strike, long_strike, credit, pnl, max_risk,
+    return_on_risk, holding_days, status, outcome, win
+
+    short_strike / long_strike are the highest strike on each side (the
+    spread's strikes for a vertical); outcome is how the last leg closed.
+
+    max_risk for puts = (Σ short K·q − Σ long K·q) × 100 − credit, i.e. the
+    loss with the underlying at zero (naked puts included). For calls it is
+    (Σ long K·q − Σ short K·q) × 100 − credit when every short is covered,
+    NaN (unbounded) otherwise. ASSIGNED legs book the option leg at $0; the
+    resulting stock P&L is outside this table.
+    """
+    if pieces is None:
+        pieces = match_legs(df)
+    p = pieces[pieces['status'] != 'ORPHAN_CLOSE'].copy()
+    if p.empty:
+        return pd.DataFrame()
+
+    short = p['side'] == 'SHORT'
+    p['short_kq']   = np.where(short, p['strike'] * p['qty'], 0.0)
+    p['long_kq']    = np.where(short, 0.0, p['strike'] * p['qty'])
+    p['short_qty']  = np.where(short, p['qty'], 0.0)
+    p['long_qty']   = np.where(short, 0.0, p['qty'])
+    p['is_open']    = p['status'] == 'OPEN'
+    p['short_k']    = p['strike'].where(short)
+    p['long_k']     = p['strike'].where(~short)
+    p['close_action'] = p['close_action'].astype('category')
+
+    g = p.groupby(TRADE_KEY, observed=True, sort=False)
+    trades = g.agg(
+        close_date = ('close_date', 'max'),
+        legs       = ('strike', 'size'),
+        contracts  = ('short_qty', 'sum'),
+        long_qty   = ('long_qty', 'sum'),
+        short_kq   = ('short_kq', 'sum'),
+        long_kq    = ('long_kq', 'sum'),
+        credit     = ('open_amount', 'sum'),
+        pnl        = ('pnl', 'sum'),
+        open_legs  = ('is_open', 'sum'),
+        short_strike = ('short_k', 'max'),
+        long_strike  = ('long_k', 'max'),
+        outcome    = ('close_action', 'last'),
+    ).reset_index()
+
+    is_put = trades['put_call'].astype(str) == 'PUT'
+    put_risk  = (trades['short_kq'] - trades['long_kq']) * 100 - trades['credit']
+    call_risk = ((trades['long_kq'] - trades['short_kq']) * 100 - trades['credit']).where(
+        trades['long_qty'] >= trades['contracts'])
+    trades['max_risk'] = np.where(is_put, put_risk, call_risk)
+    trades['max_risk'] = trades['max_risk'].where(trades['max_risk'] > 0)
+
+    trades['status'] = np.where(trades['open_legs'] > 0, 'OPEN', 'CLOSED')
+    trades['close_date'] = trades['close_date'].where(trades['status'] == 'CLOSED')
+    trades['holding_days'] = (trades['close_date'] - trades['open_date']).dt.days
+    trades['return_on_risk'] = (trades['pnl'] / trades['max_risk']).where(trades['status'] == 'CLOSED')
+    trades['win'] = (trades['pnl'] > 0).where(trades['status'] == 'CLOSED')
+
+    cols = ['Account', 'underlying', 'expiry', 'put_call', 'open_date', 'close_date',
+            'legs', 'contracts', 'short_strike', 'long_strike', 'credit', 'pnl',
+            'max_risk', 'return_on_risk', 'holding_days', 'status', 'outcome', 'win']
+    return trades[cols].sort_values(['open_date', 'Account', 'underlying']).reset_index(drop=True)
+
+def print_trade_summary(trades):
+    closed = trades[trades['status'] == 'CLOSED']
+    print('=' * 50)
+    print('TRADE LIFECYCLE')
+    print('=' * 50)
+    print(f"Trades             : {len(trades):,} ({len(closed):,} closed, {len(trades) - len(closed):,} open)")
+    if closed.empty:
+        return
+    print(f"Win Rate           : {closed['win'].astype(float).mean():.0%}")
+    print(f"Avg Holding Period : {closed['holding_days'].mean():.1f} days")
+    print(f"Median Return/Risk : {closed['return_on_risk'].median():.1%}")
+    print()
+    print('── By Underlying (closed trades) ──')
+    by_und = closed.groupby('underlying', observed=True).agg(
+        trades=('pnl', 'size'), pnl=('pnl', 'sum'),
+        win_rate=('win', lambda s: s.astype(float).mean()),
+        avg_days=('holding_days', 'mean'),
+        med_ror=('return_on_risk', 'median'),
+    ).sort_values('pnl')
+    print(by_und.round(2).to_string())
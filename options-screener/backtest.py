@@ -0,0 +1,403 @@
+"""
+backtest.py
+-----------
+Historical backtest of the entry rules in screen_spx() / screen_tickers().
+
+Instead of replaying the screener day by day, the indicator panel (RSI, Bollinger
+position, SMA200, ATR%, volume surge, gap, HV_30 ...) is computed once over the
+full history as dates × tickers arrays. Every gate is then one boolean mask over
+the whole panel, with that day's VIX close mapped through get_vix_regime() /
+VIX_ADJUSTED_PARAMS exactly as get_adjusted_params() does at runtime. A decade
+of the full universe is a few array operations.
+
+Indicators follow pandas_ta's definitions (RSI and ATR use Wilder's RMA, i.e.
+ewm(alpha=1/n)), so the masks match what the screener would have computed.
+
+What cannot be replayed point-in-time:
+    IV gates     — there is no history of option-chain IV. The IV proxy is the
+                   ticker's HV_30 scaled by the market's implied/realized ratio
+                   (VIX / SPX HV_30); IV Rank is then computed against the
+                   trailing 52-week HV_30 range as compute_iv_rank() does, and
+                   IV/HV becomes VIX / SPX HV_30. NaN = fail-open, as live.
+    Earnings     — no historical earnings calendar; the blackout is not applied.
+
+Forward outcomes per signal:
+    fwd_ret_Nd     close-to-close return after N trading days (FORWARD_DAYS)
+    max_drawdown   lowest low over the holding window vs entry close
+    short_strike   put strike at the tier's mid delta target, HOLD_DTE days out,
+                   priced off the IV proxy (option_pricing.strike_for_delta)
+    win            close at the end of the window >= short_strike (spread
+                   expires worthless)
+    breached       any low in the window < short_strike
+    max_loss       close at the end of the window <= short_strike - SPREAD_WIDTH
+    credit         Black-Scholes credit ($/share) of the SPREAD_WIDTH-wide spread
+    pnl            USD per contract held to the end of the window
+
+Usage:
+    python backtest.py                  # 5y, TIER1_CORE + TIER2_WATCHLIST + SPX
+    python backtest.py --period 10y
+
+    from backtest import run_backtest
+    signals, summary = run_backtest(period='10y')
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from option_pricing import put_spread_value, strike_for_delta
+from price_store import get_history
+from options_premium_screener import (
+    TIER1_CORE, TIER2_WATCHLIST, SPX_TICKER, SPX_GAP_DOWN_PCT,
+    RSI_PERIOD, BB_PERIOD, ATR_PERIOD, TIER2_ATR_MAX, ATR_PCT_MIN, VOL_SURGE_MIN,
+    IV_RANK_MIN, IV_HV_MIN, VIX_ADJUSTED_PARAMS, _FALLBACK_PARAMS,
+    TIER1_DELTA_MIN, TIER1_DELTA_MAX, TIER2_DELTA_MIN, TIER2_DELTA_MAX,
+    DTE_MIN, DTE_MAX, SPREAD_WIDTH, get_vix_regime, calculate_signal_strength,
+)
+
+# ============ CONFIG ============
+HISTORY_PERIOD = '5y'
+VIX_TICKER     = '^VIX'
+FORWARD_DAYS   = (5, 10, 21)                       # trading-day horizons
+HOLD_DTE       = (DTE_MIN + DTE_MAX) // 2          # calendar days to the target expiry
+HOLD_BARS      = int(round(HOLD_DTE * 252 / 365))  # same window in trading days
+HV_LOOKBACK    = 30
+IV_RANK_WINDOW = 252
+
+REGIMES = ['LOW', 'NORMAL', 'ELEVATED', 'HIGH']
+_OHLCV  = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def default_tiers() -> dict:
+    """Screener label -> tier, in screening order (SPX first)."""
+    tiers = {'SPX': 'TIER1_CORE'}
+    tiers.update({t: 'TIER1_CORE' for t in TIER1_CORE})
+    tiers.update({t: 'TIER2_WATCH' for t in TIER2_WATCHLIST})
+    return tiers
+
+
+def _symbol(label: str) -> str:
+    return SPX_TICKER if label == 'SPX' else label
+
+
+# ============ INDICATOR PANEL ============
+def load_ohlcv(labels, period: str = HISTORY_PERIOD) -> dict:
+    """
+    Field -> wide dates × tickers frame from the local price store (one read per
+    ticker). SPX is always loaded — the IV proxy needs it. Tickers with no
+    history are dropped.
+    """
+    labels = list(dict.fromkeys(['SPX', *labels]))
+    hists  = {label: get_history(_symbol(label), period) for label in labels}
+    hists  = {label: h for label, h in hists.items() if not h.empty}
+    return {f: pd.DataFrame({label: h[f] for label, h in hists.items()}).sort_index() for f in _OHLCV}
+
+
+def _rma(frame: pd.DataFrame, length: int) -> pd.DataFrame:
+    """Wilder's moving average as pandas_ta computes it."""
+    return frame.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def build_panel(ohlcv: dict, vix: pd.Series) -> dict:
+    """
+    Indicator panel over the whole history.
+
+    Returns {'dates', 'tickers', 'vix', 'regime', 'data'} where data maps
+    indicator name -> float ndarray [n_dates × n_tickers] and regime is the
+    get_vix_regime() label of each day's VIX close (NORMAL where VIX is missing).
+    """
+    close, high, low = ohlcv['Close'], ohlcv['High'], ohlcv['Low']
+    open_, volume    = ohlcv['Open'], ohlcv['Volume']
+    prev_close = close.shift(1)
+
+    delta = close.diff()
+    up    = _rma(delta.clip(lower=0), RSI_PERIOD)
+    down  = _rma((-delta).clip(lower=0), RSI_PERIOD)
+    rsi   = 100.0 * up / (up + down)
+
+    bb_mid   = close.rolling(BB_PERIOD).mean()
+    bb_std   = close.rolling(BB_PERIOD).std()
+    bb_lower = bb_mid - 2 * bb_std
+    bb_pos   = (close - bb_lower) / (4 * bb_std)
+
+    true_range = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+    atr        = _rma(true_range.where(prev_close.notna()), ATR_PERIOD)
+
+    avg_vol_50 = volume.rolling(50).mean()
+    hv_30      = np.log(close / prev_close).rolling(HV_LOOKBACK).std() * np.sqrt(252) * 100.0
+
+    vix   = vix.reindex(close.index).ffill()
+    iv    = hv_30.mul(vix / hv_30['SPX'], axis=0)
+    hv_hi = hv_30.rolling(IV_RANK_WINDOW, min_periods=HV_LOOKBACK).max()
+    hv_lo = hv_30.rolling(IV_RANK_WINDOW, min_periods=HV_LOOKBACK).min()
+    span  = (hv_hi - hv_lo).where(lambda s: s > 0)
+    iv_rank = ((iv - hv_lo) / span * 100.0).clip(0.0, 100.0)
+
+    frames = {
+        'close':       close,
+        'low':         low,
+        'rsi':         rsi,
+        'sma_200':     close.rolling(200).mean(),
+        'bb_position': bb_pos,
+        'atr_pct':     atr / close * 100.0,
+        'volume':      volume,
+        'avg_vol_50':  avg_vol_50,
+        'vol_surge':   volume / avg_vol_50,
+        'gap_pct':     (open_ - prev_close) / prev_close * 100.0,
+        'hv_30':       hv_30,
+        'iv_proxy':    iv,
+        'iv_rank':     iv_rank,
+        'iv_hv_ratio': iv / hv_30,
+    }
+    return {
+        'dates':   close.index,
+        'tickers': list(close.columns),
+        'vix':     vix.to_numpy(),
+        'regime':  vix.map(get_vix_regime).to_numpy(),
+        'data':    {k: v.to_numpy(dtype=float) for k, v in frames.items()},
+    }
+
+
+def day_thresholds(regime, params: dict = VIX_ADJUSTED_PARAMS) -> pd.DataFrame:
+    """Per-day rsi / bb / spx_rsi thresholds from each day's regime label."""
+    table = pd.DataFrame.from_dict(params, orient='index')
+    return table.reindex(regime).fillna(pd.Series(_FALLBACK_PARAMS)).reset_index(drop=True)
+
+
+# ============ ENTRY GATES ============
+def tier_flags(tickers, tiers: dict):
+    """(is_spx, is_tier2) bool arrays, one entry per ticker."""
+    is_spx = np.array([t == 'SPX' for t in tickers])
+    is_t2  = np.array([tiers.get(t) == 'TIER2_WATCH' for t in tickers])
+    return is_spx, is_t2
+
+
+def gate_masks(d: dict, is_spx, is_t2, rsi_thr, bb_thr, spx_thr,
+               iv_rank_min: float = IV_RANK_MIN, iv_hv_min: float = IV_HV_MIN,
+               atr_max: float = TIER2_ATR_MAX, vol_surge_min: float = VOL_SURGE_MIN) -> dict:
+    """
+    Gate name -> bool ndarray, in the order the screener applies them.
+    Every argument broadcasts against the indicator arrays in `d`, so the same
+    rules run over a dates × tickers panel or a flat array of candidate cells.
+    A gate that does not apply to a cell (SPX gap for stocks, Tier 2 ATR cap
+    for Tier 1 ...) is True there. Signal = AND of all gates.
+    """
+    with np.errstate(invalid='ignore'):
+        return {
+            'history':       ~np.isnan(d['sma_200']),
+            'gap_down':      ~is_spx | (d['gap_pct'] <= SPX_GAP_DOWN_PCT),
+            'oversold':      np.where(is_spx, d['rsi'] < spx_thr, d['rsi'] < rsi_thr),
+            'uptrend':       d['close'] > d['sma_200'],
+            'liquid':        is_spx | (d['volume'] > d['avg_vol_50']),
+            'near_lower_bb': is_spx | (d['bb_position'] < bb_thr),
+            'adequate_vol':  is_spx | (d['atr_pct'] > ATR_PCT_MIN),
+            'volume_surge':  is_spx | (d['vol_surge'] > vol_surge_min),
+            'tier2_atr_cap': ~is_t2 | ~(d['atr_pct'] > atr_max),
+            'iv_rank':       np.isnan(d['iv_rank']) | (d['iv_rank'] >= iv_rank_min),
+            'iv_hv':         np.isnan(d['iv_hv_ratio']) | (d['iv_hv_ratio'] >= iv_hv_min),
+        }
+
+
+def entry_gates(panel: dict, tiers: dict, thresholds: pd.DataFrame, **limits) -> dict:
+    """gate_masks() over the whole panel with per-day regime thresholds."""
+    is_spx, is_t2 = tier_flags(panel['tickers'], tiers)
+    return gate_masks(
+        panel['data'], is_spx[None, :], is_t2[None, :],
+        thresholds['rsi_threshold'].to_numpy()[:, None],
+        thresholds['bb_threshold'].to_numpy()[:, None],
+        thresholds['spx_rsi_threshold'].to_numpy()[:, None],
+        **limits,
+    )
+
+
+def signal_mask(gates: dict) -> np.ndarray:
+    mask = np.ones_like(next(iter(gates.values())), dtype=bool)
+    for g in gates.values():
+        mask &= g
+    return mask
+
+
+# ============ FORWARD OUTCOMES ============
+def forward_outcomes(panel: dict, tiers: dict) -> dict:
+    """
+    Outcome name -> float ndarray [n_dates × n_tickers] for an entry at each
+    day's close. NaN where the window runs past the end of the data.
+    """
+    d      = panel['data']
+    close  = pd.DataFrame(d['close'])
+    low    = pd.DataFrame(d['low'])
+    out    = {f'fwd_ret_{n}d': (close.shift(-n) / close - 1.0).to_numpy() for n in FORWARD_DAYS}
+
+    end_close = close.shift(-HOLD_BARS).to_numpy()
+    min_low   = low[::-1].rolling(HOLD_BARS, min_periods=HOLD_BARS).min()[::-1].shift(-1).to_numpy()
+    delta     = np.array([(TIER2_DELTA_MIN + TIER2_DELTA_MAX) / 2 if tiers.get(t) == 'TIER2_WATCH'
+                          else (TIER1_DELTA_MIN + TIER1_DELTA_MAX) / 2 for t in panel['tickers']])
+    sigma     = np.where(np.isnan(d['iv_proxy']), d['hv_30'], d['iv_proxy']) / 100.0
+    strike    = np.column_stack([
+        strike_for_delta(d['close'][:, j], delta[j], HOLD_DTE / 365.0, sigma[:, j])
+        for j in range(len(delta))
+    ])
+
+    with np.errstate(invalid='ignore'):
+        done = ~np.isnan(end_close)
+        out['max_drawdown'] = min_low / d['close'] - 1.0
+        out['short_strike'] = strike
+        out['win']      = np.where(done, end_close >= strike, np.nan)
+        out['breached'] = np.where(done, min_low < strike, np.nan)
+        out['max_loss'] = np.where(done, end_close <= strike - SPREAD_WIDTH, np.nan)
+        out['credit']   = put_spread_value(d['close'], strike, strike - SPREAD_WIDTH, HOLD_DTE / 365.0, sigma)
+        settle          = np.clip(strike - end_close, 0.0, SPREAD_WIDTH)
+        out['pnl']      = np.where(done, (out['credit'] - settle) * 100.0, np.nan)
+    return out
+
+
+def collect_signals(panel: dict, tiers: dict, mask: np.ndarray, thresholds: pd.DataFrame,
+                    outcomes: dict) -> pd.DataFrame:
+    """One row per (date, ticker) where mask is set, with indicators and outcomes."""
+    r, c = np.nonzero(mask)
+    d    = panel['data']
+    tickers = np.array(panel['tickers'])
+    signals = pd.DataFrame({
+        'Date':        panel['dates'][r],
+        'Ticker':      tickers[c],
+        'Tier':        [tiers.get(t, 'TIER2_WATCH') for t in tickers[c]],
+        'VIX':         panel['vix'][r],
+        'VIX_Regime':  panel['regime'][r],
+        'RSI':         d['rsi'][r, c],
+        'RSI_Threshold_Used': np.where(tickers[c] == 'SPX',
+                                       thresholds['spx_rsi_threshold'].to_numpy()[r],
+                                       thresholds['rsi_threshold'].to_numpy()[r]),
+        'BB_Position': d['bb_position'][r, c],
+        'ATR_%':       d['atr_pct'][r, c],
+        'Vol_Surge':   d['vol_surge'][r, c],
+        'Gap_%':       d['gap_pct'][r, c],
+        'IV_Rank_Proxy': d['iv_rank'][r, c],
+        'IV_HV_Proxy':   d['iv_hv_ratio'][r, c],
+        'Price':       d['close'][r, c],
+    })
+    signals['Signal_Strength'] = [
+        calculate_signal_strength(*v) for v in
+        signals[['RSI', 'BB_Position', 'Vol_Surge', 'ATR_%']].itertuples(index=False)
+    ]
+    for name, arr in outcomes.items():
+        signals[name] = arr[r, c]
+    return signals.sort_values(['Date', 'Tier', 'Ticker']).reset_index(drop=True)
+
+
+# ============ RUNNER ============
+def summarize(signals: pd.DataFrame, gates: dict, n_years: float) -> dict:
+    funnel, running = {}, None
+    for name, g in gates.items():
+        running = g.copy() if running is None else running & g
+        funnel[name] = int(running.sum())
+
+    done = signals[signals['win'].notna()]
+    agg  = {'signals': ('Ticker', 'size'), 'win_rate': ('win', 'mean'),
+            'breach_rate': ('breached', 'mean'), 'max_loss_rate': ('max_loss', 'mean'),
+            'avg_drawdown': ('max_drawdown', 'mean'), 'avg_pnl': ('pnl', 'mean')}
+    agg.update({f'avg_{k}': (k, 'mean') for k in signals.columns if k.startswith('fwd_ret_')})
+    by_tier   = signals.groupby('Tier').agg(**agg) if not signals.empty else pd.DataFrame()
+    by_regime = (signals.groupby('VIX_Regime').agg(**agg).reindex([r for r in REGIMES
+                 if r in set(signals['VIX_Regime'])]) if not signals.empty else pd.DataFrame())
+    by_ticker = signals.groupby('Ticker').agg(**agg).sort_values('signals', ascending=False) \
+        if not signals.empty else pd.DataFrame()
+    return {
+        'signals':       len(signals),
+        'signals_per_year': round(len(signals) / n_years, 1) if n_years else None,
+        'win_rate':      round(float(done['win'].mean()), 3) if not done.empty else None,
+        'breach_rate':   round(float(done['breached'].mean()), 3) if not done.empty else None,
+        'avg_pnl':       round(float(done['pnl'].mean()), 2) if not done.empty else None,
+        'funnel':        funnel,
+        'by_tier':       by_tier,
+        'by_regime':     by_regime,
+        'by_ticker':     by_ticker,
+    }
+
+
+def run_backtest(period: str = HISTORY_PERIOD, tiers: dict = None, verbose: bool = True,
+                 save: bool = True):
+    """
+    Backtest the entry rules over `period` of cached daily history.
+
+    Returns (signals, summary):
+        signals : one row per historical signal — indicators, thresholds used,
+                  proxy IV values, Signal_Strength and forward outcomes
+        summary : dict — signal count / rate, win and breach rate, gate funnel
+                  (ticker-days surviving each gate) and per tier / regime /
+                  ticker tables
+    """
+    tiers = tiers or default_tiers()
+    ohlcv = load_ohlcv(tiers, period)
+    if ohlcv['Close'].empty:
+        print("[BACKTEST] No price history available.")
+        return pd.DataFrame(), {}
+    vix_hist = get_history(VIX_TICKER, period)
+    vix      = vix_hist['Close'] if not vix_hist.empty else pd.Series(dtype=float)
+    if vix.empty:
+        print("[BACKTEST] No VIX history — every day treated as NORMAL regime.")
+
+    started    = datetime.now()
+    panel      = build_panel(ohlcv, vix)
+    thresholds = day_thresholds(panel['regime'])
+    gates      = entry_gates(panel, tiers, thresholds)
+    mask       = signal_mask(gates)
+    # SPX is loaded for the IV proxy; only report it when it is in the universe
+    if 'SPX' not in tiers:
+        mask[:, panel['tickers'].index('SPX')] = False
+    outcomes   = forward_outcomes(panel, tiers)
+    signals    = collect_signals(panel, tiers, mask, thresholds, outcomes)
+    elapsed    = (datetime.now() - started).total_seconds()
+
+    dates   = panel['dates']
+    n_years = (dates[-1] - dates[0]).days / 365.25 if len(dates) > 1 else 0.0
+    summary = summarize(signals, gates, n_years)
+    summary.update({
+        'start': dates[0].strftime('%Y-%m-%d'), 'end': dates[-1].strftime('%Y-%m-%d'),
+        'tickers': len(panel['tickers']), 'days': len(dates), 'elapsed_sec': round(elapsed, 3),
+    })
+
+    if save and not signals.empty:
+        output_file = f'backtest_{datetime.now().strftime("%Y%m%d")}.csv'
+        signals.to_csv(output_file, index=False)
+        summary['output_file'] = output_file
+    if verbose:
+        print_backtest_report(summary)
+    return signals, summary
+
+
+def print_backtest_report(summary: dict):
+    print(f"\n{'='*60}")
+    print(f"ENTRY SCREENER BACKTEST — {summary['start']} → {summary['end']}")
+    print(f"{'='*60}")
+    print(f"Universe         : {summary['tickers']} tickers × {summary['days']} days "
+          f"(computed in {summary['elapsed_sec']}s)")
+    print(f"Signals          : {summary['signals']} ({summary['signals_per_year']}/yr)")
+    if summary['win_rate'] is not None:
+        print(f"Win rate         : {summary['win_rate']:.1%} (close >= short strike after {HOLD_BARS} bars)")
+        print(f"Breach rate      : {summary['breach_rate']:.1%} (low < short strike inside the window)")
+        print(f"Avg P&L          : ${summary['avg_pnl']:,.2f} per contract (${SPREAD_WIDTH}-wide spread held to expiry)")
+    if summary.get('output_file'):
+        print(f"Saved            : {summary['output_file']}")
+    print('='*60)
+
+    print("\nGATE FUNNEL (ticker-days passing every gate so far):")
+    for name, n in summary['funnel'].items():
+        print(f"  {name:<14} {n:>9,}")
+
+    fmt = {c: '{:.1%}'.format for c in ['win_rate', 'breach_rate', 'max_loss_rate', 'avg_drawdown']}
+    fmt.update({c: '{:+.2%}'.format for c in summary['by_tier'].columns if c.startswith('avg_fwd')})
+    fmt['avg_pnl'] = '${:,.2f}'.format
+    for title, key in [('BY TIER', 'by_tier'), ('BY VIX REGIME', 'by_regime'), ('BY TICKER', 'by_ticker')]:
+        table = summary[key]
+        if table.empty:
+            continue
+        print(f"\n{title}:")
+        print(table.to_string(formatters=fmt))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest the entry screener over cached daily history.')
+    parser.add_argument('--period', default=HISTORY_PERIOD, help="history to test: '1y', '5y', '10y', 'max'")
+    args = parser.parse_args()
+    run_backtest(period=args.period)
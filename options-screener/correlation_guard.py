@@ -0,0 +1,259 @@
+"""
+correlation_guard.py
+--------------------
+Correlation-aware cluster guard for the day's signals plus open positions.
+
+check_cluster_risk() alone counts signals; it cannot tell five unrelated names
+from five semiconductors moving together. This module keeps a rolling
+CORR_WINDOW-day log-return correlation matrix and groups tickers by
+average-linkage hierarchical clustering: clusters keep merging while the
+average pairwise correlation between them is at least CORR_CLUSTER_MIN.
+
+Per cluster it reports the effective number of independent bets,
+
+    N_eff = k² / Σ ρ_ij²        (participation ratio of the k × k correlation
+                                 matrix: k for uncorrelated names, 1 for k
+                                 copies of the same trade)
+
+The matrix is cached as pairwise running sums over the window (per pair of
+tickers: days both have a bar, Σr, Σr² and Σ r_i r_j over those days) plus
+the window of returns, in memory and in CORR_CACHE_FILE. When the window
+moves forward one day only that day's outer products are added and the
+dropped day's subtracted; new tickers only add their own rows. A check for
+names already tracked is a sub-matrix lookup.
+
+Returns come from the local price store (trading calendar = SPX). A day a
+ticker has no bar is a gap (NaN), not a zero return: each pair is correlated
+over the days both names traded (at least CORR_MIN_OBS), and a column with
+gaps is re-read on the next call so a late or failed fetch heals. A ticker
+with no history at all is not tracked, and is retried on the next call.
+
+Usage:
+    from correlation_guard import correlation_clusters
+    info = correlation_clusters(['NVDA', 'AMD', 'MU', 'COST'])
+    for c in info['clusters']:
+        print(c['tickers'], c['effective_bets'])
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from price_store import PRICE_CACHE_DIR, get_history
+
+# ============ CONFIG ============
+CORR_WINDOW         = 60                  # trading days of returns
+CORR_HISTORY_PERIOD = '6mo'
+CORR_CLUSTER_MIN    = 0.60                # average-linkage merge threshold
+CORR_MIN_OBS        = 20                  # common trading days a pair needs for a correlation
+CORR_CACHE_FILE     = os.path.join(PRICE_CACHE_DIR, 'corr_cache.npz')
+CALENDAR_TICKER     = '^GSPC'
+
+# Screener / ledger labels that are quoted under a different symbol
+_PRICE_SYMBOL = {'SPX': CALENDAR_TICKER}
+
+_cache = {}
+
+
+# ============ INCREMENTAL CORRELATION CACHE ============
+_MOMENTS = ('n', 'sx', 'sxx', 'sxy')
+
+
+def _returns(tickers, dates) -> np.ndarray:
+    """[len(dates) × len(tickers)] daily log returns on `dates`, NaN where a ticker has no bar."""
+    out = np.full((len(dates), len(tickers)), np.nan)
+    for j, ticker in enumerate(tickers):
+        hist = get_history(_PRICE_SYMBOL.get(ticker, ticker), CORR_HISTORY_PERIOD)
+        if hist.empty:
+            continue
+        r = np.log(hist['Close'].astype(float)).diff().reindex(dates)
+        out[:, j] = r.to_numpy()
+    return out
+
+
+def _moments(a, b) -> dict:
+    """
+    Pairwise sums between the columns of return blocks a and b over the days
+    both have a bar: n (days), sx (Σ a), sxx (Σ a²), sxy (Σ a·b).
+    """
+    ma, mb = np.isfinite(a), np.isfinite(b)
+    a0, b0 = np.where(ma, a, 0.0), np.where(mb, b, 0.0)
+    mb = mb.astype(float)
+    return {'n': ma.T.astype(float) @ mb, 'sx': a0.T @ mb, 'sxx': (a0 ** 2).T @ mb, 'sxy': a0.T @ b0}
+
+
+def _build(tickers, dates) -> dict:
+    window  = _returns(tickers, dates)
+    tracked = np.isfinite(window).any(axis=0)          # no history at all: not tracked
+    window  = window[:, tracked]
+    return {'tickers': [t for t, ok in zip(tickers, tracked) if ok],
+            'dates': pd.DatetimeIndex(dates), 'window': window, **_moments(window, window)}
+
+
+def _load_cache() -> dict:
+    if _cache:
+        return _cache
+    if os.path.exists(CORR_CACHE_FILE):
+        try:
+            with np.load(CORR_CACHE_FILE) as z:
+                _cache.update(tickers=list(z['tickers']), dates=pd.DatetimeIndex(z['dates']),
+                              window=z['window'], **{m: z[m] for m in _MOMENTS})
+        except Exception as e:
+            print(f"[CORR] Could not read {CORR_CACHE_FILE} ({e}) — rebuilding.")
+            _cache.clear()
+    return _cache
+
+
+def _save_cache(cache: dict):
+    os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+    np.savez(CORR_CACHE_FILE, tickers=np.array(cache['tickers'], dtype=str),
+             dates=cache['dates'].to_numpy(), window=cache['window'],
+             **{m: cache[m] for m in _MOMENTS})
+
+
+def _roll(cache: dict, new_dates) -> None:
+    """Slide the window forward: add the new days, drop as many of the oldest."""
+    d     = len(new_dates)
+    fresh = _returns(cache['tickers'], new_dates)
+    old   = cache['window'][:d]
+    add, drop = _moments(fresh, fresh), _moments(old, old)
+    for m in _MOMENTS:
+        cache[m] = cache[m] + add[m] - drop[m]
+    cache['window'] = np.vstack([cache['window'][d:], fresh])
+    cache['dates']  = cache['dates'][d:].append(pd.DatetimeIndex(new_dates))
+
+
+def _extend(cache: dict, tickers) -> None:
+    """Add columns for tickers not tracked yet (skipping any with no history); existing entries are untouched."""
+    new  = _returns(tickers, cache['dates'])
+    keep = np.isfinite(new).any(axis=0)
+    if not keep.any():
+        return
+    new, w = new[:, keep], cache['window']
+    ab, ba, bb = _moments(w, new), _moments(new, w), _moments(new, new)
+    for m in _MOMENTS:
+        cache[m] = np.block([[cache[m], ab[m]], [ba[m], bb[m]]])
+    cache['window']   = np.hstack([w, new])
+    cache['tickers'] += [t for t, ok in zip(tickers, keep) if ok]
+
+
+def _heal_gaps(cache: dict) -> bool:
+    """Re-read columns with missing days; recompute the rows/columns that changed."""
+    cols = np.flatnonzero(~np.isfinite(cache['window']).all(axis=0))
+    if not len(cols):
+        return False
+    w     = cache['window']
+    fresh = _returns([cache['tickers'][j] for j in cols], cache['dates'])
+    same  = np.all((fresh == w[:, cols]) | (np.isnan(fresh) & np.isnan(w[:, cols])), axis=0)
+    cols, fresh = cols[~same], fresh[:, ~same]
+    if not len(cols):
+        return False
+    w[:, cols] = fresh
+    by_col, by_row = _moments(w, w[:, cols]), _moments(w[:, cols], w)
+    for m in _MOMENTS:
+        cache[m][:, cols] = by_col[m]
+        cache[m][cols, :] = by_row[m]
+    return True
+
+
+def correlation_matrix(tickers) -> pd.DataFrame:
+    """
+    CORR_WINDOW-day return correlation of `tickers` (labels as used in signals
+    and the ledger; 'SPX' -> ^GSPC). Updates the cache incrementally. Pairs
+    with fewer than CORR_MIN_OBS common days or no return variance over them
+    (including tickers with no cached history) get NaN.
+    """
+    tickers  = list(dict.fromkeys(tickers))
+    calendar = get_history(CALENDAR_TICKER, CORR_HISTORY_PERIOD).index
+    if len(calendar) < 2:
+        return pd.DataFrame(np.nan, index=tickers, columns=tickers)
+    dates = calendar[1:][-CORR_WINDOW:]
+
+    cache   = _load_cache()
+    changed = False
+    if not cache or not cache['dates'].equals(dates):
+        new_dates = dates[dates > cache['dates'][-1]] if cache else dates
+        d = len(new_dates)
+        if cache and 0 < d < len(dates) and cache['dates'][d:].equals(dates[:-d]):
+            _roll(cache, new_dates)
+        else:   # first run, gap longer than the window, or calendar revised
+            tracked = list(dict.fromkeys([*cache.get('tickers', []), *tickers]))
+            cache.clear()
+            cache.update(_build(tracked, dates))
+        changed = True
+    changed |= _heal_gaps(cache)
+    missing = [t for t in tickers if t not in cache['tickers']]
+    if missing:
+        n_before = len(cache['tickers'])
+        _extend(cache, missing)
+        changed |= len(cache['tickers']) > n_before
+    if changed:
+        _save_cache(cache)
+
+    pos  = {t: i for i, t in enumerate(cache['tickers'])}
+    have = [t for t in tickers if t in pos]
+    idx  = [pos[t] for t in have]
+    sub  = {m: cache[m][np.ix_(idx, idx)] for m in _MOMENTS}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n      = sub['n']
+        mean_i = sub['sx'] / n                       # ticker i over the days shared with j
+        mean_j = sub['sx'].T / n
+        var_i  = sub['sxx'] / n - mean_i ** 2
+        var_j  = sub['sxx'].T / n - mean_j ** 2
+        cov    = sub['sxy'] / n - mean_i * mean_j
+        corr   = np.clip(cov / np.sqrt(var_i * var_j), -1.0, 1.0)
+    corr[(n < CORR_MIN_OBS) | ~(var_i > 0) | ~(var_j > 0)] = np.nan
+    return pd.DataFrame(corr, index=have, columns=have).reindex(index=tickers, columns=tickers)
+
+
+# ============ CLUSTERING ============
+def _average_linkage(corr: np.ndarray, min_corr: float) -> list:
+    """Index groups from agglomerative clustering; NaN correlations never merge."""
+    k        = len(corr)
+    clusters = [[i] for i in range(k)]
+    sim      = np.where(np.isnan(corr), -np.inf, corr).astype(float)
+    np.fill_diagonal(sim, -np.inf)
+    while len(clusters) > 1:
+        i, j = np.unravel_index(np.argmax(sim), sim.shape)
+        if sim[i, j] < min_corr:
+            break
+        i, j   = min(i, j), max(i, j)
+        ni, nj = len(clusters[i]), len(clusters[j])
+        merged = (ni * sim[i] + nj * sim[j]) / (ni + nj)      # Lance-Williams, average linkage
+        sim[i], sim[:, i] = merged, merged
+        sim[i, i] = -np.inf
+        sim = np.delete(np.delete(sim, j, axis=0), j, axis=1)
+        clusters[i] += clusters.pop(j)
+    return clusters
+
+
+def effective_bets(corr: np.ndarray) -> float:
+    """Participation ratio k² / Σ ρ² (NaN correlations treated as 0)."""
+    c = np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(c, 1.0)
+    return float(len(c) ** 2 / (c ** 2).sum()) if len(c) else 0.0
+
+
+def correlation_clusters(tickers, min_corr: float = CORR_CLUSTER_MIN) -> dict:
+    """
+    Cluster `tickers` by return correlation.
+
+    Returns {'clusters': [...], 'effective_bets', 'corr'} where each cluster is
+    {'id', 'tickers', 'size', 'avg_corr', 'effective_bets'}, largest first.
+    """
+    corr = correlation_matrix(tickers)
+    c    = corr.to_numpy()
+    clusters = []
+    for members in _average_linkage(c, min_corr):
+        sub   = c[np.ix_(members, members)]
+        pairs = sub[np.triu_indices(len(members), 1)]
+        clusters.append({
+            'tickers':        [corr.index[m] for m in members],
+            'size':           len(members),
+            'avg_corr':       round(float(np.nanmean(pairs)), 2) if len(pairs) and not np.isnan(pairs).all() else None,
+            'effective_bets': round(effective_bets(sub), 2),
+        })
+    clusters.sort(key=lambda cl: (-cl['size'], cl['tickers']))
+    for i, cl in enumerate(clusters, start=1):
+        cl['id'] = i
+    return {'clusters': clusters, 'effective_bets': round(effective_bets(c), 2), 'corr': corr}
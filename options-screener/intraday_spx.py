@@ -0,0 +1,319 @@
+"""
+intraday_spx.py
+---------------
+Intraday SPX gap-down detection from 1–5 minute ^GSPC bars.
+
+screen_spx() reads the gap-down from the daily bar, so the signal only exists
+once that bar does. This module follows the session bar by bar (polling
+yfinance, or replaying a recorded bar file). It keeps the daily SPX gates
+current in O(1) per bar, treating the latest price as today's tentative close:
+
+    gap      session open (first bar) vs the prior daily close
+    RSI      Wilder RSI(RSI_PERIOD) state as of the prior close, advanced one step
+    SMA200   sum of the prior 199 closes + latest price
+    BB / ATR / volume surge   rolling sums and the prior ATR state (signal strength only)
+
+The bar still forming is evaluated on every poll (a re-polled bar replaces its
+earlier snapshot), so the signal is raised within INTRADAY_POLL_SEC of the
+gates passing (plus whatever delay yfinance's quotes carry). Once the gap,
+RSI and SMA200 gates pass, the provisional daily bar goes through the
+screener's _evaluate_spx(). The IV filters, expiry choice and signal record
+are therefore exactly the daily ones. At most one signal is raised per session.
+
+Usage:
+    python intraday_spx.py                                   # poll 1m bars until the close
+    python intraday_spx.py --interval 5m --record bars/spx_20261019.csv
+    python intraday_spx.py --replay bars/spx_20261019.csv --vix 22.5 --verbose
+"""
+
+import argparse
+import os
+import time
+import pandas as pd
+import yfinance as yf
+from datetime import datetime
+
+from options_premium_screener import (
+    _evaluate_spx, get_adjusted_params, get_vix, live_console, notify_signal,
+    SPX_TICKER, SPX_GAP_DOWN_PCT, RSI_PERIOD, BB_PERIOD, ATR_PERIOD,
+)
+from position_tracker import _is_market_open, _next_market_open
+from price_store import _normalize, get_history
+
+# ============ CONFIG ============
+INTRADAY_INTERVAL       = '1m'      # '1m' | '2m' | '5m'
+INTRADAY_POLL_SEC       = 20        # the forming bar is re-polled this often
+INTRADAY_HISTORY_PERIOD = '2y'      # daily bars behind the session (>= 200 before it)
+INTRADAY_SIGNAL_FILE    = 'intraday_spx_{date}.csv'
+
+_SMA_LEN   = 200
+_AVG_VOL   = 50
+
+
+# ============ SESSION STATE ============
+def _volume(bar: dict) -> float:
+    v = bar.get('Volume')
+    return float(v) if pd.notna(v) else 0.0   # index bars often carry no volume
+
+
+def init_session(daily: pd.DataFrame, session_date) -> dict | None:
+    """
+    Daily indicator state as of the last close before session_date.
+    None when fewer than 200 prior daily bars are available.
+    """
+    prior = daily[daily.index.date < session_date]
+    if len(prior) < _SMA_LEN:
+        return None
+    close = prior['Close'].astype(float)
+    diff  = close.diff()
+    prev  = close.shift(1)
+    tr    = pd.concat([prior['High'] - prior['Low'], (prior['High'] - prev).abs(),
+                       (prior['Low'] - prev).abs()], axis=1).max(axis=1)
+    rma   = lambda s, n: float(s.ewm(alpha=1.0 / n, min_periods=n).mean().iloc[-1])   # pandas_ta RMA
+    return {
+        'date':        session_date,
+        'daily':       prior,
+        'prior_close': float(close.iloc[-1]),
+        'avg_gain':    rma(diff.clip(lower=0), RSI_PERIOD),
+        'avg_loss':    rma((-diff).clip(lower=0), RSI_PERIOD),
+        'atr':         rma(tr, ATR_PERIOD),
+        'sma_sum':     float(close.iloc[-(_SMA_LEN - 1):].sum()),
+        'bb_sum':      float(close.iloc[-(BB_PERIOD - 1):].sum()),
+        'bb_sumsq':    float((close.iloc[-(BB_PERIOD - 1):] ** 2).sum()),
+        'vol_sum':     float(prior['Volume'].iloc[-(_AVG_VOL - 1):].sum()),
+        'bars': {}, 'open': None, 'high': float('-inf'), 'low': float('inf'),
+        'last': None, 'last_ts': None, 'volume': 0.0, 'fired': False, 'iv_checked': False,
+    }
+
+
+def update_session(state: dict, ts, bar: dict) -> dict:
+    """
+    Fold one bar (new, or a newer snapshot of a forming bar) into the session
+    and return the daily gate values with the latest price as today's close.
+    """
+    prev = state['bars'].get(ts)
+    state['bars'][ts] = bar
+    if state['open'] is None:
+        state['open'] = float(bar['Open'])
+    state['high']    = max(state['high'], float(bar['High']))
+    state['low']     = min(state['low'], float(bar['Low']))
+    state['volume'] += _volume(bar) - (_volume(prev) if prev else 0.0)
+    if state['last_ts'] is None or ts >= state['last_ts']:
+        state['last'], state['last_ts'] = float(bar['Close']), ts
+
+    price, pc = state['last'], state['prior_close']
+    avg_gain  = state['avg_gain'] + (max(price - pc, 0.0) - state['avg_gain']) / RSI_PERIOD
+    avg_loss  = state['avg_loss'] + (max(pc - price, 0.0) - state['avg_loss']) / RSI_PERIOD
+    rsi       = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    sma_200   = (state['sma_sum'] + price) / _SMA_LEN
+
+    bb_mid  = (state['bb_sum'] + price) / BB_PERIOD
+    bb_var  = (state['bb_sumsq'] + price ** 2 - BB_PERIOD * bb_mid ** 2) / (BB_PERIOD - 1)
+    bb_std  = max(bb_var, 0.0) ** 0.5
+    bb_pos  = (price - (bb_mid - 2 * bb_std)) / (4 * bb_std) if bb_std > 0 else 0.5
+    tr      = max(state['high'] - state['low'], abs(state['high'] - pc), abs(state['low'] - pc))
+    atr     = state['atr'] + (tr - state['atr']) / ATR_PERIOD
+    avg_vol = (state['vol_sum'] + state['volume']) / _AVG_VOL
+
+    gap_pct = (state['open'] - pc) / pc * 100
+    return {
+        'bar_time':     ts,
+        'price':        price,
+        'gap_down_pct': gap_pct,
+        'rsi':          rsi,
+        'sma_200':      sma_200,
+        'bb_position':  bb_pos,
+        'atr_pct':      atr / price * 100,
+        'vol_surge':    state['volume'] / avg_vol if avg_vol > 0 else 0.0,
+        'gap_down':     gap_pct <= SPX_GAP_DOWN_PCT,
+        'uptrend':      price > sma_200,
+    }
+
+
+def provisional_daily(state: dict) -> pd.DataFrame:
+    """Prior daily bars + today's bar so far (open, high, low, latest price, volume)."""
+    today = pd.DataFrame(
+        {'Open': [state['open']], 'High': [state['high']], 'Low': [state['low']],
+         'Close': [state['last']], 'Volume': [state['volume']]},
+        index=pd.DatetimeIndex([pd.Timestamp(state['date'])], name=state['daily'].index.name),
+    )
+    return pd.concat([state['daily'][today.columns], today])
+
+
+# ============ BAR FEEDS ============
+# A feed yields (timestamp, {'Open', 'High', 'Low', 'Close', 'Volume'}) in time
+# order; the same timestamp may come again with a newer snapshot.
+
+def poll_bars(interval: str = INTRADAY_INTERVAL, poll_sec: float = INTRADAY_POLL_SEC,
+              clock=datetime.now, sleep=time.sleep):
+    """
+    Today's ^GSPC bars from yfinance until the close; the last (forming) bar is
+    re-yielded every poll. Started before the open (e.g. cron at 8:25 CT) it
+    waits for the open; started after the close it returns without polling.
+    Bars from an earlier session (period='1d' can still return yesterday right
+    at the open) are dropped.
+    """
+    now = clock()
+    if not _is_market_open(now):
+        open_at = _next_market_open(now)
+        if open_at.date() != now.date():
+            print(f"[INTRADAY] Market closed — next open {open_at.strftime('%Y-%m-%d %H:%M CT')}.")
+            return
+        print(f"[INTRADAY] Waiting for the open at {open_at.strftime('%H:%M CT')}.")
+        while clock() < open_at:
+            sleep(min((open_at - clock()).total_seconds(), 60))
+
+    last_ts = None
+    while _is_market_open(clock()):
+        try:
+            data = yf.download(SPX_TICKER, period='1d', interval=interval, progress=False, auto_adjust=False)
+            data = _normalize(data) if data is not None and not data.empty else pd.DataFrame()
+        except Exception as e:
+            print(f"[INTRADAY] Poll failed: {e}")
+            data = pd.DataFrame()
+        if not data.empty:
+            data = data[data.index.date == clock().date()]
+        for ts, row in data.iterrows():
+            if last_ts is None or ts >= last_ts:
+                yield ts, row.to_dict()
+        if not data.empty:
+            last_ts = data.index[-1]
+        sleep(poll_sec)
+
+
+def replay_bars(path: str, speed: float = 0.0, sleep=time.sleep):
+    """
+    Bars from a recorded CSV (timestamp index + OHLCV), e.g. one written by
+    record_bars(). speed > 0 replays at speed × real time, 0 = as fast as possible.
+    """
+    bars = _normalize(pd.read_csv(path, index_col=0, parse_dates=True))
+    prev = None
+    for ts, row in bars.iterrows():
+        if speed > 0 and prev is not None:
+            sleep(max((ts - prev).total_seconds(), 0.0) / speed)
+        prev = ts
+        yield ts, row.to_dict()
+
+
+def record_bars(bars, path: str):
+    """Pass a feed through unchanged, writing the latest snapshot of every bar to path."""
+    rows = {}
+
+    def _write():
+        if rows:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            frame = pd.DataFrame.from_dict(rows, orient='index').sort_index()
+            frame.index.name = 'Datetime'
+            frame.to_csv(path)
+
+    try:
+        for ts, bar in bars:
+            is_new   = ts not in rows
+            rows[ts] = bar
+            if is_new:
+                _write()
+            yield ts, bar
+    finally:
+        _write()
+
+
+# ============ RUNNER ============
+def _gate_line(snap: dict, spx_rsi_threshold) -> str:
+    mark = lambda ok: '✓' if ok else '✗'
+    return (
+        f"[INTRADAY] {snap['bar_time']}  SPX {snap['price']:.2f} | "
+        f"gap {snap['gap_down_pct']:.2f}% {mark(snap['gap_down'])} | "
+        f"RSI {snap['rsi']:.1f} (<{spx_rsi_threshold}) {mark(snap['rsi'] < spx_rsi_threshold)} | "
+        f"SMA200 {snap['sma_200']:.2f} {mark(snap['uptrend'])}"
+    )
+
+
+def run_intraday_spx(bars, vix=None, on_result=None, stop_on_signal: bool = True,
+                     verbose: bool = False, save: bool = True):
+    """
+    Follow a bar feed and raise the SPX signal the moment the daily gates pass.
+
+    bars      : poll_bars() / replay_bars() / record_bars(...) feed
+    vix       : VIX for the regime thresholds (None = get_vix())
+    on_result : callables (ticker, tier_label, evaluation), as in run_screener()
+    Returns the SIGNAL evaluation, or None if the feed ended without one.
+    """
+    if vix is None:
+        vix = get_vix()
+    adjusted_params, regime = get_adjusted_params(vix)
+    spx_rsi_threshold = adjusted_params['spx_rsi_threshold']
+    daily  = get_history(SPX_TICKER, INTRADAY_HISTORY_PERIOD)
+    print(f"[INTRADAY] VIX {vix} ({regime}) | SPX RSI < {spx_rsi_threshold} | "
+          f"gap <= {SPX_GAP_DOWN_PCT}% | close > SMA200")
+
+    state, signal, last_gates = None, None, None
+    for ts, bar in bars:
+        if state is None or ts.date() != state['date']:
+            state = init_session(daily, ts.date())
+            if state is None:
+                print(f"[INTRADAY] Fewer than {_SMA_LEN} daily bars before {ts.date()} — cannot evaluate.")
+                return None
+            print(f"[INTRADAY] Session {ts.date()} | prior close {state['prior_close']:.2f}")
+        snap  = update_session(state, ts, bar)
+        gates = (snap['gap_down'], snap['rsi'] < spx_rsi_threshold, snap['uptrend'])
+        if verbose or gates != last_gates:
+            print(_gate_line(snap, spx_rsi_threshold))
+        last_gates = gates
+        if state['fired'] or state['iv_checked'] or not all(gates):
+            continue
+
+        evaluation = _evaluate_spx(provisional_daily(state), vix, adjusted_params)
+        if evaluation['status'] == 'IV_SUPPRESSED':
+            state['iv_checked'] = True   # IV does not turn within the session; stop re-querying the chain
+            print(f"[INTRADAY] {ts}: gates passed, suppressed by the IV filters.")
+            continue
+        if evaluation['status'] != 'SIGNAL':
+            continue
+
+        state['fired'] = True
+        evaluation = {**evaluation, 'cached': False}
+        evaluation['result'].update({
+            'Intraday_Bar':  str(ts),
+            'Detected_At':   datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'Intraday_RSI':  round(snap['rsi'], 2),
+            'Intraday_Gap_%': round(snap['gap_down_pct'], 2),
+        })
+        print(f"[INTRADAY] ✓ SPX signal on bar {ts} — strength {evaluation['result']['Signal_Strength']}/100")
+        if save:
+            path = INTRADAY_SIGNAL_FILE.format(date=state['date'].strftime('%Y%m%d'))
+            out  = pd.DataFrame.from_dict({'SPX': evaluation['result']}, orient='index')
+            out.index.name = 'Ticker'
+            out.to_csv(path)
+            print(f"[INTRADAY] Saved → {path}")
+        for consumer in on_result or []:
+            try:
+                consumer('SPX', 'TIER1_CORE', evaluation)
+            except Exception as e:
+                print(f"[INTRADAY] {getattr(consumer, '__name__', consumer)} failed: {e}")
+        signal = evaluation
+        if stop_on_signal:
+            break
+
+    if signal is None:
+        print("[INTRADAY] Feed ended — no SPX signal.")
+    return signal
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Intraday SPX gap-down detection from minute bars')
+    parser.add_argument('--interval', default=INTRADAY_INTERVAL, choices=['1m', '2m', '5m'])
+    parser.add_argument('--poll', type=float, default=INTRADAY_POLL_SEC, help='seconds between polls')
+    parser.add_argument('--replay', help='recorded bar CSV to replay instead of polling')
+    parser.add_argument('--speed', type=float, default=0.0, help='replay speed multiple (0 = instant)')
+    parser.add_argument('--record', help='write the polled bars to this CSV')
+    parser.add_argument('--vix', type=float, help='VIX for the regime thresholds (default: live)')
+    parser.add_argument('--notify-signals', action='store_true', help='email the signal when it is raised')
+    parser.add_argument('--verbose', action='store_true', help='print every bar, not only gate changes')
+    args = parser.parse_args()
+
+    feed = replay_bars(args.replay, args.speed) if args.replay else poll_bars(args.interval, args.poll)
+    if args.record:
+        feed = record_bars(feed, args.record)
+    consumers = [live_console] + ([notify_signal] if args.notify_signals else [])
+    run_intraday_spx(feed, vix=args.vix, on_result=consumers,
+                     stop_on_signal=not args.record, verbose=args.verbose)
@@ -0,0 +1,166 @@
+"""
+monte_carlo.py
+--------------
+Monte Carlo probability-of-profit for put credit spread signals.
+
+For each signal the short put is placed at the tier's delta target and the
+long put SPREAD_WIDTH below it; the credit is the Black-Scholes spread value.
+Daily price paths to Expiry_DTE are then simulated with either
+
+    gbm        geometric Brownian motion at the signal's IV estimate, or
+    bootstrap  daily log returns resampled from the ticker's cached history
+               (price_store), demeaned so past drift does not leak into PoP.
+
+Per signal:
+    PoP          P(close at expiry >= short strike) — spread expires worthless
+    P_Touch      P(any daily close <= short strike before expiry)
+    P_Target     P(spread value falls to (1 - profit_pct) × credit while
+                 more than exit_dte days remain) — the early-close target
+    Expected_PnL USD per contract: close at the target when it is hit,
+                 otherwise at the mark on the routine-review day (exit_dte),
+                 or at intrinsic if the expiry is already inside exit_dte
+
+Spread value falls monotonically as spot rises, so the profit target becomes
+one spot boundary per day (found by bisection once per signal) and paths are
+tested with a comparison instead of being repriced every step. Paths are
+generated in chunks of MC_CHUNK_PATHS, so memory stays bounded at
+steps × chunk floats whatever MC_PATHS is.
+
+Usage:
+    from monte_carlo import estimate_pop
+    pop = estimate_pop(signals)   # columns: ticker, spot, sigma, dte, delta
+"""
+
+import numpy as np
+import pandas as pd
+
+from option_pricing import put_spread_value, strike_for_delta, RISK_FREE_RATE
+from price_store import get_history
+
+# ============ CONFIG ============
+MC_PATHS          = 100_000
+MC_CHUNK_PATHS    = 10_000
+MC_METHOD         = 'gbm'        # 'gbm' | 'bootstrap'
+MC_HISTORY_PERIOD = '5y'         # bootstrap sample
+MC_MIN_RETURNS    = 60           # fewer cached returns than this -> GBM for that signal
+MC_SEED           = 7
+_BISECT_STEPS     = 60
+
+POP_COLUMNS = ['MC_Short_Strike', 'MC_Long_Strike', 'MC_Credit', 'PoP', 'P_Touch', 'P_Target', 'Expected_PnL']
+
+
+def _log_returns(ticker: str) -> np.ndarray:
+    hist = get_history(ticker, MC_HISTORY_PERIOD)
+    if hist.empty:
+        return np.array([])
+    r = np.diff(np.log(hist['Close'].to_numpy(dtype=float)))
+    r = r[np.isfinite(r)]
+    return r - r.mean() if len(r) else r
+
+
+def _target_boundary(short_k, long_k, t_years, sigma, target):
+    """
+    Spot above which the spread is worth <= target, per remaining time in
+    t_years (vectorized bisection). inf where the target is unreachable.
+    """
+    lo = np.full_like(t_years, long_k * 0.25)
+    hi = np.full_like(t_years, short_k * 4.0)
+    reachable = put_spread_value(hi, short_k, long_k, t_years, sigma) <= target
+    for _ in range(_BISECT_STEPS):
+        mid  = (lo + hi) / 2.0
+        high = put_spread_value(mid, short_k, long_k, t_years, sigma) <= target
+        hi   = np.where(high, mid, hi)
+        lo   = np.where(high, lo, mid)
+    return np.where(reachable, hi, np.inf)
+
+
+def simulate_spread(spot, short_k, long_k, credit, dte, sigma, profit_pct, exit_dte,
+                    returns=None, n_paths=MC_PATHS, chunk=MC_CHUNK_PATHS, rng=None) -> dict:
+    """
+    Simulate one spread. `returns` (daily log returns) switches from GBM to
+    bootstrap. Returns {'PoP', 'P_Touch', 'P_Target', 'Expected_PnL'}.
+    """
+    rng     = rng or np.random.default_rng(MC_SEED)
+    width   = short_k - long_k
+    n_steps = max(1, int(round(dte * 252 / 365)))
+    dt      = dte / 365.0 / n_steps
+    remain  = dte - np.arange(1, n_steps + 1) * (dte / n_steps)          # calendar days left after each step
+
+    # Profit target: only before the routine-review day
+    in_window = remain > exit_dte
+    boundary  = np.full(n_steps, np.inf)
+    if in_window.any():
+        boundary[in_window] = _target_boundary(short_k, long_k, remain[in_window] / 365.0, sigma,
+                                               credit * (1.0 - profit_pct))
+    # First step inside exit_dte; expiry itself when the signal is already inside it
+    exit_step = int(np.argmax(~in_window)) if dte > exit_dte else n_steps - 1
+    drift     = (RISK_FREE_RATE - 0.5 * sigma ** 2) * dt
+    vol       = sigma * np.sqrt(dt)
+
+    wins = touches = targets = 0
+    pnl_sum = 0.0
+    done = 0
+    while done < n_paths:
+        m = min(chunk, n_paths - done)
+        if returns is not None:
+            steps = returns[rng.integers(0, len(returns), size=(n_steps, m))]
+        else:
+            steps = drift + vol * rng.standard_normal((n_steps, m))
+        paths = spot * np.exp(np.cumsum(steps, axis=0))                # steps × m
+
+        hit      = paths >= boundary[:, None]
+        hit_any  = hit.any(axis=0)
+        final    = paths[-1]
+        wins    += int((final >= short_k).sum())
+        touches += int((paths <= short_k).any(axis=0).sum())
+        targets += int(hit_any.sum())
+
+        # Exit value per path: target, else the routine-review mark, else intrinsic at expiry
+        exit_spot  = paths[exit_step]
+        exit_value = put_spread_value(exit_spot, short_k, long_k, max(remain[exit_step], 0.0) / 365.0, sigma)
+        exit_value = np.where(hit_any, credit * (1.0 - profit_pct), np.clip(exit_value, 0.0, width))
+        pnl_sum   += float(((credit - exit_value) * 100.0).sum())
+        done      += m
+
+    return {
+        'PoP':          round(wins / n_paths, 4),
+        'P_Touch':      round(touches / n_paths, 4),
+        'P_Target':     round(targets / n_paths, 4),
+        'Expected_PnL': round(pnl_sum / n_paths, 2),
+    }
+
+
+def estimate_pop(signals: pd.DataFrame, spread_width: float = 10.0, profit_pct: float = 0.80,
+                 exit_dte: int = 4, method: str = MC_METHOD, n_paths: int = MC_PATHS) -> pd.DataFrame:
+    """
+    Monte Carlo PoP for every row of `signals` (same index returned).
+
+    signals columns: ticker (price-store symbol), spot, sigma (annualized,
+    decimal), dte (calendar days), delta (|delta| of the short put).
+    Rows missing any input get NaN. Never raises on a single bad row.
+    """
+    out = pd.DataFrame(index=signals.index, columns=POP_COLUMNS, dtype=float)
+    rng = np.random.default_rng(MC_SEED)
+    for idx, row in signals.iterrows():
+        try:
+            spot, sigma, dte, delta = (float(row[c]) for c in ['spot', 'sigma', 'dte', 'delta'])
+            if not all(np.isfinite([spot, sigma, dte, delta])) or spot <= 0 or sigma <= 0 or dte <= 0:
+                continue
+            short_k = float(strike_for_delta(spot, delta, dte / 365.0, sigma))
+            long_k  = short_k - spread_width
+            credit  = float(put_spread_value(spot, short_k, long_k, dte / 365.0, sigma))
+
+            returns = None
+            if method == 'bootstrap':
+                returns = _log_returns(row['ticker'])
+                if len(returns) < MC_MIN_RETURNS:
+                    print(f"[MC] {row['ticker']}: {len(returns)} cached returns — using GBM.")
+                    returns = None
+
+            sim = simulate_spread(spot, short_k, long_k, credit, dte, sigma, profit_pct, exit_dte,
+                                  returns=returns, n_paths=n_paths, rng=rng)
+            out.loc[idx] = [round(short_k, 2), round(long_k, 2), round(credit, 2),
+                            sim['PoP'], sim['P_Touch'], sim['P_Target'], sim['Expected_PnL']]
+        except Exception as e:
+            print(f"[MC] {row.get('ticker')}: simulation failed ({e}).")
+    return out
@@ -0,0 +1,86 @@
+"""
+option_pricing.py
+-----------------
+Vectorized Black-Scholes helpers for European puts and put credit spreads.
+Every function accepts scalars or numpy arrays and broadcasts, so a whole
+book × scenario grid is priced in one call.
+
+Volatility is annualized in decimal form (0.35 = 35%); callers working with
+the screener's percent-style IV / HV_30 values divide by 100 first.
+"""
+
+import numpy as np
+from statistics import NormalDist
+
+RISK_FREE_RATE = 0.04
+_MIN_SIGMA     = 1e-4
+_MIN_T         = 1.0 / 365.0 / 24.0   # one hour — below this, price at intrinsic
+
+
+def norm_cdf(x):
+    """
+    Standard normal CDF via the Abramowitz-Stegun 7.1.26 erf approximation
+    (|error| < 1.5e-7). numpy has no erf and scipy is not a dependency.
+    """
+    x    = np.asarray(x, dtype=float)
+    z    = np.abs(x) / np.sqrt(2.0)
+    t    = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 +
+           t * (-1.453152027 + t * 1.061405429))))
+    erf  = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def norm_ppf(p: float) -> float:
+    """Inverse standard normal CDF (scalar)."""
+    return NormalDist().inv_cdf(p)
+
+
+def bs_put(spot, strike, t_years, sigma, r=RISK_FREE_RATE):
+    """
+    Black-Scholes put price, floored at intrinsic since every underlying
+    except SPX is American-style. Expired inputs price at intrinsic.
+    """
+    spot    = np.asarray(spot, dtype=float)
+    strike  = np.asarray(strike, dtype=float)
+    t_years = np.asarray(t_years, dtype=float)
+    sigma   = np.maximum(np.asarray(sigma, dtype=float), _MIN_SIGMA)
+
+    t       = np.maximum(t_years, _MIN_T)
+    sqrt_t  = np.sqrt(t)
+    d1      = (np.log(spot / strike) + (r + 0.5 * sigma ** 2) * t) / (sigma * sqrt_t)
+    d2      = d1 - sigma * sqrt_t
+    price   = strike * np.exp(-r * t) * norm_cdf(-d2) - spot * norm_cdf(-d1)
+
+    intrinsic = np.maximum(strike - spot, 0.0)
+    return np.where(t_years <= _MIN_T, intrinsic, np.maximum(price, intrinsic))
+
+
+def bs_put_delta(spot, strike, t_years, sigma, r=RISK_FREE_RATE):
+    """Put delta (negative)."""
+    spot    = np.asarray(spot, dtype=float)
+    sigma   = np.maximum(np.asarray(sigma, dtype=float), _MIN_SIGMA)
+    t       = np.maximum(np.asarray(t_years, dtype=float), _MIN_T)
+    d1      = (np.log(spot / np.asarray(strike, dtype=float)) + (r + 0.5 * sigma ** 2) * t) / (sigma * np.sqrt(t))
+    return norm_cdf(d1) - 1.0
+
+
+def put_spread_value(spot, short_strike, long_strike, t_years, sigma, r=RISK_FREE_RATE):
+    """
+    Cost to close a put credit spread ($/share): short put minus long put.
+    A single sigma is used for both legs (no skew).
+    """
+    return (bs_put(spot, short_strike, t_years, sigma, r) -
+            bs_put(spot, long_strike, t_years, sigma, r))
+
+
+def strike_for_delta(spot, delta, t_years, sigma, r=RISK_FREE_RATE):
+    """
+    Put strike whose |delta| equals `delta` (e.g. 0.12). Vectorized in spot,
+    t_years and sigma; delta is a scalar.
+    """
+    spot    = np.asarray(spot, dtype=float)
+    sigma   = np.maximum(np.asarray(sigma, dtype=float), _MIN_SIGMA)
+    t       = np.maximum(np.asarray(t_years, dtype=float), _MIN_T)
+    d1      = norm_ppf(1.0 - delta)
+    return spot * np.exp(-(d1 * sigma * np.sqrt(t)) + (r + 0.5 * sigma ** 2) * t)
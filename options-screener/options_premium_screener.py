@@ -1,8 +1,18 @@
 import math
+import os
+import json
+import hashlib
 import yfinance as yf
 import pandas as pd
 import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from pathlib import Path
+
+from correlation_guard import correlation_clusters, CORR_CLUSTER_MIN, CORR_WINDOW
+from monte_carlo import estimate_pop, MC_PATHS
+from position_sizing import size_signals, SIZING_COLUMNS, RISK_BUDGET_USD, CLUSTER_RISK_CAP_PCT, POSITION_RISK_CAP_PCT
 
 try:
     import pandas_ta as ta
@@ -81,6 +91,10 @@ VIX_HIGH   = 30
 # Tier 2 volatility guard
 TIER2_ATR_MAX = 5.0
 
+# Liquidity / volatility gates (all tiers)
+ATR_PCT_MIN   = 1.0     # ATR% must exceed this — too quiet = thin premium
+VOL_SURGE_MIN = 1.2     # volume / 50-day average must exceed this
+
 # ============ DYNAMIC VIX-ADJUSTED THRESHOLDS ============
 # LOW  (<15) : premium thin — require deep oversold for entry
 # NORMAL (15-20) : standard thresholds
@@ -451,14 +465,35 @@ def _apply_iv_filters(ticker, iv_data, label):
 # ============ CLUSTER / CONCENTRATION GUARD ============
 # If too many tickers signal on the same day, they're likely responding to
 # the same macro event — not independent trades. Warn but do not auto-skip.
+# The count check is backed by a correlation check (correlation_guard.py):
+# signals + open positions are clustered by CORR_WINDOW-day return correlation
+# and each cluster reports its effective number of independent bets.
 
 CLUSTER_WARN_THRESHOLD = 5
+CORR_CLUSTER_WARN_SIZE = 3     # correlated names (signals + open) in one cluster that trigger a warning
 _CLUSTER_DISPLAY_MAX   = 10
 
 
-def check_cluster_risk(all_results):
+def _open_positions():
+    """OPEN ledger rows. Empty when the ledger is unavailable."""
+    try:
+        from position_tracker import _load   # position_tracker imports this module
+        df = _load()
+        return df[df['status'] == 'OPEN'].reset_index(drop=True)
+    except Exception as e:
+        logger.warning(f"[CLUSTER] Could not read open positions: {e}")
+        return pd.DataFrame(columns=['ticker'])
+
+
+def _open_position_tickers():
+    """Tickers with OPEN ledger positions. [] when the ledger is unavailable."""
+    return sorted(_open_positions()['ticker'].dropna().unique())
+
+
+def check_cluster_risk(all_results, open_tickers=None):
     """
-    Count total signals and flag concentration risk.
+    Count total signals and flag concentration risk, by count and by
+    correlation cluster (signals + open_tickers).
     Never raises — safe for any input including empty or None.
     """
     try:
@@ -468,6 +503,8 @@ def check_cluster_risk(all_results):
                 'cluster_risk': False,
                 'cluster_note': '✓ Cluster check passed: 0 signals.',
                 'tickers': [],
+                'corr_clusters': [],
+                'effective_bets': 0.0,
             }
         count   = len(all_results)
         tickers = list(all_results.keys())
@@ -485,11 +522,42 @@ def check_cluster_risk(all_results):
             f"✓ Cluster check passed: {count} signal(s) ({', '.join(display_tickers)}{suffix}) — "
             f"concentration risk low."
         )
+
+        # Correlation clusters over signals + open positions (fail-open: count check only)
+        corr_clusters, eff_bets = [], None
+        try:
+            open_tickers = [t for t in (open_tickers or []) if t not in all_results]
+            corr_info = correlation_clusters(tickers + open_tickers)
+            eff_bets  = corr_info['effective_bets']
+            for cl in corr_info['clusters']:
+                cl['signals'] = [t for t in cl['tickers'] if t in all_results]
+                cl['open']    = [t for t in cl['tickers'] if t not in all_results]
+                if cl['signals']:
+                    corr_clusters.append(cl)
+            crowded = [cl for cl in corr_clusters if cl['size'] >= CORR_CLUSTER_WARN_SIZE]
+            if crowded:
+                if not cluster_risk:
+                    note = (f"⚠️  CORRELATION RISK: {count} signal(s) ({', '.join(display_tickers)}{suffix}) "
+                            f"include correlated names — size each cluster as one trade.")
+                cluster_risk = True
+                note += ' | ⚠️  CORRELATED CLUSTERS: ' + '; '.join(
+                    f"[{', '.join(cl['signals'])}"
+                    f"{' + open ' + ', '.join(cl['open']) if cl['open'] else ''}] "
+                    f"avg ρ {cl['avg_corr']} ≈ {cl['effective_bets']} independent bet(s)"
+                    for cl in crowded
+                )
+            note += (f" | Effective independent bets: {eff_bets} of {len(tickers) + len(open_tickers)} "
+                     f"({CORR_WINDOW}d returns, clusters at avg ρ >= {CORR_CLUSTER_MIN})")
+        except Exception as e:
+            logger.warning(f"[CLUSTER] Correlation check failed ({e}) — count check only.")
+
         return {
-            'signal_count': count,
-            'cluster_risk': cluster_risk,
-            'cluster_note': note,
-            'tickers':      tickers,
+            'signal_count':   count,
+            'cluster_risk':   cluster_risk,
+            'cluster_note':   note,
+            'tickers':        tickers,
+            'corr_clusters':  corr_clusters,
+            'effective_bets': eff_bets,
         }
     except Exception as e:
         logger.warning(f"[CLUSTER] check_cluster_risk failed unexpectedly: {e}")
@@ -498,6 +566,8 @@ def check_cluster_risk(all_results):
             'cluster_risk': False,
             'cluster_note': f'Cluster check error: {e}',
             'tickers':      [],
+            'corr_clusters':  [],
+            'effective_bets': None,
         }
 
 
@@ -516,9 +586,10 @@ T2_EMERGENCY_CLOSE_DTE = 7
 
 # ============ POSITION EVALUATOR (Tier 2 runtime check) ============
 def evaluate_tier2_position(ticker, current_price, short_put_strike, expiry_date,
-                            entry_credit=None):
+                            entry_credit=None, today=None):
+    # today: as-of date (defaults to the real date; historical replays pass their own)
     long_put_strike = short_put_strike - SPREAD_WIDTH
-    today = datetime.today().date()
+    today = today or datetime.today().date()
     dte   = (expiry_date - today).days
 
     max_debit = round(entry_credit * MAX_ROLLOVER_DEBIT_PCT, 2) if entry_credit else None
@@ -705,111 +776,220 @@ def calculate_signal_strength(rsi, bb_pos, vol_surge, atr_pct):
     return score
 
 
+# ============ SCAN RESULT CACHE ============
+# A re-run on the same day (after a fix, from a scheduler) reuses every
+# ticker's evaluation when nothing it depends on has changed. Key:
+#   ticker | last daily bar (timestamp + OHLCV, so a still-forming bar counts
+#   as changed) | scan date (DTE / earnings blackout) | parameter-set hash |
+#   code version (hash of this file)
+# Only completed evaluations are stored; errors and missing data are retried.
+
+SCAN_CACHE_FILE      = 'scan_cache.json'
+SCAN_CACHE_KEEP_DAYS = 5
+CODE_VERSION         = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+
+_CACHED_STATUSES = {'SIGNAL', 'NO_SIGNAL', 'BLACKOUT', 'ATR_CAP', 'IV_SUPPRESSED'}
+
+
+def _params_hash(label, adjusted_params):
+    params = {
+        'label': label, 'adjusted': adjusted_params,
+        'periods': [RSI_PERIOD, BB_PERIOD, ATR_PERIOD], 'spx_gap': SPX_GAP_DOWN_PCT,
+        'atr_pct_min': ATR_PCT_MIN, 'vol_surge_min': VOL_SURGE_MIN, 'tier2_atr_max': TIER2_ATR_MAX,
+        'iv': [IV_RANK_MIN, IV_HV_MIN], 'dte': [DTE_MIN, DTE_MAX],
+        'delta': [TIER1_DELTA_MIN, TIER1_DELTA_MAX, TIER2_DELTA_MIN, TIER2_DELTA_MAX],
+        'earnings': [EARNINGS_ENTRY_BUFFER_BEFORE, EARNINGS_ENTRY_BUFFER_AFTER],
+    }
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _scan_key(ticker, stock_data, params_hash):
+    last = stock_data.iloc[-1]
+    bar  = ','.join(f'{float(last[c]):.6g}' for c in ['Open', 'High', 'Low', 'Close', 'Volume'] if c in last)
+    return '|'.join([ticker, str(stock_data.index[-1]), bar, datetime.today().strftime('%Y-%m-%d'),
+                     params_hash, CODE_VERSION])
+
+
+def _load_scan_cache():
+    try:
+        if os.path.exists(SCAN_CACHE_FILE):
+            with open(SCAN_CACHE_FILE) as f:
+                return json.load(f)
+    except Exception as e:
+        logger.warning(f"[SCAN-CACHE] Could not read {SCAN_CACHE_FILE}: {e}")
+    return {}
+
+
+def _save_scan_cache(cache):
+    cutoff = (datetime.today() - timedelta(days=SCAN_CACHE_KEEP_DAYS)).strftime('%Y-%m-%d')
+    cache  = {k: v for k, v in cache.items() if v.get('scan_date', '') >= cutoff}
+    try:
+        with open(SCAN_CACHE_FILE, 'w') as f:
+            json.dump(cache, f, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+    except Exception as e:
+        logger.warning(f"[SCAN-CACHE] Could not write {SCAN_CACHE_FILE}: {e}")
+
+
+def _cached_evaluation(cache, key, vix):
+    """Stored evaluation for key with the live VIX filled in, or None."""
+    hit = cache.get(key)
+    if hit is None:
+        return None
+    evaluation = hit['evaluation']
+    if evaluation.get('result'):
+        evaluation['result']['VIX'] = vix
+    return evaluation
+
+
+def _store_evaluation(cache, key, evaluation):
+    if evaluation['status'] in _CACHED_STATUSES:
+        cache[key] = {'scan_date': datetime.today().strftime('%Y-%m-%d'), 'evaluation': evaluation}
+
+
+def _download_daily(tickers, period='1y'):
+    """Ticker -> daily OHLCV (capitalized columns), one batched request for all tickers."""
+    try:
+        data = yf.download(list(tickers), period=period, interval='1d', progress=False,
+                           group_by='ticker', threads=True)
+    except Exception as e:
+        logger.warning(f"[DATA] Batch download failed: {e}")
+        data = pd.DataFrame()
+    frames = {}
+    for ticker in tickers:
+        try:
+            if isinstance(data.columns, pd.MultiIndex):
+                frame = data[ticker].copy() if ticker in data.columns.get_level_values(0) else pd.DataFrame()
+            else:
+                frame = data.copy()
+            frame.columns = [str(c).capitalize() for c in frame.columns]
+            frames[ticker] = frame.dropna(subset=['Close']) if 'Close' in frame.columns else pd.DataFrame()
+        except Exception:
+            frames[ticker] = pd.DataFrame()
+    return frames
+
+
 # ============ SPX SCREENING ============
+def _evaluate_spx(stock_data, vix, adjusted_params):
+    """
+    Gate evaluation + result record for SPX on its daily bars.
+    Returns {'status', 'gates', 'result'} (result is None unless status == 'SIGNAL').
+    """
+    evaluation = {'status': 'NO_SIGNAL', 'gates': {}, 'result': None}
+    spx_rsi_threshold = adjusted_params['spx_rsi_threshold']
+    stock_data = stock_data.copy()
+
+    stock_data['SMA_200']    = stock_data['Close'].rolling(200).mean()
+    stock_data['AVG_VOL_50'] = stock_data['Volume'].rolling(50).mean()
+    stock_data.ta.rsi(length=RSI_PERIOD, append=True)
+    rsi_col = f'RSI_{RSI_PERIOD}'
+    stock_data['BB_middle']   = stock_data['Close'].rolling(BB_PERIOD).mean()
+    stock_data['BB_std']      = stock_data['Close'].rolling(BB_PERIOD).std()
+    stock_data['BB_upper']    = stock_data['BB_middle'] + stock_data['BB_std'] * 2
+    stock_data['BB_lower']    = stock_data['BB_middle'] - stock_data['BB_std'] * 2
+    stock_data['BB_position'] = (stock_data['Close'] - stock_data['BB_lower']) / (stock_data['BB_upper'] - stock_data['BB_lower'])
+    stock_data.ta.atr(length=ATR_PERIOD, append=True)
+    atr_col = f'ATR_{ATR_PERIOD}'
+    stock_data.ta.macd(append=True)
+    if not all(c in stock_data.columns for c in [rsi_col, atr_col, 'MACDh_12_26_9']):
+        logger.warning("[SPX] TA indicators missing.")
+        return {**evaluation, 'status': 'ERROR'}
+
+    latest_close      = float(stock_data['Close'].iloc[-1])
+    prior_close       = float(stock_data['Close'].iloc[-2])
+    latest_open       = float(stock_data['Open'].iloc[-1])
+    latest_sma_200    = float(stock_data['SMA_200'].iloc[-1])
+    latest_volume     = float(stock_data['Volume'].iloc[-1])
+    latest_avg_vol_50 = float(stock_data['AVG_VOL_50'].iloc[-1])
+    current_rsi       = float(stock_data[rsi_col].iloc[-1])
+    latest_bb_pos     = float(stock_data['BB_position'].iloc[-1])
+    latest_bb_lower   = float(stock_data['BB_lower'].iloc[-1])
+    latest_bb_upper   = float(stock_data['BB_upper'].iloc[-1])
+    latest_atr        = float(stock_data[atr_col].iloc[-1])
+    macd_histogram    = float(stock_data['MACDh_12_26_9'].iloc[-1])
+    atr_pct            = (latest_atr / latest_close) * 100
+    volume_surge_ratio = latest_volume / latest_avg_vol_50
+    support_price, pct_above_support = get_support_level(stock_data)
+
+    gap_down_pct = ((latest_open - prior_close) / prior_close) * 100
+    is_gap_down  = gap_down_pct <= SPX_GAP_DOWN_PCT
+    is_rsi_low   = current_rsi < spx_rsi_threshold
+    is_uptrend   = latest_close > latest_sma_200
+    evaluation['gates'] = {'gap_down': is_gap_down, 'oversold': is_rsi_low, 'uptrend': is_uptrend}
+    logger.info(
+        f"[SPX] Gap: {gap_down_pct:.2f}% | RSI: {current_rsi:.1f} "
+        f"(threshold: {spx_rsi_threshold}) | SMA200: {is_uptrend} | VIX: {vix}"
+    )
+
+    if not (is_gap_down and is_rsi_low and is_uptrend):
+        logger.info("[SPX] Conditions not met. No signal.")
+        return evaluation
+
+    iv_data  = compute_iv_rank(SPX_TICKER)
+    suppress = _apply_iv_filters('SPX', iv_data, '[SPX]')
+    evaluation['gates']['iv_filters'] = not suppress
+    if suppress:
+        return {**evaluation, 'status': 'IV_SUPPRESSED'}
+
+    signal_strength = calculate_signal_strength(current_rsi, latest_bb_pos, volume_surge_ratio, atr_pct)
+    expiry_info = get_target_expiry(SPX_TICKER)
+    expiry_date = str(expiry_info[0]) if expiry_info else 'N/A'
+    expiry_dte  = expiry_info[1] if expiry_info else None
+    is_monthly  = expiry_info[2] if expiry_info else None
+    evaluation['status'] = 'SIGNAL'
+    evaluation['result'] = {
+        'Tier': 'TIER1_CORE', 'Signal_Strength': signal_strength,
+        'RSI': round(current_rsi, 2), 'Price': round(latest_close, 2),
+        'Prior_Close': round(prior_close, 2), 'Open': round(latest_open, 2),
+        'Gap_Down_%': round(gap_down_pct, 2), 'SMA_200': round(latest_sma_200, 2),
+        'BB_Position': round(latest_bb_pos, 2), 'BB_Lower': round(latest_bb_lower, 2),
+        'BB_Upper': round(latest_bb_upper, 2), 'ATR_%': round(atr_pct, 2),
+        'Vol_Surge': round(volume_surge_ratio, 2), 'Support': round(support_price, 2),
+        'Distance_to_Support_%': round(pct_above_support, 1),
+        'MACD_Histogram': round(macd_histogram, 3), 'VIX': vix,
+        'VIX_Regime': get_vix_regime(vix),
+        'RSI_Threshold_Used': spx_rsi_threshold,
+        'IV_Rank':      iv_data.get('iv_rank'),
+        'IV_Pct':       iv_data.get('iv_pct'),
+        'IV_52w_High':  iv_data.get('iv_52w_high'),
+        'IV_52w_Low':   iv_data.get('iv_52w_low'),
+        'HV_30':        iv_data.get('hv_30'),
+        'IV_HV_Ratio':  iv_data.get('iv_hv_ratio'),
+        'IV_Skip_Reason': iv_data.get('skipped_reason'),
+        'Delta_Target': f'{TIER1_DELTA_MIN}–{TIER1_DELTA_MAX}',
+        'Expiry_Date': expiry_date, 'Expiry_DTE': expiry_dte, 'Is_Monthly': is_monthly,
+        'Earnings_Avoided': 'N/A (index)', 'Earnings_Blackout': False,
+        'Position_Mgmt': f'Routine review at DTE<={BASE_DTE_ACTION} only',
+        'Note': 'European-style. No early assignment. CBOE SPX options only.',
+    }
+    logger.info(
+        f"✓ [SPX] Gap {gap_down_pct:.2f}% | RSI {current_rsi:.1f} | "
+        f"IV Rank {iv_data.get('iv_rank')} | IV/HV {iv_data.get('iv_hv_ratio')} | "
+        f"Signal: {signal_strength}/100 | Expiry: {expiry_date} (DTE {expiry_dte})"
+    )
+    return evaluation
+
+
 def screen_spx(vix, adjusted_params):
     logger.info("\n>>> Screening SPX (^GSPC) — European-style, Put Spread Specialist <<<")
     results = {}
-    spx_rsi_threshold = adjusted_params['spx_rsi_threshold']
-    try:
-        stock_data = yf.download(SPX_TICKER, period='1y', interval='1d', progress=False, group_by=False)
-        if isinstance(stock_data.columns, pd.MultiIndex):
-            stock_data.columns = stock_data.columns.droplevel(0)
-        stock_data.columns = [c.capitalize() for c in stock_data.columns]
-        if stock_data.empty or len(stock_data) < 200:
-            logger.warning("[SPX] Insufficient data.")
-            return results
-
-        stock_data['SMA_200']    = stock_data['Close'].rolling(200).mean()
-        stock_data['AVG_VOL_50'] = stock_data['Volume'].rolling(50).mean()
-        stock_data.ta.rsi(length=RSI_PERIOD, append=True)
-        rsi_col = f'RSI_{RSI_PERIOD}'
-        stock_data['BB_middle']   = stock_data['Close'].rolling(BB_PERIOD).mean()
-        stock_data['BB_std']      = stock_data['Close'].rolling(BB_PERIOD).std()
-        stock_data['BB_upper']    = stock_data['BB_middle'] + stock_data['BB_std'] * 2
-        stock_data['BB_lower']    = stock_data['BB_middle'] - stock_data['BB_std'] * 2
-        stock_data['BB_position'] = (stock_data['Close'] - stock_data['BB_lower']) / (stock_data['BB_upper'] - stock_data['BB_lower'])
-        stock_data.ta.atr(length=ATR_PERIOD, append=True)
-        atr_col = f'ATR_{ATR_PERIOD}'
-        stock_data.ta.macd(append=True)
-        if not all(c in stock_data.columns for c in [rsi_col, atr_col, 'MACDh_12_26_9']):
-            logger.warning("[SPX] TA indicators missing.")
-            return results
-
-        latest_close      = float(stock_data['Close'].iloc[-1])
-        prior_close       = float(stock_data['Close'].iloc[-2])
-        latest_open       = float(stock_data['Open'].iloc[-1])
-        latest_sma_200    = float(stock_data['SMA_200'].iloc[-1])
-        latest_volume     = float(stock_data['Volume'].iloc[-1])
-        latest_avg_vol_50 = float(stock_data['AVG_VOL_50'].iloc[-1])
-        current_rsi       = float(stock_data[rsi_col].iloc[-1])
-        latest_bb_pos     = float(stock_data['BB_position'].iloc[-1])
-        latest_bb_lower   = float(stock_data['BB_lower'].iloc[-1])
-        latest_bb_upper   = float(stock_data['BB_upper'].iloc[-1])
-        latest_atr        = float(stock_data[atr_col].iloc[-1])
-        macd_histogram    = float(stock_data['MACDh_12_26_9'].iloc[-1])
-        atr_pct            = (latest_atr / latest_close) * 100
-        volume_surge_ratio = latest_volume / latest_avg_vol_50
-        support_price, pct_above_support = get_support_level(stock_data)
-
-        gap_down_pct = ((latest_open - prior_close) / prior_close) * 100
-        is_gap_down  = gap_down_pct <= SPX_GAP_DOWN_PCT
-        is_rsi_low   = current_rsi < spx_rsi_threshold
-        is_uptrend   = latest_close > latest_sma_200
-        logger.info(
-            f"[SPX] Gap: {gap_down_pct:.2f}% | RSI: {current_rsi:.1f} "
-            f"(threshold: {spx_rsi_threshold}) | SMA200: {is_uptrend} | VIX: {vix}"
-        )
-
-        if is_gap_down and is_rsi_low and is_uptrend:
-            iv_data  = compute_iv_rank(SPX_TICKER)
-            suppress = _apply_iv_filters('SPX', iv_data, '[SPX]')
-            if suppress:
-                return results
-
-            signal_strength = calculate_signal_strength(current_rsi, latest_bb_pos, volume_surge_ratio, atr_pct)
-            expiry_info = get_target_expiry(SPX_TICKER)
-            expiry_date = str(expiry_info[0]) if expiry_info else 'N/A'
-            expiry_dte  = expiry_info[1] if expiry_info else None
-            is_monthly  = expiry_info[2] if expiry_info else None
-            results['SPX'] = {
-                'Tier': 'TIER1_CORE', 'Signal_Strength': signal_strength,
-                'RSI': round(current_rsi, 2), 'Price': round(latest_close, 2),
-                'Prior_Close': round(prior_close, 2), 'Open': round(latest_open, 2),
-                'Gap_Down_%': round(gap_down_pct, 2), 'SMA_200': round(latest_sma_200, 2),
-                'BB_Position': round(latest_bb_pos, 2), 'BB_Lower': round(latest_bb_lower, 2),
-                'BB_Upper': round(latest_bb_upper, 2), 'ATR_%': round(atr_pct, 2),
-                'Vol_Surge': round(volume_surge_ratio, 2), 'Support': round(support_price, 2),
-                'Distance_to_Support_%': round(pct_above_support, 1),
-                'MACD_Histogram': round(macd_histogram, 3), 'VIX': vix,
-                'VIX_Regime': get_vix_regime(vix),
-                'RSI_Threshold_Used': spx_rsi_threshold,
-                'IV_Rank':      iv_data.get('iv_rank'),
-                'IV_Pct':       iv_data.get('iv_pct'),
-                'IV_52w_High':  iv_data.get('iv_52w_high'),
-                'IV_52w_Low':   iv_data.get('iv_52w_low'),
-                'HV_30':        iv_data.get('hv_30'),
-                'IV_HV_Ratio':  iv_data.get('iv_hv_ratio'),
-                'IV_Skip_Reason': iv_data.get('skipped_reason'),
-                'Delta_Target': f'{TIER1_DELTA_MIN}–{TIER1_DELTA_MAX}',
-                'Expiry_Date': expiry_date, 'Expiry_DTE': expiry_dte, 'Is_Monthly': is_monthly,
-                'Earnings_Avoided': 'N/A (index)', 'Earnings_Blackout': False,
-                'Position_Mgmt': f'Routine review at DTE<={BASE_DTE_ACTION} only',
-                'Note': 'European-style. No early assignment. CBOE SPX options only.',
-            }
-            logger.info(
-                f"✓ [SPX] Gap {gap_down_pct:.2f}% | RSI {current_rsi:.1f} | "
-                f"IV Rank {iv_data.get('iv_rank')} | IV/HV {iv_data.get('iv_hv_ratio')} | "
-                f"Signal: {signal_strength}/100 | Expiry: {expiry_date} (DTE {expiry_dte})"
-            )
-        else:
-            logger.info("[SPX] Conditions not met. No signal.")
-    except Exception as e:
-        logger.error(f"[SPX] Error: {e}")
+    for ticker, _, evaluation in iter_screen([('SPX', 'TIER1_CORE')], vix, adjusted_params):
+        if evaluation['cached']:
+            logger.info(f"[SPX] Unchanged since last scan — cached {evaluation['status']}.")
+        if evaluation['status'] == 'SIGNAL':
+            results[ticker] = evaluation['result']
     return results
 
 
 # ============ GENERAL TIER SCREENING ============
-def screen_tickers(tickers, tier_label, vix, adjusted_params):
+def _evaluate_ticker(ticker, stock_data, tier_label, vix, adjusted_params):
+    """
+    Full gate evaluation of one ticker on its daily bars (earnings blackout,
+    technical gates, Tier 2 ATR cap, IV filters, expiry).
+
+    Returns {'status', 'gates', 'result'}: status is SIGNAL / NO_SIGNAL /
+    BLACKOUT / ATR_CAP / IV_SUPPRESSED / ERROR, gates holds every gate that was
+    reached, result the signal record (None unless SIGNAL).
+    """
     is_tier2     = (tier_label == 'TIER2_WATCH')
     delta_target = (
         f'{TIER2_DELTA_MIN}–{TIER2_DELTA_MAX}' if is_tier2
@@ -817,143 +997,281 @@ def screen_tickers(tickers, tier_label, vix, adjusted_params):
     )
     rsi_threshold = adjusted_params['rsi_threshold']
     bb_threshold  = adjusted_params['bb_threshold']
+    evaluation    = {'status': 'NO_SIGNAL', 'gates': {}, 'result': None}
+    stock_data    = stock_data.copy()
+
+    earnings_date = get_earnings_date(ticker)
+    blackout      = is_earnings_blackout(earnings_date)
+    evaluation['gates']['earnings_clear'] = not blackout
+    if blackout:
+        logger.info(
+            f"[{tier_label}] {ticker}: EARNINGS BLACKOUT — earnings {earnings_date}, "
+            f"within ±{EARNINGS_ENTRY_BUFFER_BEFORE}/{EARNINGS_ENTRY_BUFFER_AFTER}d. Skipping."
+        )
+        return {**evaluation, 'status': 'BLACKOUT'}
+
+    stock_data['SMA_200']    = stock_data['Close'].rolling(200).mean()
+    stock_data['AVG_VOL_50'] = stock_data['Volume'].rolling(50).mean()
+    stock_data.ta.rsi(length=RSI_PERIOD, append=True)
+    rsi_col = f'RSI_{RSI_PERIOD}'
+    stock_data['BB_middle']   = stock_data['Close'].rolling(BB_PERIOD).mean()
+    stock_data['BB_std']      = stock_data['Close'].rolling(BB_PERIOD).std()
+    stock_data['BB_upper']    = stock_data['BB_middle'] + stock_data['BB_std'] * 2
+    stock_data['BB_lower']    = stock_data['BB_middle'] - stock_data['BB_std'] * 2
+    stock_data['BB_position'] = (
+        (stock_data['Close'] - stock_data['BB_lower']) /
+        (stock_data['BB_upper'] - stock_data['BB_lower'])
+    )
+    stock_data.ta.atr(length=ATR_PERIOD, append=True)
+    atr_col = f'ATR_{ATR_PERIOD}'
+    stock_data.ta.macd(append=True)
+    if not all(c in stock_data.columns for c in [rsi_col, atr_col, 'MACDh_12_26_9']):
+        logger.warning(f"[{tier_label}] TA indicators missing for {ticker}.")
+        return {**evaluation, 'status': 'ERROR'}
+
+    latest_close      = float(stock_data['Close'].iloc[-1])
+    prior_close       = float(stock_data['Close'].iloc[-2])
+    latest_sma_200    = float(stock_data['SMA_200'].iloc[-1])
+    latest_volume     = float(stock_data['Volume'].iloc[-1])
+    latest_avg_vol_50 = float(stock_data['AVG_VOL_50'].iloc[-1])
+    current_rsi       = float(stock_data[rsi_col].iloc[-1])
+    latest_bb_pos     = float(stock_data['BB_position'].iloc[-1])
+    latest_bb_lower   = float(stock_data['BB_lower'].iloc[-1])
+    latest_bb_upper   = float(stock_data['BB_upper'].iloc[-1])
+    latest_atr        = float(stock_data[atr_col].iloc[-1])
+    macd_histogram    = float(stock_data['MACDh_12_26_9'].iloc[-1])
+    atr_pct            = (latest_atr / latest_close) * 100
+    volume_surge_ratio = latest_volume / latest_avg_vol_50
+    support_price, pct_above_support = get_support_level(stock_data)
+
+    is_red_day       = latest_close < prior_close
+    is_oversold      = current_rsi < rsi_threshold
+    is_uptrend_long  = latest_close > latest_sma_200
+    is_liquid        = latest_volume > latest_avg_vol_50
+    is_near_lower_bb = latest_bb_pos < bb_threshold
+    is_adequate_vol  = atr_pct > ATR_PCT_MIN
+    is_volume_surge  = volume_surge_ratio > VOL_SURGE_MIN
+    evaluation['gates'].update({
+        'oversold': is_oversold, 'uptrend': is_uptrend_long, 'liquid': is_liquid,
+        'near_lower_bb': is_near_lower_bb, 'adequate_vol': is_adequate_vol,
+        'volume_surge': is_volume_surge, 'tier2_atr_cap': not (is_tier2 and atr_pct > TIER2_ATR_MAX),
+    })
+
+    if is_tier2 and atr_pct > TIER2_ATR_MAX:
+        logger.info(
+            f"[{tier_label}] {ticker}: ATR% {atr_pct:.2f}% > {TIER2_ATR_MAX}% "
+            f"— too volatile, skipping."
+        )
+        return {**evaluation, 'status': 'ATR_CAP'}
+
+    if not (is_oversold and is_uptrend_long and is_liquid and
+            is_near_lower_bb and is_adequate_vol and is_volume_surge):
+        return evaluation
+
+    iv_data  = compute_iv_rank(ticker)
+    suppress = _apply_iv_filters(ticker, iv_data, f'[{tier_label}]')
+    evaluation['gates']['iv_filters'] = not suppress
+    if suppress:
+        return {**evaluation, 'status': 'IV_SUPPRESSED'}
+
+    signal_strength = calculate_signal_strength(current_rsi, latest_bb_pos, volume_surge_ratio, atr_pct)
+    expiry_info     = get_target_expiry(ticker, earnings_date)
+    expiry_date_str = str(expiry_info[0]) if expiry_info else 'N/A (earnings conflict)'
+    expiry_dte      = expiry_info[1] if expiry_info else None
+    is_monthly      = expiry_info[2] if expiry_info else None
+    earn_avoided    = str(earnings_date) if expiry_info and expiry_info[3] else 'N/A'
+    t2_mgmt_note = (
+        f'Stage1(DTE<={T2_ROLLOVER_DTE}+price<short_put): '
+        f'1st net credit roll, 2nd debit<={int(MAX_ROLLOVER_DEBIT_PCT*100)}% of credit, fallback close | '
+        f'Stage2(DTE<={T2_EMERGENCY_CLOSE_DTE}+price<=long_put): emergency close'
+    ) if is_tier2 else f'Routine review at DTE<={BASE_DTE_ACTION} only'
+
+    evaluation['status'] = 'SIGNAL'
+    evaluation['result'] = {
+        'Tier': tier_label, 'Signal_Strength': signal_strength,
+        'RSI': round(current_rsi, 2), 'Price': round(latest_close, 2),
+        'Red_Day': is_red_day, 'SMA_200': round(latest_sma_200, 2),
+        'BB_Position': round(latest_bb_pos, 2), 'BB_Lower': round(latest_bb_lower, 2),
+        'BB_Upper': round(latest_bb_upper, 2), 'ATR_%': round(atr_pct, 2),
+        'Vol_Surge': round(volume_surge_ratio, 2), 'Support': round(support_price, 2),
+        'Distance_to_Support_%': round(pct_above_support, 1),
+        'MACD_Histogram': round(macd_histogram, 3), 'VIX': vix,
+        'VIX_Regime': get_vix_regime(vix),
+        'RSI_Threshold_Used': rsi_threshold,
+        'BB_Threshold_Used':  bb_threshold,
+        'IV_Rank':      iv_data.get('iv_rank'),
+        'IV_Pct':       iv_data.get('iv_pct'),
+        'IV_52w_High':  iv_data.get('iv_52w_high'),
+        'IV_52w_Low':   iv_data.get('iv_52w_low'),
+        'HV_30':        iv_data.get('hv_30'),
+        'IV_HV_Ratio':  iv_data.get('iv_hv_ratio'),
+        'IV_Skip_Reason': iv_data.get('skipped_reason'),
+        'Delta_Target': delta_target, 'Expiry_Date': expiry_date_str,
+        'Expiry_DTE': expiry_dte, 'Is_Monthly': is_monthly,
+        'Earnings_Avoided': earn_avoided, 'Earnings_Blackout': False,
+        'Position_Mgmt': t2_mgmt_note,
+    }
+    logger.info(
+        f"✓ [{tier_label}] {ticker}: RSI {current_rsi:.1f} (thr={rsi_threshold}) | "
+        f"BB {latest_bb_pos:.2f} (thr={bb_threshold}) | ATR% {atr_pct:.2f} | "
+        f"IV Rank {iv_data.get('iv_rank')} | IV/HV {iv_data.get('iv_hv_ratio')} | "
+        f"Signal: {signal_strength}/100 | Expiry: {expiry_date_str} (DTE {expiry_dte})"
+    )
+    return evaluation
+
+
+def screen_tickers(tickers, tier_label, vix, adjusted_params):
     results = {}
-    error_count = 0
-    successful_count = 0
+    counts  = _new_counts()
+    for ticker, _, evaluation in iter_screen([(t, tier_label) for t in tickers], vix, adjusted_params):
+        _tally(results, counts, ticker, evaluation)
+    _log_tier_done(tier_label, results, counts)
+    return results
 
-    for ticker in tickers:
-        try:
-            stock_data = yf.download(ticker, period='1y', interval='1d', progress=False, group_by=False)
-            if isinstance(stock_data.columns, pd.MultiIndex):
-                stock_data.columns = stock_data.columns.droplevel(0)
-            stock_data.columns = [c.capitalize() for c in stock_data.columns]
+
+# ============ STREAMING SCREEN ============
+# Evaluations are yielded the moment each ticker finishes, so consumers
+# (run_screener, the live console, signal notifications) see the first signal
+# without waiting for the slowest IV chain / earnings / expiry lookup.
+# Bars come in one batched download up front; cache hits are yielded before
+# any network-bound evaluation starts.
+
+SCAN_WORKERS = 8
+
+
+def _evaluate_safe(ticker, tier_label, stock_data, vix, adjusted_params):
+    label = 'SPX' if ticker == 'SPX' else tier_label
+    try:
+        if ticker == 'SPX':
+            return _evaluate_spx(stock_data, vix, adjusted_params)
+        return _evaluate_ticker(ticker, stock_data, tier_label, vix, adjusted_params)
+    except Exception as e:
+        logger.error(f"[{label}] Error processing {ticker}: {e}")
+        return {'status': 'ERROR', 'gates': {}, 'result': None}
+
+
+def iter_screen(universe, vix, adjusted_params, workers=SCAN_WORKERS):
+    """
+    Screen (ticker, tier_label) pairs and yield (ticker, tier_label, evaluation)
+    in completion order. 'SPX' is screened on ^GSPC with the SPX rules.
+
+    evaluation = {'status', 'gates', 'result', 'cached'}; status is one of
+    _evaluate_ticker()'s, or NO_DATA when fewer than 200 daily bars came back.
+    Closing the generator early cancels evaluations not yet started.
+    """
+    universe = list(universe)
+    daily    = _download_daily([SPX_TICKER if t == 'SPX' else t for t, _ in universe])
+    cache    = _load_scan_cache()
+    pool     = ThreadPoolExecutor(max_workers=workers)
+    pending  = {}
+    try:
+        for ticker, tier_label in universe:
+            label      = 'SPX' if ticker == 'SPX' else tier_label
+            stock_data = daily.get(SPX_TICKER if ticker == 'SPX' else ticker, pd.DataFrame())
             if 'Close' not in stock_data.columns or stock_data.empty or len(stock_data) < 200:
-                logger.warning(f"[{tier_label}] Insufficient data for {ticker}.")
-                error_count += 1
+                logger.warning(f"[{label}] Insufficient data for {ticker}.")
+                yield ticker, tier_label, {'status': 'NO_DATA', 'gates': {}, 'result': None, 'cached': False}
                 continue
-
-            earnings_date = get_earnings_date(ticker)
-            if is_earnings_blackout(earnings_date):
-                logger.info(
-                    f"[{tier_label}] {ticker}: EARNINGS BLACKOUT — earnings {earnings_date}, "
-                    f"within ±{EARNINGS_ENTRY_BUFFER_BEFORE}/{EARNINGS_ENTRY_BUFFER_AFTER}d. Skipping."
-                )
-                successful_count += 1
+            key        = _scan_key(ticker, stock_data, _params_hash(label, adjusted_params))
+            evaluation = _cached_evaluation(cache, key, vix)
+            if evaluation is not None:
+                yield ticker, tier_label, {**evaluation, 'cached': True}
                 continue
+            future = pool.submit(_evaluate_safe, ticker, tier_label, stock_data, vix, adjusted_params)
+            pending[future] = (ticker, tier_label, key)
 
-            stock_data['SMA_200']    = stock_data['Close'].rolling(200).mean()
-            stock_data['AVG_VOL_50'] = stock_data['Volume'].rolling(50).mean()
-            stock_data.ta.rsi(length=RSI_PERIOD, append=True)
-            rsi_col = f'RSI_{RSI_PERIOD}'
-            stock_data['BB_middle']   = stock_data['Close'].rolling(BB_PERIOD).mean()
-            stock_data['BB_std']      = stock_data['Close'].rolling(BB_PERIOD).std()
-            stock_data['BB_upper']    = stock_data['BB_middle'] + stock_data['BB_std'] * 2
-            stock_data['BB_lower']    = stock_data['BB_middle'] - stock_data['BB_std'] * 2
-            stock_data['BB_position'] = (
-                (stock_data['Close'] - stock_data['BB_lower']) /
-                (stock_data['BB_upper'] - stock_data['BB_lower'])
-            )
-            stock_data.ta.atr(length=ATR_PERIOD, append=True)
-            atr_col = f'ATR_{ATR_PERIOD}'
-            stock_data.ta.macd(append=True)
-            if not all(c in stock_data.columns for c in [rsi_col, atr_col, 'MACDh_12_26_9']):
-                logger.warning(f"[{tier_label}] TA indicators missing for {ticker}.")
-                error_count += 1
-                continue
+        for future in as_completed(pending):
+            ticker, tier_label, key = pending[future]
+            evaluation = future.result()
+            _store_evaluation(cache, key, evaluation)
+            yield ticker, tier_label, {**evaluation, 'cached': False}
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        _save_scan_cache(cache)
 
-            latest_close      = float(stock_data['Close'].iloc[-1])
-            prior_close       = float(stock_data['Close'].iloc[-2])
-            latest_sma_200    = float(stock_data['SMA_200'].iloc[-1])
-            latest_volume     = float(stock_data['Volume'].iloc[-1])
-            latest_avg_vol_50 = float(stock_data['AVG_VOL_50'].iloc[-1])
-            current_rsi       = float(stock_data[rsi_col].iloc[-1])
-            latest_bb_pos     = float(stock_data['BB_position'].iloc[-1])
-            latest_bb_lower   = float(stock_data['BB_lower'].iloc[-1])
-            latest_bb_upper   = float(stock_data['BB_upper'].iloc[-1])
-            latest_atr        = float(stock_data[atr_col].iloc[-1])
-            macd_histogram    = float(stock_data['MACDh_12_26_9'].iloc[-1])
-            atr_pct            = (latest_atr / latest_close) * 100
-            volume_surge_ratio = latest_volume / latest_avg_vol_50
-            support_price, pct_above_support = get_support_level(stock_data)
-
-            is_red_day       = latest_close < prior_close
-            is_oversold      = current_rsi < rsi_threshold
-            is_uptrend_long  = latest_close > latest_sma_200
-            is_liquid        = latest_volume > latest_avg_vol_50
-            is_near_lower_bb = latest_bb_pos < bb_threshold
-            is_adequate_vol  = atr_pct > 1.0
-            is_volume_surge  = volume_surge_ratio > 1.2
-
-            if is_tier2 and atr_pct > TIER2_ATR_MAX:
-                logger.info(
-                    f"[{tier_label}] {ticker}: ATR% {atr_pct:.2f}% > {TIER2_ATR_MAX}% "
-                    f"— too volatile, skipping."
-                )
-                successful_count += 1
-                continue
 
-            if (is_oversold and is_uptrend_long and is_liquid and
-                    is_near_lower_bb and is_adequate_vol and is_volume_surge):
-
-                iv_data  = compute_iv_rank(ticker)
-                suppress = _apply_iv_filters(ticker, iv_data, f'[{tier_label}]')
-                if suppress:
-                    successful_count += 1
-                    continue
-
-                signal_strength = calculate_signal_strength(current_rsi, latest_bb_pos, volume_surge_ratio, atr_pct)
-                expiry_info     = get_target_expiry(ticker, earnings_date)
-                expiry_date_str = str(expiry_info[0]) if expiry_info else 'N/A (earnings conflict)'
-                expiry_dte      = expiry_info[1] if expiry_info else None
-                is_monthly      = expiry_info[2] if expiry_info else None
-                earn_avoided    = str(earnings_date) if expiry_info and expiry_info[3] else 'N/A'
-                t2_mgmt_note = (
-                    f'Stage1(DTE<={T2_ROLLOVER_DTE}+price<short_put): '
-                    f'1st net credit roll, 2nd debit<={int(MAX_ROLLOVER_DEBIT_PCT*100)}% of credit, fallback close | '
-                    f'Stage2(DTE<={T2_EMERGENCY_CLOSE_DTE}+price<=long_put): emergency close'
-                ) if is_tier2 else f'Routine review at DTE<={BASE_DTE_ACTION} only'
-
-                results[ticker] = {
-                    'Tier': tier_label, 'Signal_Strength': signal_strength,
-                    'RSI': round(current_rsi, 2), 'Price': round(latest_close, 2),
-                    'Red_Day': is_red_day, 'SMA_200': round(latest_sma_200, 2),
-                    'BB_Position': round(latest_bb_pos, 2), 'BB_Lower': round(latest_bb_lower, 2),
-                    'BB_Upper': round(latest_bb_upper, 2), 'ATR_%': round(atr_pct, 2),
-                    'Vol_Surge': round(volume_surge_ratio, 2), 'Support': round(support_price, 2),
-                    'Distance_to_Support_%': round(pct_above_support, 1),
-                    'MACD_Histogram': round(macd_histogram, 3), 'VIX': vix,
-                    'VIX_Regime': get_vix_regime(vix),
-                    'RSI_Threshold_Used': rsi_threshold,
-                    'BB_Threshold_Used':  bb_threshold,
-                    'IV_Rank':      iv_data.get('iv_rank'),
-                    'IV_Pct':       iv_data.get('iv_pct'),
-                    'IV_52w_High':  iv_data.get('iv_52w_high'),
-                    'IV_52w_Low':   iv_data.get('iv_52w_low'),
-                    'HV_30':        iv_data.get('hv_30'),
-                    'IV_HV_Ratio':  iv_data.get('iv_hv_ratio'),
-                    'IV_Skip_Reason': iv_data.get('skipped_reason'),
-                    'Delta_Target': delta_target, 'Expiry_Date': expiry_date_str,
-                    'Expiry_DTE': expiry_dte, 'Is_Monthly': is_monthly,
-                    'Earnings_Avoided': earn_avoided, 'Earnings_Blackout': False,
-                    'Position_Mgmt': t2_mgmt_note,
-                }
-                logger.info(
-                    f"✓ [{tier_label}] {ticker}: RSI {current_rsi:.1f} (thr={rsi_threshold}) | "
-                    f"BB {latest_bb_pos:.2f} (thr={bb_threshold}) | ATR% {atr_pct:.2f} | "
-                    f"IV Rank {iv_data.get('iv_rank')} | IV/HV {iv_data.get('iv_hv_ratio')} | "
-                    f"Signal: {signal_strength}/100 | Expiry: {expiry_date_str} (DTE {expiry_dte})"
-                )
-            successful_count += 1
-        except Exception as e:
-            logger.error(f"[{tier_label}] Error processing {ticker}: {e}")
-            error_count += 1
+def _new_counts():
+    return {'analyzed': 0, 'cached': 0, 'errors': 0}
 
-    logger.info(f"[{tier_label}] Done — {successful_count} analyzed, {len(results)} signals, {error_count} errors")
-    return results
+
+def _tally(results, counts, ticker, evaluation):
+    if evaluation['status'] in ('ERROR', 'NO_DATA'):
+        counts['errors'] += 1
+        return
+    counts['analyzed'] += 1
+    counts['cached']   += evaluation['cached']
+    if evaluation['status'] == 'SIGNAL':
+        results[ticker] = evaluation['result']
+
+
+def _log_tier_done(label, results, counts):
+    logger.info(
+        f"[{label}] Done — {counts['analyzed']} analyzed ({counts['cached']} unchanged, from cache), "
+        f"{len(results)} signals, {counts['errors']} errors"
+    )
+
+
+def live_console(ticker, tier_label, evaluation):
+    """on_result consumer: one line per ticker as it completes."""
+    result = evaluation['result'] or {}
+    print(
+        f"{datetime.now().strftime('%H:%M:%S')}  {ticker:<6} {tier_label:<11} {evaluation['status']:<13}"
+        f"{' (cached)' if evaluation['cached'] else '':<9}"
+        f"{'strength ' + str(result.get('Signal_Strength')) if result else ''}",
+        flush=True,
+    )
+
+
+def notify_signal(ticker, tier_label, evaluation):
+    """on_result consumer: email each new signal as soon as it is found (cached repeats are skipped)."""
+    if evaluation['status'] != 'SIGNAL' or evaluation['cached']:
+        return
+    from position_tracker import notify   # position_tracker imports this module
+    r = evaluation['result']
+    notify(
+        subject=f"[SIGNAL] {ticker} {tier_label} — strength {r.get('Signal_Strength')}/100",
+        body=(
+            f"{ticker} ({tier_label}) @ {r.get('Price')}\n"
+            f"RSI {r.get('RSI')} | ATR% {r.get('ATR_%')} | IV Rank {r.get('IV_Rank')} | IV/HV {r.get('IV_HV_Ratio')}\n"
+            f"Delta {r.get('Delta_Target')} | Expiry {r.get('Expiry_Date')} (DTE {r.get('Expiry_DTE')})\n"
+            f"VIX {r.get('VIX')} ({r.get('VIX_Regime')})"
+        ),
+    )
+
+
+# ============ MONTE CARLO PoP ============
+def add_pop_estimates(results_df):
+    """
+    Append Monte Carlo PoP columns (monte_carlo.POP_COLUMNS) to the signal
+    table. The short strike sits at the middle of the tier's delta range,
+    sigma is the IV estimate (HV_30 × IV/HV, HV_30 when the ratio is missing).
+    Signals without an expiry get NaN.
+    """
+    hv_30 = pd.to_numeric(results_df['HV_30'], errors='coerce')
+    ratio = pd.to_numeric(results_df['IV_HV_Ratio'], errors='coerce').fillna(1.0)
+    inputs = pd.DataFrame({
+        'ticker': [SPX_TICKER if t == 'SPX' else t for t in results_df.index],
+        'spot':   pd.to_numeric(results_df['Price'], errors='coerce').to_numpy(),
+        'sigma':  (hv_30 * ratio / 100).to_numpy(),
+        'dte':    pd.to_numeric(results_df['Expiry_DTE'], errors='coerce').to_numpy(),
+        'delta':  [(TIER2_DELTA_MIN + TIER2_DELTA_MAX) / 2 if tier == 'TIER2_WATCH'
+                   else (TIER1_DELTA_MIN + TIER1_DELTA_MAX) / 2 for tier in results_df['Tier']],
+    }, index=results_df.index)
+    started = datetime.now()
+    pop = estimate_pop(inputs, spread_width=SPREAD_WIDTH, profit_pct=EARLY_CLOSE_PROFIT_PCT,
+                       exit_dte=BASE_DTE_ACTION)
+    logger.info(f"Monte Carlo PoP: {len(inputs)} signals × {MC_PATHS:,} paths "
+                f"in {(datetime.now() - started).total_seconds():.1f}s")
+    return results_df.join(pop)
 
 
 # ============ MAIN RUNNER ============
-def run_screener():
+def run_screener(on_result=None):
+    """
+    on_result: optional list of callables (ticker, tier_label, evaluation),
+    each called as soon as that ticker's evaluation completes
+    (e.g. live_console, notify_signal).
+    """
     logger.info("=" * 70)
     logger.info("OPTIONS PREMIUM SCREENER — WINNING STOCKS PRIORITY MODE")
     logger.info("=" * 70)
@@ -969,6 +1287,8 @@ def run_screener():
     logger.info(f"IV/HV minimum (Pass 2)         : {IV_HV_MIN} (below = options not priced above realized vol)")
     logger.info(f"IV filter policy               : fail-open (None = proceed without filter)")
     logger.info(f"Cluster warn threshold         : {CLUSTER_WARN_THRESHOLD} simultaneous signals")
+    logger.info(f"Risk budget (max loss)         : ${RISK_BUDGET_USD:,.0f} | cluster cap {CLUSTER_RISK_CAP_PCT:.0%} | position cap {POSITION_RISK_CAP_PCT:.0%}")
+    logger.info(f"Correlation cluster warn       : {CORR_CLUSTER_WARN_SIZE}+ names at avg ρ >= {CORR_CLUSTER_MIN} ({CORR_WINDOW}d returns, incl. open positions)")
     logger.info(f"Delta — Tier 1                 : {TIER1_DELTA_MIN}–{TIER1_DELTA_MAX}")
     logger.info(f"Delta — Tier 2                 : {TIER2_DELTA_MIN}–{TIER2_DELTA_MAX} (ATR% guard <= {TIER2_ATR_MAX}%)")
     logger.info(f"DTE window                     : {DTE_MIN}–{DTE_MAX} days (monthly preferred)")
@@ -984,18 +1304,30 @@ def run_screener():
     logger.info(f"Tier 2                         : {', '.join(TIER2_WATCHLIST)}")
     logger.info("=" * 70)
 
-    all_results = {}
-    spx_result    = screen_spx(vix, adjusted_params)
-    all_results.update(spx_result)
-    logger.info("\n>>> Screening TIER 1 — Core Winning Stocks <<<")
-    tier1_results = screen_tickers(TIER1_CORE, tier_label="TIER1_CORE", vix=vix, adjusted_params=adjusted_params)
-    all_results.update(tier1_results)
-    logger.info("\n>>> Screening TIER 2 — Watchlist <<<")
-    tier2_results = screen_tickers(TIER2_WATCHLIST, tier_label="TIER2_WATCH", vix=vix, adjusted_params=adjusted_params)
-    all_results.update(tier2_results)
+    logger.info("\n>>> Screening SPX + TIER 1 + TIER 2 — results stream in as each ticker completes <<<")
+    universe = (
+        [('SPX', 'TIER1_CORE')]
+        + [(t, 'TIER1_CORE') for t in TIER1_CORE]
+        + [(t, 'TIER2_WATCH') for t in TIER2_WATCHLIST]
+    )
+    groups = {'SPX': {}, 'TIER1_CORE': {}, 'TIER2_WATCH': {}}
+    counts = {g: _new_counts() for g in groups}
+    for ticker, tier_label, evaluation in iter_screen(universe, vix, adjusted_params):
+        group = 'SPX' if ticker == 'SPX' else tier_label
+        _tally(groups[group], counts[group], ticker, evaluation)
+        for consumer in on_result or []:
+            try:
+                consumer(ticker, tier_label, evaluation)
+            except Exception as e:
+                logger.warning(f"[STREAM] {getattr(consumer, '__name__', consumer)} failed on {ticker}: {e}")
+    for group, results in groups.items():
+        _log_tier_done(group, results, counts[group])
+    spx_result, tier1_results, tier2_results = groups['SPX'], groups['TIER1_CORE'], groups['TIER2_WATCH']
+    all_results = {**spx_result, **tier1_results, **tier2_results}
 
     # ============ CLUSTER / CONCENTRATION GUARD ============
-    cluster_info = check_cluster_risk(all_results)
+    open_positions = _open_positions()
+    cluster_info   = check_cluster_risk(all_results, sorted(open_positions['ticker'].dropna().unique()))
     logger.info("=" * 70)
     logger.info(cluster_info['cluster_note'])
     logger.info("=" * 70)
@@ -1016,6 +1348,22 @@ def run_screener():
         results_df['Scan_Date']    = datetime.now().strftime('%Y-%m-%d')
         results_df['Scan_Time']    = datetime.now().strftime('%H:%M:%S')
         results_df['Cluster_Risk'] = cluster_info['cluster_risk']
+        for cl in cluster_info['corr_clusters']:
+            results_df.loc[cl['signals'], 'Corr_Cluster']     = cl['id']
+            results_df.loc[cl['signals'], 'Cluster_Eff_Bets'] = cl['effective_bets']
+        results_df = add_pop_estimates(results_df)
+        try:
+            results_df = size_signals(results_df, spread_width=SPREAD_WIDTH, open_positions=open_positions)
+            logger.info(
+                f"Position sizing: {int(results_df['Contracts'].sum())} contract(s), "
+                f"${results_df['Risk_USD'].sum():,.0f} new max loss "
+                f"(budget ${RISK_BUDGET_USD:,.0f} incl. open positions)"
+            )
+        except Exception as e:
+            # Fail-open like the cluster guard: the signals CSV must still be written
+            logger.warning(f"[SIZING] Position sizing failed ({e}) — Contracts / Risk_USD left blank.")
+            for col in SIZING_COLUMNS:
+                results_df[col] = float('nan')
         output_file = f'signals_{datetime.now().strftime("%Y%m%d")}.csv'
         results_df.to_csv(output_file)
         logger.info(f"Results saved → {output_file}")
@@ -1023,8 +1371,9 @@ def run_screener():
             'Tier', 'Signal_Strength', 'RSI', 'RSI_Threshold_Used',
             'Price', 'ATR_%', 'VIX', 'VIX_Regime',
             'IV_Rank', 'IV_Pct', 'HV_30', 'IV_HV_Ratio',
-            'Delta_Target', 'Expiry_Date', 'Expiry_DTE',
-            'Is_Monthly', 'Earnings_Avoided', 'Cluster_Risk', 'Position_Mgmt',
+            'Delta_Target', 'Expiry_Date', 'Expiry_DTE', 'PoP', 'P_Touch', 'Expected_PnL',
+            'Contracts', 'Risk_USD',
+            'Is_Monthly', 'Earnings_Avoided', 'Cluster_Risk', 'Corr_Cluster', 'Position_Mgmt',
         ]
         if 'Gap_Down_%' in results_df.columns:
             display_cols.insert(4, 'Gap_Down_%')
@@ -1038,4 +1387,9 @@ def run_screener():
 
 
 if __name__ == "__main__":
-    run_screener()
+    parser = argparse.ArgumentParser(description='Options premium screener')
+    parser.add_argument('--live', action='store_true', help='print each ticker as its evaluation completes')
+    parser.add_argument('--notify-signals', action='store_true', help='email each new signal as soon as it is found')
+    args = parser.parse_args()
+    consumers = ([live_console] if args.live else []) + ([notify_signal] if args.notify_signals else [])
+    run_screener(on_result=consumers)
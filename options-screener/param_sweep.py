@@ -0,0 +1,231 @@
+"""
+param_sweep.py
+--------------
+Grid search over the hand-picked entry thresholds — VIX_ADJUSTED_PARAMS,
+IV_RANK_MIN, IV_HV_MIN, TIER2_ATR_MAX and VOL_SURGE_MIN — against the
+historical signals and outcomes of backtest.py.
+
+The indicator panel and forward outcomes are built once and copied into one
+shared-memory block. Pool workers attach to it (no pickling, no per-worker
+copy of the panel), drop every cell that fails a parameter-independent gate
+(history, SPX gap, SMA200 uptrend, liquidity, minimum ATR%) once, and then
+score their share of the grid on the few surviving cells with the same
+gate_masks() the backtest uses.
+
+VIX_ADJUSTED_PARAMS is swept as shifts applied to every regime
+(rsi_shift / bb_shift / spx_rsi_shift), so the LOW < NORMAL < ELEVATED > HIGH
+shape of the table is kept.
+
+Each combination reports signals, completed trades, win rate and expected P&L
+per contract (backtest 'pnl' outcome). Results are ranked by --sort (win_rate,
+avg_pnl or signals, the other two break ties); combinations with fewer than
+SWEEP_MIN_SIGNALS signals rank last.
+
+Usage:
+    python param_sweep.py                       # 5y, SWEEP_GRID, all cores
+    python param_sweep.py --period 10y --sort avg_pnl --workers 8
+
+    from param_sweep import run_sweep
+    results = run_sweep(period='10y')
+"""
+
+import argparse
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import shared_memory
+
+from backtest import (
+    HISTORY_PERIOD, REGIMES, VIX_TICKER,
+    build_panel, default_tiers, forward_outcomes, gate_masks, load_ohlcv, tier_flags,
+)
+from price_store import get_history
+from options_premium_screener import (
+    VIX_ADJUSTED_PARAMS, IV_RANK_MIN, IV_HV_MIN, TIER2_ATR_MAX, VOL_SURGE_MIN,
+)
+
+# ============ CONFIG ============
+SWEEP_GRID = {
+    'rsi_shift':     [-4, -2, 0, 2, 4],             # added to every regime's rsi_threshold
+    'bb_shift':      [-0.10, -0.05, 0.0, 0.05, 0.10],
+    'spx_rsi_shift': [-3, 0, 3],
+    'iv_rank_min':   [0, 15, 25, 35, 50],
+    'iv_hv_min':     [0.8, 0.9, 1.0, 1.1, 1.2],
+    'tier2_atr_max': [4.0, 5.0, 6.0, 8.0],
+    'vol_surge_min': [1.0, 1.1, 1.2, 1.5],
+}                                                   # 30,000 combinations
+SWEEP_MIN_SIGNALS = 30
+CHUNK_COMBOS      = 500
+SORT_KEYS         = ['win_rate', 'avg_pnl', 'signals']
+TOP_SHOWN         = 15
+
+# Current live settings, expressed in SWEEP_GRID terms
+CURRENT_PARAMS = {
+    'rsi_shift': 0, 'bb_shift': 0.0, 'spx_rsi_shift': 0,
+    'iv_rank_min': IV_RANK_MIN, 'iv_hv_min': IV_HV_MIN,
+    'tier2_atr_max': TIER2_ATR_MAX, 'vol_surge_min': VOL_SURGE_MIN,
+}
+
+# Panel fields placed in shared memory (indicators read by gate_masks + outcomes)
+_FIELDS = [
+    'sma_200', 'gap_pct', 'rsi', 'close', 'volume', 'avg_vol_50', 'bb_position',
+    'atr_pct', 'vol_surge', 'iv_rank', 'iv_hv_ratio', 'win', 'pnl',
+]
+_STATIC_GATES = ['history', 'gap_down', 'uptrend', 'liquid', 'adequate_vol']
+_THRESHOLD_KEYS = ['rsi_threshold', 'bb_threshold', 'spx_rsi_threshold']
+_BASE_TABLE = np.array([[VIX_ADJUSTED_PARAMS[r][k] for k in _THRESHOLD_KEYS] for r in REGIMES], dtype=float)
+
+
+# ============ WORKER ============
+_worker = {}
+
+
+def _attach(shm_name: str, shape: tuple, regime_codes, is_spx, is_t2):
+    """Pool initializer: map the shared panel and keep only cells a combo could pass."""
+    shm = shared_memory.SharedMemory(name=shm_name)   # pool children share the parent's resource tracker
+    panel = dict(zip(_FIELDS, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)))
+
+    static = gate_masks(panel, is_spx[None, :], is_t2[None, :], np.nan, np.nan, np.nan)
+    r, c   = np.nonzero(np.logical_and.reduce([static[g] for g in _STATIC_GATES]))
+    _worker.update(
+        shm=shm,
+        cells={k: v[r, c] for k, v in panel.items()},
+        regime=regime_codes[r], is_spx=is_spx[c], is_t2=is_t2[c],
+    )
+
+
+def _evaluate(combos: list) -> list:
+    cells, regime = _worker['cells'], _worker['regime']
+    rows = []
+    for p in combos:
+        table = _BASE_TABLE + [p['rsi_shift'], p['bb_shift'], p['spx_rsi_shift']]
+        thr   = table[regime]
+        gates = gate_masks(
+            cells, _worker['is_spx'], _worker['is_t2'], thr[:, 0], thr[:, 1], thr[:, 2],
+            iv_rank_min=p['iv_rank_min'], iv_hv_min=p['iv_hv_min'],
+            atr_max=p['tier2_atr_max'], vol_surge_min=p['vol_surge_min'],
+        )
+        hit  = np.logical_and.reduce(list(gates.values()))
+        win  = cells['win'][hit]
+        done = ~np.isnan(win)
+        pnl  = cells['pnl'][hit][done]
+        rows.append({
+            **p,
+            'signals':   int(hit.sum()),
+            'completed': int(done.sum()),
+            'win_rate':  round(float(win[done].mean()), 3) if done.any() else np.nan,
+            'avg_pnl':   round(float(pnl.mean()), 2) if done.any() else np.nan,
+            'total_pnl': round(float(pnl.sum()), 2),
+        })
+    return rows
+
+
+# ============ SWEEP ============
+def _grid_combos(grid: dict) -> list:
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def rank_results(results: pd.DataFrame, sort: str = 'win_rate') -> pd.DataFrame:
+    keys = [sort] + [k for k in SORT_KEYS if k != sort]
+    ranked = results.assign(eligible=results['signals'] >= SWEEP_MIN_SIGNALS).sort_values(
+        ['eligible', *keys], ascending=False, na_position='last', kind='stable')
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked.reset_index(drop=True)
+
+
+def run_sweep(period: str = HISTORY_PERIOD, grid: dict = None, tiers: dict = None,
+              sort: str = 'win_rate', max_workers: int = None, verbose: bool = True,
+              save: bool = True) -> pd.DataFrame:
+    """
+    Score every combination in `grid` (default SWEEP_GRID) over `period` of
+    history. Returns one ranked row per combination; `is_current` marks the
+    live settings when they are part of the grid.
+    """
+    grid  = grid or SWEEP_GRID
+    tiers = tiers or default_tiers()
+    ohlcv = load_ohlcv(tiers, period)
+    if ohlcv['Close'].empty:
+        print("[SWEEP] No price history available.")
+        return pd.DataFrame()
+    vix_hist = get_history(VIX_TICKER, period)
+    vix      = vix_hist['Close'] if not vix_hist.empty else pd.Series(dtype=float)
+
+    started  = datetime.now()
+    panel    = build_panel(ohlcv, vix)
+    fields   = {**panel['data'], **forward_outcomes(panel, tiers)}
+    is_spx, is_t2 = tier_flags(panel['tickers'], tiers)
+    regime_codes  = pd.Categorical(panel['regime'], categories=REGIMES).codes
+
+    shape = (len(_FIELDS), *fields['close'].shape)
+    shm   = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        stack = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, name in enumerate(_FIELDS):
+            stack[i] = fields[name]
+        if 'SPX' not in tiers:   # loaded for the IV proxy only
+            stack[_FIELDS.index('sma_200'), :, panel['tickers'].index('SPX')] = np.nan
+
+        combos  = _grid_combos(grid)
+        chunks  = [combos[i:i + CHUNK_COMBOS] for i in range(0, len(combos), CHUNK_COMBOS)]
+        workers = min(len(chunks), max_workers or os.cpu_count() or 1)
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, shape, regime_codes, is_spx, is_t2)) as pool:
+            futures = [pool.submit(_evaluate, chunk) for chunk in chunks]
+            for fut in as_completed(futures):
+                rows.extend(fut.result())
+        del stack
+    finally:
+        shm.close()
+        shm.unlink()
+    elapsed = (datetime.now() - started).total_seconds()
+
+    results = rank_results(pd.DataFrame(rows), sort)
+    results['is_current'] = np.logical_and.reduce(
+        [results[k] == v for k, v in CURRENT_PARAMS.items() if k in results.columns])
+
+    if save:
+        output_file = f'param_sweep_{datetime.now().strftime("%Y%m%d")}.csv'
+        results.to_csv(output_file, index=False)
+    if verbose:
+        print_sweep_report(results, len(combos), workers, elapsed, sort)
+        if save:
+            print(f"Saved → {output_file}")
+    return results
+
+
+def print_sweep_report(results: pd.DataFrame, n_combos: int, workers: int, elapsed: float, sort: str):
+    print(f"\n{'='*60}")
+    print(f"PARAMETER SWEEP — ranked by {sort}")
+    print(f"{'='*60}")
+    print(f"Combinations     : {n_combos:,} on {workers} worker(s) in {elapsed:.1f}s")
+    print(f"Eligible         : {int(results['eligible'].sum()):,} with >= {SWEEP_MIN_SIGNALS} signals")
+    print('='*60)
+    cols = ['rank', *SWEEP_GRID, *SORT_KEYS, 'total_pnl']
+    cols = [c for c in cols if c in results.columns]
+    print(f"\nTOP {TOP_SHOWN}:")
+    print(results.head(TOP_SHOWN)[cols].to_string(index=False))
+
+    current = results[results['is_current']]
+    if not current.empty:
+        print("\nCURRENT SETTINGS:")
+        print(current[cols].to_string(index=False))
+
+    best = results.iloc[0]
+    if best['eligible']:
+        shift = np.array([best.get('rsi_shift', 0), best.get('bb_shift', 0.0), best.get('spx_rsi_shift', 0)])
+        table = pd.DataFrame(_BASE_TABLE + shift, index=REGIMES, columns=_THRESHOLD_KEYS)
+        print("\nVIX_ADJUSTED_PARAMS AT RANK 1:")
+        print(table.round(2).to_string())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep entry thresholds over historical signals.')
+    parser.add_argument('--period', default=HISTORY_PERIOD, help="history to test: '1y', '5y', '10y', 'max'")
+    parser.add_argument('--sort', default='win_rate', choices=SORT_KEYS)
+    parser.add_argument('--workers', type=int, default=None, help='pool size (default: all cores)')
+    args = parser.parse_args()
+    run_sweep(period=args.period, sort=args.sort, max_workers=args.workers)
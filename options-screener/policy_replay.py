@@ -0,0 +1,296 @@
+"""
+policy_replay.py
+----------------
+Historical replay of the Tier 2 position-management policy.
+
+Every Tier 2 entry signal found by backtest.py opens a hypothetical put credit
+spread (short strike at the Tier 2 mid delta, SPREAD_WIDTH wide, first Friday
+HOLD_DTE or more days out). Each spread is then walked day by day through
+evaluate_tier2_position() with that day's close and date:
+
+    HOLD             keep the spread (closed early at EARLY_CLOSE_PROFIT_PCT of credit)
+    ROLLOVER         roll as suggest_rollover() would: 1st the lowest lower strike
+                     that still nets >= ROLL_MIN_NET_CREDIT, 2nd the same strike
+                     for a debit <= MAX_ROLLOVER_DEBIT_PCT of the spread's credit,
+                     otherwise EMERGENCY_CLOSE. Candidate expiries are the
+                     Fridays DTE_MAX+1 … DTE_MAX+30 days out.
+    EMERGENCY_CLOSE  buy back at the mark
+    ROUTINE_REVIEW   close at the mark
+
+Option prices are Black-Scholes (option_pricing.put_spread_value) at the
+backtest IV proxy, with ROLL_HALF_SPREAD $/share paid on every leg traded.
+One spread per ticker at a time — signals while a path is open are skipped.
+
+Paths on different tickers are independent, so tickers are replayed in a
+process pool. The policy report sums every path's daily mark-to-market into
+one equity curve for total P&L and max drawdown.
+
+Usage:
+    python policy_replay.py                 # 5y of Tier 2 signals
+    python policy_replay.py --period 10y
+
+    from policy_replay import run_policy_replay
+    trades, equity, summary = run_policy_replay(period='10y')
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from backtest import (
+    HISTORY_PERIOD, HOLD_DTE, VIX_TICKER,
+    build_panel, day_thresholds, default_tiers, entry_gates, load_ohlcv, signal_mask,
+)
+from option_pricing import put_spread_value, strike_for_delta
+from price_store import get_history
+from position_tracker import ROLL_MIN_NET_CREDIT
+from options_premium_screener import (
+    SPREAD_WIDTH, DTE_MAX, EARLY_CLOSE_PROFIT_PCT, MAX_ROLLOVER_DEBIT_PCT,
+    TIER2_DELTA_MIN, TIER2_DELTA_MAX, evaluate_tier2_position,
+)
+
+# ============ CONFIG ============
+ROLL_HALF_SPREAD = 0.03    # $/share slippage per leg traded (bid/ask half-spread)
+ROLL_STRIKE_LEVELS = 20    # lower strikes tried for a credit roll (in strike increments)
+MAX_ROLLS        = 6       # safety cap per path; beyond it the next ROLLOVER is an emergency close
+_ENTRY_DELTA     = (TIER2_DELTA_MIN + TIER2_DELTA_MAX) / 2
+
+
+def _strike_increment(price: float) -> float:
+    return 0.5 if price < 25 else 1.0 if price < 200 else 5.0
+
+
+def _friday_on_or_after(day):
+    return day + timedelta(days=(4 - day.weekday()) % 7)
+
+
+def _spread_value(price, short_k, t_days, sigma):
+    return float(put_spread_value(price, short_k, short_k - SPREAD_WIDTH, max(t_days, 0) / 365.0, sigma))
+
+
+def _find_roll(price, sigma, today, short_k, expiry, credit):
+    """
+    Best roll for today as (new_short, new_expiry, new_credit, net) or None.
+    Prices are mid ∓ ROLL_HALF_SPREAD per leg, as if crossing the market.
+    """
+    close_debit = _spread_value(price, short_k, (expiry - today).days, sigma) + 2 * ROLL_HALF_SPREAD
+    first    = _friday_on_or_after(today + timedelta(days=DTE_MAX + 1))
+    expiries = [first + timedelta(days=7 * k) for k in range(5)
+                if first + timedelta(days=7 * k) <= today + timedelta(days=DTE_MAX + 30)]
+    step     = _strike_increment(price)
+    strikes  = short_k - step * np.arange(0, ROLL_STRIKE_LEVELS + 1)        # [0] = same strike
+    t_years  = np.array([(e - today).days for e in expiries])[None, :] / 365.0
+    new_credit = put_spread_value(price, strikes[:, None], strikes[:, None] - SPREAD_WIDTH,
+                                  t_years, sigma) - 2 * ROLL_HALF_SPREAD
+    net = new_credit - close_debit                                         # strikes × expiries
+
+    # Priority 1: lowest lower strike with a net credit (ties: larger net, nearer expiry)
+    ii, jj = np.nonzero(net[1:] >= ROLL_MIN_NET_CREDIT)
+    if len(ii):
+        ii = ii + 1
+        k  = np.lexsort((jj, -net[ii, jj], strikes[ii]))[0]
+        i, j = ii[k], jj[k]
+        return float(strikes[i]), expiries[j], float(new_credit[i, j]), float(net[i, j])
+
+    # Priority 2: same strike, smallest debit within the cap (ties: nearer expiry)
+    ok = net[0] >= -MAX_ROLLOVER_DEBIT_PCT * credit
+    if ok.any():
+        jj = np.nonzero(ok)[0]
+        j  = jj[np.lexsort((jj, -net[0, jj]))[0]]
+        return float(short_k), expiries[j], float(new_credit[0, j]), float(net[0, j])
+    return None
+
+
+# ============ PATH WALK ============
+def replay_path(ticker: str, dates, close, sigma, start: int) -> dict:
+    """
+    Walk one spread opened at close[start] until it is closed or the data ends.
+    Returns the trade record plus its daily mark-to-market P&L ('mtm', USD per
+    contract, one value per day from `start`).
+    """
+    entry_day = dates[start].date()
+    price     = close[start]
+    short_k   = float(np.floor(strike_for_delta(price, _ENTRY_DELTA, HOLD_DTE / 365.0, sigma[start])
+                               / _strike_increment(price)) * _strike_increment(price))
+    expiry    = _friday_on_or_after(entry_day + timedelta(days=HOLD_DTE))
+    credit    = _spread_value(price, short_k, (expiry - entry_day).days, sigma[start]) - 2 * ROLL_HALF_SPREAD
+    cash      = credit * 100.0
+    rolls, reason, end, mtm = 0, 'OPEN', start, [-2 * ROLL_HALF_SPREAD * 100.0]   # entry marked at mid
+    first_short, first_credit = short_k, credit
+
+    for t in range(start + 1, len(dates)):
+        today, price, vol = dates[t].date(), close[t], sigma[t]
+        if np.isnan(price):
+            mtm.append(mtm[-1])
+            continue
+        end  = t
+        mark = _spread_value(price, short_k, (expiry - today).days, vol)
+        if today >= expiry:
+            cash  -= min(max(short_k - price, 0.0), SPREAD_WIDTH) * 100.0
+            reason = 'EXPIRED'
+            mtm.append(cash)
+            break
+
+        action = evaluate_tier2_position(ticker, price, short_k, expiry, entry_credit=credit,
+                                         today=today)['action']
+        if action == 'ROLLOVER':
+            roll = _find_roll(price, vol, today, short_k, expiry, credit) if rolls < MAX_ROLLS else None
+            if roll:
+                short_k, expiry, credit, net = roll
+                cash  += net * 100.0
+                rolls += 1
+                mtm.append(cash - (_spread_value(price, short_k, (expiry - today).days, vol)) * 100.0)
+                continue
+            action = 'EMERGENCY_CLOSE'
+        elif action == 'HOLD' and mark <= credit * (1.0 - EARLY_CLOSE_PROFIT_PCT):
+            action = 'EARLY_CLOSE'
+
+        if action in ('EMERGENCY_CLOSE', 'ROUTINE_REVIEW', 'EARLY_CLOSE'):
+            cash  -= (mark + 2 * ROLL_HALF_SPREAD) * 100.0
+            reason = action
+            mtm.append(cash)
+            break
+        mtm.append(cash - mark * 100.0)
+
+    return {
+        'Ticker':       ticker,
+        'Entry_Date':   entry_day,
+        'Exit_Date':    dates[end].date(),
+        'Short_Put':    first_short,
+        'Entry_Credit': round(first_credit, 2),
+        'Final_Short_Put': short_k,
+        'Final_Expiry': expiry,
+        'Rolls':        rolls,
+        'Exit_Reason':  reason,
+        'Days_Held':    (dates[end].date() - entry_day).days,
+        'PnL_USD':      round(mtm[-1], 2),
+        'Worst_MTM_USD': round(min(mtm), 2),
+        'start':        start,
+        'mtm':          np.array(mtm),
+    }
+
+
+def _replay_ticker(ticker: str, dates, close, sigma, entries) -> list:
+    """Replay every entry for one ticker, skipping signals while a spread is open."""
+    paths, busy_until = [], -1
+    for start in entries:
+        if start <= busy_until:
+            continue
+        path = replay_path(ticker, dates, close, sigma, start)
+        paths.append(path)
+        busy_until = start + len(path['mtm']) - 1 if path['Exit_Reason'] != 'OPEN' else len(dates)
+    return paths
+
+
+# ============ RUNNER ============
+def run_policy_replay(period: str = HISTORY_PERIOD, tiers: dict = None, max_workers: int = None,
+                      verbose: bool = True):
+    """
+    Replay the Tier 2 policy over every historical Tier 2 signal.
+
+    Returns (trades, equity, summary):
+        trades  : one row per path — strikes, rolls, exit reason, P&L, worst mark
+        equity  : Series of cumulative policy P&L (USD, 1 contract per path) by date
+        summary : dict — paths, total / average P&L, win rate, max drawdown,
+                  exit-reason and roll counts
+    """
+    tiers = tiers or default_tiers()
+    ohlcv = load_ohlcv(tiers, period)
+    if ohlcv['Close'].empty:
+        print("[REPLAY] No price history available.")
+        return pd.DataFrame(), pd.Series(dtype=float), {}
+    vix_hist = get_history(VIX_TICKER, period)
+    vix      = vix_hist['Close'] if not vix_hist.empty else pd.Series(dtype=float)
+
+    started = datetime.now()
+    panel   = build_panel(ohlcv, vix)
+    mask    = signal_mask(entry_gates(panel, tiers, day_thresholds(panel['regime'])))
+    d       = panel['data']
+    sigma   = np.where(np.isnan(d['iv_proxy']), d['hv_30'], d['iv_proxy']) / 100.0
+
+    jobs = {}
+    for j, ticker in enumerate(panel['tickers']):
+        entries = np.nonzero(mask[:, j])[0]
+        if tiers.get(ticker) == 'TIER2_WATCH' and len(entries):
+            jobs[ticker] = (panel['dates'], d['close'][:, j], sigma[:, j], entries)
+    if not jobs:
+        print("[REPLAY] No Tier 2 signals in the history.")
+        return pd.DataFrame(), pd.Series(dtype=float), {}
+
+    paths   = []
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_replay_ticker, ticker, *args) for ticker, args in jobs.items()]
+        for fut in as_completed(futures):
+            paths.extend(fut.result())
+    elapsed = (datetime.now() - started).total_seconds()
+
+    # Daily policy equity: each path's MTM from entry, frozen at its final P&L after exit
+    n_days = len(panel['dates'])
+    daily  = np.zeros(n_days)
+    for p in paths:
+        mtm  = p['mtm']
+        stop = p['start'] + len(mtm)
+        daily[p['start']:stop] += np.diff(mtm, prepend=0.0)
+    equity   = pd.Series(np.cumsum(daily), index=panel['dates'], name='policy_pnl')
+    drawdown = equity - equity.cummax()
+
+    trades = pd.DataFrame([{k: v for k, v in p.items() if k not in ('start', 'mtm')} for p in paths])
+    trades = trades.sort_values(['Entry_Date', 'Ticker']).reset_index(drop=True)
+    closed = trades[trades['Exit_Reason'] != 'OPEN']
+    summary = {
+        'paths':          len(trades),
+        'open_paths':     int((trades['Exit_Reason'] == 'OPEN').sum()),
+        'elapsed_sec':    round(elapsed, 2),
+        'workers':        workers,
+        'total_pnl':      round(float(trades['PnL_USD'].sum()), 2),
+        'avg_pnl':        round(float(closed['PnL_USD'].mean()), 2) if not closed.empty else None,
+        'win_rate':       round(float((closed['PnL_USD'] > 0).mean()), 3) if not closed.empty else None,
+        'max_drawdown':   round(float(drawdown.min()), 2),
+        'max_drawdown_date': drawdown.idxmin().strftime('%Y-%m-%d'),
+        'worst_path':     round(float(trades['PnL_USD'].min()), 2),
+        'exit_reasons':   trades['Exit_Reason'].value_counts().to_dict(),
+        'rolls':          trades['Rolls'].value_counts().sort_index().to_dict(),
+    }
+    if verbose:
+        print_replay_report(trades, summary)
+    return trades, equity, summary
+
+
+def print_replay_report(trades: pd.DataFrame, summary: dict):
+    print(f"\n{'='*60}")
+    print("TIER 2 POLICY REPLAY")
+    print(f"{'='*60}")
+    print(f"Paths            : {summary['paths']} ({summary['open_paths']} still open) — "
+          f"{summary['elapsed_sec']}s on {summary['workers']} worker(s)")
+    print(f"Total P&L        : ${summary['total_pnl']:,.2f} (1 contract per path)")
+    if summary['avg_pnl'] is not None:
+        print(f"Avg P&L / Win    : ${summary['avg_pnl']:,.2f} / {summary['win_rate']:.1%}")
+    print(f"Max drawdown     : ${summary['max_drawdown']:,.2f} (trough {summary['max_drawdown_date']})")
+    print(f"Worst path       : ${summary['worst_path']:,.2f}")
+    print('='*60)
+
+    print("\nEXIT REASONS:")
+    by_reason = trades.groupby('Exit_Reason').agg(
+        paths=('PnL_USD', 'size'), avg_pnl=('PnL_USD', 'mean'),
+        total_pnl=('PnL_USD', 'sum'), avg_days=('Days_Held', 'mean'), avg_rolls=('Rolls', 'mean'),
+    ).sort_values('total_pnl')
+    print(by_reason.round(2).to_string())
+
+    print("\nBY ROLL COUNT:")
+    by_rolls = trades.groupby('Rolls').agg(
+        paths=('PnL_USD', 'size'), avg_pnl=('PnL_USD', 'mean'),
+        win_rate=('PnL_USD', lambda s: (s > 0).mean()),
+    )
+    print(by_rolls.round(2).to_string())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay the Tier 2 management policy over historical signals.')
+    parser.add_argument('--period', default=HISTORY_PERIOD, help="history to replay: '1y', '5y', '10y', 'max'")
+    parser.add_argument('--workers', type=int, default=None, help='pool size (default: all cores)')
+    args = parser.parse_args()
+    run_policy_replay(period=args.period, max_workers=args.workers)
@@ -0,0 +1,173 @@
+"""
+position_sizing.py
+------------------
+Contract counts for the day's signals under a total risk budget and
+per-cluster caps, correlation-aware.
+
+Risk unit of a spread = its max loss per contract, (spread width - credit)
+× 100. The credit is the Monte Carlo / Black-Scholes MC_Credit of the signal
+(monte_carlo.py). Open ledger spreads consume the budget first, and their
+cluster's cap, at their own max loss.
+
+Sizing, in max-loss dollars per signal:
+
+    1. target weights  w ∝ C⁻¹ s  (mean-variance with conviction s =
+       Signal_Strength / 100 and C the CORR_WINDOW-day return correlation
+       from correlation_guard, shrunk toward the identity by CORR_SHRINKAGE;
+       long-only by dropping names with negative weight and re-solving).
+       Correlated names share one slice of risk, unrelated names get a
+       full one each.
+    2. caps            scaled to the remaining budget, then water-filled:
+                       positions above POSITION_RISK_CAP_PCT and clusters
+                       above CLUSTER_RISK_CAP_PCT of RISK_BUDGET_USD are cut
+                       to the cap and the excess goes to uncapped names.
+    3. contracts       floor(w × budget / max loss), then single contracts
+                       are added where the rounding shortfall is largest
+                       while every cap still holds.
+
+Everything is k × k linear algebra, instant for dozens of candidates.
+
+Usage:
+    from position_sizing import size_signals
+    sized = size_signals(results_df, spread_width=10, open_positions=ledger_open_rows)
+"""
+
+import numpy as np
+import pandas as pd
+
+from correlation_guard import correlation_clusters
+
+# ============ CONFIG ============
+RISK_BUDGET_USD       = 10_000    # total max loss across open + new spreads
+CLUSTER_RISK_CAP_PCT  = 0.40      # of RISK_BUDGET_USD per correlation cluster
+POSITION_RISK_CAP_PCT = 0.20      # of RISK_BUDGET_USD per new spread
+CORR_SHRINKAGE        = 0.5       # C -> (1-δ)C + δI: 60-day correlations are noisy and C⁻¹ amplifies noise
+
+SIZING_COLUMNS = ['Max_Loss_USD', 'Risk_Weight', 'Contracts', 'Risk_USD', 'Sizing_Cluster']
+
+
+def _open_risk(open_positions: pd.DataFrame) -> pd.Series:
+    """Max loss in USD per ticker of the open ledger spreads."""
+    if open_positions is None or open_positions.empty:
+        return pd.Series(dtype=float)
+    num   = {c: pd.to_numeric(open_positions[c], errors='coerce')
+             for c in ['short_put_strike', 'long_put_strike', 'entry_credit', 'contracts']}
+    width = (num['short_put_strike'] - num['long_put_strike'] - num['entry_credit']).clip(lower=0.0)
+    risk  = (width * 100.0 * num['contracts'].fillna(1.0)).fillna(0.0)
+    return risk.groupby(open_positions['ticker']).sum()
+
+
+def _long_only_weights(corr: np.ndarray, conviction: np.ndarray) -> np.ndarray:
+    """w ∝ C⁻¹ s with w >= 0 (active set: drop negatives and re-solve)."""
+    c      = (1.0 - CORR_SHRINKAGE) * np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(c, 1.0)
+    active = conviction > 0
+    w      = np.zeros(len(conviction))
+    while active.any():
+        sub = np.linalg.solve(c[np.ix_(active, active)], conviction[active])
+        if (sub >= 0).all():
+            w[active] = sub
+            break
+        idx = np.flatnonzero(active)
+        active[idx[sub < 0]] = False
+    total = w.sum()
+    return w / total if total > 0 else w
+
+
+def _water_fill(target: np.ndarray, cap: np.ndarray, groups: np.ndarray, group_cap: np.ndarray) -> np.ndarray:
+    """
+    Move `target` (USD) under per-name `cap` and per-group `group_cap`,
+    handing the excess to names still below every cap, pro rata.
+    """
+    alloc = target.copy()
+    total = target.sum()
+    for _ in range(2 * len(alloc) + 2):
+        alloc = np.minimum(alloc, cap)
+        used  = np.bincount(groups, weights=alloc, minlength=len(group_cap))
+        over  = used > group_cap + 1e-9
+        if over.any():
+            scale = np.where(over, group_cap / np.where(used > 0, used, 1.0), 1.0)
+            alloc = alloc * scale[groups]
+            used  = np.bincount(groups, weights=alloc, minlength=len(group_cap))
+        excess = total - alloc.sum()
+        room   = (alloc < cap - 1e-9) & (used[groups] < group_cap[groups] - 1e-9) & (target > 0)
+        if excess <= 1e-6 or not room.any():
+            break
+        base   = np.where(room, target, 0.0)
+        alloc  = alloc + excess * base / base.sum()
+    return alloc
+
+
+def size_signals(signals: pd.DataFrame, spread_width: float = 10.0, open_positions: pd.DataFrame = None,
+                 budget: float = RISK_BUDGET_USD) -> pd.DataFrame:
+    """
+    Append SIZING_COLUMNS to `signals` (index = ticker label, needs MC_Credit
+    and Signal_Strength). Signals without a credit get 0 contracts.
+    """
+    out = signals.copy()
+    for col in SIZING_COLUMNS:
+        out[col] = np.nan
+    credit    = pd.to_numeric(out['MC_Credit'], errors='coerce') if 'MC_Credit' in out else \
+        pd.Series(np.nan, index=out.index)
+    max_loss  = ((spread_width - credit) * 100.0).where(lambda x: x > 0)
+    out['Max_Loss_USD'] = max_loss.round(2)
+    out['Contracts'], out['Risk_USD'], out['Risk_Weight'] = 0, 0.0, 0.0
+    sized = max_loss.notna().to_numpy()
+    if not sized.any():
+        return out
+
+    open_risk = _open_risk(open_positions)
+    tickers   = list(out.index[sized])
+    info      = correlation_clusters(tickers + [t for t in open_risk.index if t not in tickers])
+    cluster   = {t: cl['id'] for cl in info['clusters'] for t in cl['tickers']}
+    n_groups  = max(cluster.values()) + 1
+
+    groups    = np.array([cluster[t] for t in tickers])
+    used_open = np.bincount([cluster[t] for t in open_risk.index], weights=open_risk.to_numpy(),
+                            minlength=n_groups) if not open_risk.empty else np.zeros(n_groups)
+    remaining = max(budget - float(open_risk.sum()), 0.0)
+    group_cap = np.clip(CLUSTER_RISK_CAP_PCT * budget - used_open, 0.0, None)
+    cap       = np.full(len(tickers), POSITION_RISK_CAP_PCT * budget)
+
+    corr       = info['corr'].loc[tickers, tickers].to_numpy()
+    conviction = pd.to_numeric(out.loc[sized, 'Signal_Strength'], errors='coerce').fillna(0.0).to_numpy() / 100.0
+    weights    = _long_only_weights(corr, conviction)
+    alloc      = _water_fill(weights * remaining, cap, groups, group_cap)
+
+    # Whole contracts: floor, then top up the largest shortfalls while every cap holds
+    loss      = max_loss[sized].to_numpy()
+    contracts = np.floor(alloc / loss + 1e-9)
+    while True:
+        risk      = contracts * loss
+        g_used    = np.bincount(groups, weights=risk, minlength=n_groups)
+        fits      = ((risk + loss <= cap + 1e-9) & (g_used[groups] + loss <= group_cap[groups] + 1e-9)
+                     & (risk.sum() + loss <= remaining + 1e-9) & (alloc > 0))
+        shortfall = np.where(fits, alloc - risk, -np.inf)
+        best      = int(np.argmax(shortfall))
+        if not np.isfinite(shortfall[best]) or shortfall[best] <= 0:
+            break
+        contracts[best] += 1
+
+    out.loc[sized, 'Risk_Weight']    = np.round(weights, 3)
+    out.loc[sized, 'Contracts']      = contracts.astype(int)
+    out.loc[sized, 'Risk_USD']       = np.round(contracts * loss, 2)
+    out.loc[sized, 'Sizing_Cluster'] = groups
+    return out
+
+
+def print_sizing_report(sized: pd.DataFrame, open_positions: pd.DataFrame = None,
+                        budget: float = RISK_BUDGET_USD):
+    open_total = float(_open_risk(open_positions).sum())
+    new_total  = float(sized['Risk_USD'].sum())
+    print(f"\n{'='*60}")
+    print("POSITION SIZING")
+    print(f"{'='*60}")
+    print(f"Risk budget      : ${budget:,.0f} max loss "
+          f"(cluster cap {CLUSTER_RISK_CAP_PCT:.0%}, position cap {POSITION_RISK_CAP_PCT:.0%})")
+    print(f"Open positions   : ${open_total:,.0f}")
+    print(f"New spreads      : ${new_total:,.0f} across {int((sized['Contracts'] > 0).sum())} signal(s)")
+    print(f"Unallocated      : ${max(budget - open_total - new_total, 0.0):,.0f}")
+    print('='*60)
+    cols = ['Tier', 'Signal_Strength', 'Sizing_Cluster', 'MC_Credit', 'Max_Loss_USD',
+            'Risk_Weight', 'Contracts', 'Risk_USD']
+    print(sized[[c for c in cols if c in sized.columns]].to_string())
@@ -11,7 +11,8 @@ Gmail SMTP notifications: alerts fire even when sleeping in a different timezone
 Setup:
     1. Copy .env.example to .env and fill in your Gmail credentials
     2. Add position entries via add_position()
-    3. Schedule monitor_positions() via cron (runs daily at US market open)
+    3. Schedule monitor_positions() via cron (runs daily at US market open),
+       or run_adaptive_monitor() once per day for risk-prioritised intraday polling
 
 Usage:
     from position_tracker import add_position, monitor_positions
@@ -29,13 +30,22 @@ Usage:
 """
 
 import os
+import hashlib
+import heapq
 import smtplib
 import ssl
+import time
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import yfinance as yf
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, time as dt_time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from pandas.tseries.holiday import (
+    Holiday, GoodFriday, USMartinLutherKingJr, USPresidentsDay, USMemorialDay,
+    USLaborDay, USThanksgivingDay, nearest_workday, sunday_to_monday,
+)
 
 try:
     from dotenv import load_dotenv
@@ -52,6 +62,7 @@ from options_premium_screener import (
     T2_ROLLOVER_DTE,
     T2_EMERGENCY_CLOSE_DTE,
     DTE_MAX,
+    ATR_PERIOD,
 )
 
 # ============ CONFIG ============
@@ -198,6 +209,7 @@ def add_position(
 
     df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
     _save(df)
+    _index_new_position(position_id)
     print(f"[TRACKER] Position added: {position_id} | Credit: ${entry_credit}/share (${total_credit} total)")
     notify(
         subject=f"[NEW POSITION] {position_id}",
@@ -246,6 +258,8 @@ def update_position(
     if notes:
         df.at[idx, 'notes'] = notes
     _save(df)
+    if roll_to_position_id:
+        _index_roll(df, position_id, roll_to_position_id)
 
     pnl_label = f"+${pnl}" if pnl >= 0 else f"-${abs(pnl)}"
     print(f"[TRACKER] {position_id} → {status} | P&L: {pnl_label} | Reason: {close_reason}")
@@ -264,13 +278,87 @@ def update_position(
 
 
 # ============ ROLLOVER SUGGESTION ============
-def suggest_rollover(ticker: str, short_put_strike: float, entry_credit: float) -> dict:
+# Chain-scanning optimizer. Loads the put chain of every candidate expiry in
+# (DTE_MAX, DTE_MAX+30] once, pivots bid/ask into strike × expiry matrices and
+# prices every (new short strike, new expiry) roll in one vectorized pass.
+#
+# Prices are natural (conservative) fills:
+#   close current spread : buy short put @ ask, sell long put @ bid
+#   open new spread      : sell new short @ bid, buy new long @ ask
+#   net roll credit      = new spread credit - close debit   (negative = debit)
+#
+# Priority 1 — net credit roll: lowest new short strike below the current one
+#              that still nets >= ROLL_MIN_NET_CREDIT (ties: larger credit, nearer expiry).
+# Priority 2 — same-strike debit roll: smallest net debit <= max rollover debit
+#              (ties: nearer expiry).
+# Chains are memoised for CHAIN_CACHE_SECONDS so repeated ROLLOVER alerts on
+# the same ticker inside one monitor run cost no extra requests.
+
+ROLL_MIN_NET_CREDIT = 0.01      # $/share
+CHAIN_CACHE_SECONDS = 300
+
+_chain_cache = {}   # (ticker, expiry_str) -> (fetched_at, puts DataFrame)
+
+
+def _get_put_chain(t, ticker: str, expiry: str) -> pd.DataFrame | None:
+    cached = _chain_cache.get((ticker, expiry))
+    if cached and (datetime.now() - cached[0]).total_seconds() < CHAIN_CACHE_SECONDS:
+        return cached[1]
+    try:
+        puts = t.option_chain(expiry).puts[['strike', 'bid', 'ask']].copy()
+    except Exception:
+        return None
+    for col in ['strike', 'bid', 'ask']:
+        puts[col] = pd.to_numeric(puts[col], errors='coerce')
+    # Same guard as _safe_mid: no zero/inverted/NaN quotes
+    puts = puts[(puts['bid'] >= 0) & (puts['ask'] > 0) & (puts['ask'] >= puts['bid'])].dropna()
+    _chain_cache[(ticker, expiry)] = (datetime.now(), puts)
+    return puts
+
+
+def _quote(puts: pd.DataFrame | None, strike: float) -> tuple[float, float] | None:
+    if puts is None:
+        return None
+    row = puts[np.isclose(puts['strike'], strike)]
+    if row.empty:
+        return None
+    return float(row['bid'].iloc[0]), float(row['ask'].iloc[0])
+
+
+def suggest_rollover(
+    ticker: str,
+    short_put_strike: float,
+    entry_credit: float,
+    current_expiry: str = None,
+    long_put_strike: float = None,
+) -> dict:
+    """
+    Find the best net-credit roll and best allowed same-strike debit roll.
+
+    current_expiry is needed to price closing the existing spread; without it
+    (or without quotes for the current legs) close debit is unknown and only
+    the new-spread credits are reported — credit_roll / debit_roll stay None.
+
+    Returns the original suggestion keys plus:
+        close_debit  : float or None  ($/share to close the current spread)
+        credit_roll  : dict or None   {expiry, dte, short_put, long_put,
+                                       short_bid, long_ask, new_credit, net, net_mid}
+        debit_roll   : dict or None   (same keys, net < 0)
+    """
+    if long_put_strike is None:
+        long_put_strike = short_put_strike - SPREAD_WIDTH
+    width         = short_put_strike - long_put_strike
     max_debit     = round(entry_credit * MAX_ROLLOVER_DEBIT_PCT, 2)
     max_debit_usd = round(max_debit * 100, 2)
     today         = date.today()
     roll_start    = today + timedelta(days=DTE_MAX + 1)
     roll_end      = today + timedelta(days=DTE_MAX + 30)
 
+    close_debit = None
+    close_mid   = None
+    credit_roll = None
+    debit_roll  = None
+
     try:
         t            = yf.Ticker(ticker)
         raw_expiries = t.options
@@ -280,26 +368,330 @@ def suggest_rollover(ticker: str, short_put_strike: float, entry_credit: float)
             if roll_start <= datetime.strptime(e, '%Y-%m-%d').date() <= roll_end
         ])
     except Exception:
+        t          = None
         candidates = []
 
-    target_expiry = candidates[0] if candidates else None
-    dte_new       = (target_expiry - today).days if target_expiry else None
+    # ---- 1. Cost to close the current spread ----
+    if t is not None and current_expiry:
+        cur_puts  = _get_put_chain(t, ticker, str(current_expiry))
+        short_q   = _quote(cur_puts, short_put_strike)
+        long_q    = _quote(cur_puts, long_put_strike)
+        if short_q and long_q:
+            close_debit = round(short_q[1] - long_q[0], 2)
+            close_mid   = (short_q[0] + short_q[1]) / 2.0 - (long_q[0] + long_q[1]) / 2.0
+
+    # ---- 2. Load candidate chains once, pivot to strike × expiry ----
+    frames = []
+    for exp in candidates:
+        puts = _get_put_chain(t, ticker, str(exp))
+        if puts is not None and not puts.empty:
+            frames.append(puts.assign(expiry=exp))
+
+    if frames and close_debit is not None:
+        chains = pd.concat(frames, ignore_index=True)
+        bid = chains.pivot_table(index='strike', columns='expiry', values='bid', aggfunc='first')
+        ask = chains.pivot_table(index='strike', columns='expiry', values='ask', aggfunc='first')
+        strikes = bid.index.to_numpy()
+        shorts  = strikes[strikes <= short_put_strike]
+
+        short_bid = bid.reindex(shorts).to_numpy()
+        long_ask  = ask.reindex(np.round(shorts - width, 4)).to_numpy()
+        short_mid = ((bid + ask) / 2.0).reindex(shorts).to_numpy()
+        long_mid  = ((bid + ask) / 2.0).reindex(np.round(shorts - width, 4)).to_numpy()
+
+        new_credit = short_bid - long_ask                    # (n_strikes, n_expiries), NaN = no quote
+        net        = new_credit - close_debit
+        net_mid    = (short_mid - long_mid) - close_mid
+        expiries   = list(bid.columns)
+
+        def _pick(i, j):
+            return {
+                'expiry':     str(expiries[j]),
+                'dte':        (expiries[j] - today).days,
+                'short_put':  float(shorts[i]),
+                'long_put':   float(shorts[i] - width),
+                'short_bid':  round(float(short_bid[i, j]), 2),
+                'long_ask':   round(float(long_ask[i, j]), 2),
+                'new_credit': round(float(new_credit[i, j]), 2),
+                'net':        round(float(net[i, j]), 2),
+                'net_mid':    round(float(net_mid[i, j]), 2),
+            }
+
+        # Priority 1: lowest strike below current short with net credit
+        lower   = shorts < short_put_strike - 1e-9
+        credit_ok = (net >= ROLL_MIN_NET_CREDIT) & lower[:, None]
+        if credit_ok.any():
+            ii, jj = np.nonzero(credit_ok)
+            order  = np.lexsort((jj, -net[ii, jj], shorts[ii]))   # strike asc, net desc, expiry asc
+            credit_roll = _pick(ii[order[0]], jj[order[0]])
+
+        # Priority 2: same strike, smallest debit within the cap
+        same = np.isclose(shorts, short_put_strike)
+        if same.any():
+            i      = int(np.nonzero(same)[0][0])
+            row    = net[i]
+            debit_ok = (row > -max_debit - 1e-9) & ~np.isnan(row)
+            if debit_ok.any():
+                jj = np.nonzero(debit_ok)[0]
+                j  = jj[np.lexsort((jj, -row[jj]))[0]]
+                debit_roll = _pick(i, j)
+
+    best          = credit_roll or debit_roll
+    target_expiry = best['expiry'] if best else (str(candidates[0]) if candidates else None)
+    dte_new       = best['dte'] if best else ((candidates[0] - today).days if candidates else None)
 
     return {
         'ticker':                 ticker,
         'current_short_put':      short_put_strike,
-        'current_long_put':       short_put_strike - SPREAD_WIDTH,
-        'suggested_expiry':       str(target_expiry) if target_expiry else 'N/A',
+        'current_long_put':       long_put_strike,
+        'close_debit':            close_debit,
+        'suggested_expiry':       target_expiry or 'N/A',
         'suggested_dte':          dte_new,
-        'priority_1':             f'Net credit roll: lower strike + {target_expiry} expiry',
-        'priority_2':             f'Same strike {short_put_strike} + {target_expiry}: max debit ${max_debit}/share (${max_debit_usd}/contract)',
+        'credit_roll':            credit_roll,
+        'debit_roll':             debit_roll,
+        'priority_1':             (
+            f"Net credit roll: {credit_roll['short_put']}/{credit_roll['long_put']} {credit_roll['expiry']} "
+            f"@ +${credit_roll['net']}/share net (mid +${credit_roll['net_mid']})"
+            if credit_roll else 'Net credit roll: none available at a lower strike'
+        ),
+        'priority_2':             (
+            f"Same strike {short_put_strike} {debit_roll['expiry']} "
+            f"@ ${abs(debit_roll['net'])}/share net {'credit' if debit_roll['net'] >= 0 else 'debit'} "
+            f"(max debit ${max_debit}/share = ${max_debit_usd}/contract)"
+            if debit_roll else
+            f'Same strike {short_put_strike}: no roll within max debit ${max_debit}/share (${max_debit_usd}/contract)'
+        ),
         'max_rollover_debit':     max_debit,
         'max_rollover_debit_usd': max_debit_usd,
         'fallback':               'EMERGENCY_CLOSE if neither viable',
     }
 
 
+# ============ ALERT STATE / SUPPRESSION ============
+# Persisted memory of what has already been sent, so a position sitting in the
+# same state (e.g. ROUTINE_REVIEW for 4 days, or polled every 5 min by the
+# adaptive scheduler) does not re-send the same email on every check.
+#
+# Keyed by (position_id, alert_type, state_hash). state_hash covers the fields
+# that make an alert materially different (action, price zone vs. strikes).
+# An alert is re-sent only when:
+#   - its state hash has never been sent for the position (state changed), or
+#   - its severity is higher than the last alert of that type for the position
+#     (escalation always goes out immediately), or
+#   - ALERT_REMIND_HOURS[alert_type] has passed since the unchanged state was
+#     last sent (None = never remind; the state has to change).
+# Reminder windows are deliberately not multiples of a day: a window equal to
+# the daily cron period would expire on every run (or flip with run-time
+# jitter) and re-send the unchanged alert daily.
+# Rows for positions no longer OPEN are pruned on save.
+
+ALERT_STATE_FILE = 'alert_state.csv'
+ALERT_STATE_COLUMNS = ['position_id', 'alert_type', 'state_hash', 'severity', 'last_sent', 'send_count']
+
+ALERT_REMIND_HOURS = {
+    'PROFIT_TARGET':   None,
+    'ROUTINE_REVIEW':  84,     # 3.5 days
+    'ROLLOVER':        84,
+    'EMERGENCY_CLOSE': 1,      # near max loss: keep nagging (hourly intraday, every daily run)
+}
+_DEFAULT_REMIND_HOURS = None
+
+# Price zone vs. strikes — part of every state hash, doubles as severity
+ZONE_SEVERITY = {'OTM': 0, 'SHORT_ITM': 1, 'DEEP_ITM': 2}
+
+
+def _price_zone(current_price: float, short_put_strike: float, long_put_strike: float) -> str:
+    if current_price <= long_put_strike:
+        return 'DEEP_ITM'
+    if current_price < short_put_strike:
+        return 'SHORT_ITM'
+    return 'OTM'
+
+
+def _state_hash(state: dict) -> str:
+    payload = '|'.join(f'{k}={state[k]}' for k in sorted(state))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def _load_alert_state() -> dict:
+    """Return {(position_id, alert_type, state_hash): {'severity', 'last_sent', 'send_count'}}."""
+    state = {}
+    if not os.path.exists(ALERT_STATE_FILE):
+        return state
+    try:
+        df = pd.read_csv(ALERT_STATE_FILE, dtype=str)
+        for r in df.itertuples(index=False):
+            state[(r.position_id, r.alert_type, r.state_hash)] = {
+                'severity':   int(r.severity),
+                'last_sent':  datetime.fromisoformat(r.last_sent),
+                'send_count': int(r.send_count),
+            }
+    except Exception as e:
+        print(f"[ALERT-STATE] Could not read {ALERT_STATE_FILE} ({e}) — starting empty.")
+    return state
+
+
+def _save_alert_state(alert_state: dict, open_ids=None):
+    rows = [
+        {
+            'position_id': pid, 'alert_type': alert_type, 'state_hash': h,
+            'severity':    v['severity'],
+            'last_sent':   v['last_sent'].isoformat(timespec='seconds'),
+            'send_count':  v['send_count'],
+        }
+        for (pid, alert_type, h), v in alert_state.items()
+        if open_ids is None or pid in open_ids
+    ]
+    pd.DataFrame(rows, columns=ALERT_STATE_COLUMNS).to_csv(ALERT_STATE_FILE, index=False)
+
+
+def _should_alert(alert_state: dict, position_id: str, alert_type: str,
+                  state_hash: str, severity: int, now: datetime) -> bool:
+    if alert_state is None:
+        return True
+
+    last_severity = max(
+        (v['severity'] for (pid, t, _), v in alert_state.items()
+         if pid == position_id and t == alert_type),
+        default=None,
+    )
+    if last_severity is not None and severity > last_severity:
+        return True
+
+    prev = alert_state.get((position_id, alert_type, state_hash))
+    if prev is None:
+        return True
+    remind_hours = ALERT_REMIND_HOURS.get(alert_type, _DEFAULT_REMIND_HOURS)
+    if remind_hours is None:
+        return False
+    return now - prev['last_sent'] >= timedelta(hours=remind_hours)
+
+
+def _alert(alert_state: dict, position_id: str, alert_type: str, state: dict,
+           subject: str, body_fn) -> bool:
+    """
+    Send an alert unless suppressed. body_fn is called only when the alert
+    actually goes out, so expensive bodies (e.g. rollover chain scans) are
+    skipped for suppressed repeats. Returns True if sent.
+    """
+    now        = datetime.now()
+    severity   = ZONE_SEVERITY.get(state.get('zone'), 0)
+    state_hash = _state_hash({'alert_type': alert_type, **state})
+
+    if not _should_alert(alert_state, position_id, alert_type, state_hash, severity, now):
+        print(f"[ALERT-STATE] {position_id}: {alert_type} suppressed (state {state_hash} already sent).")
+        return False
+
+    notify(subject=subject, body=body_fn())
+    if alert_state is not None:
+        prev = alert_state.get((position_id, alert_type, state_hash))
+        alert_state[(position_id, alert_type, state_hash)] = {
+            'severity':   severity,
+            'last_sent':  now,
+            'send_count': (prev['send_count'] if prev else 0) + 1,
+        }
+        _save_alert_state(alert_state)
+    return True
+
+
 # ============ DAILY MONITOR ============
+def _check_position(row, current_price: float, alert_state: dict = None) -> int:
+    """
+    Run all alert checks for one ledger row at the given price.
+    Shared by the daily monitor and the adaptive scheduler. Returns DTE.
+    alert_state=None disables suppression (every triggered alert is sent).
+    """
+    ticker           = row['ticker']
+    tier             = row['tier']
+    short_put_strike = float(row['short_put_strike'])
+    long_put_strike  = float(row['long_put_strike'])
+    expiry_date      = datetime.strptime(row['expiry_date'], '%Y-%m-%d').date()
+    entry_credit     = float(row['entry_credit'])
+    contracts        = int(row['contracts'])
+    position_id      = row['position_id']
+    dte              = (expiry_date - date.today()).days
+    zone             = _price_zone(current_price, short_put_strike, long_put_strike)
+
+    print(f"[MONITOR] {position_id}: price=${current_price:.2f} | DTE={dte} | short={short_put_strike} | long={long_put_strike}")
+
+    # ---- 1. Profit target hint (all tiers) ----
+    if current_price > short_put_strike * 1.05 and dte <= 14:
+        _alert(
+            alert_state, position_id, 'PROFIT_TARGET', {'zone': zone},
+            subject=f"[{position_id}] 💰 PROFIT TARGET CHECK",
+            body_fn=lambda: (
+                f"Price ${current_price:.2f} is >5% above short put ${short_put_strike}\n"
+                f"DTE: {dte} | Entry credit: ${entry_credit}/share\n\n"
+                f"Check Tastytrade: if current debit <= "
+                f"${round(entry_credit*(1-EARLY_CLOSE_PROFIT_PCT),2)}/share, "
+                f"close now for 80% profit target."
+            )
+        )
+
+    # ---- 2. Tier 2 emergency checks ----
+    if tier == 'TIER2_WATCH':
+        eval_result = evaluate_tier2_position(
+            ticker, current_price, short_put_strike, expiry_date, entry_credit
+        )
+        action = eval_result['action']
+
+        if action == 'EMERGENCY_CLOSE':
+            _alert(
+                alert_state, position_id, 'EMERGENCY_CLOSE', {'zone': zone, 'action': action},
+                subject=f"🚨 [{position_id}] EMERGENCY CLOSE — DEEP ITM",
+                body_fn=lambda: (
+                    f"DEEP ITM: price ${current_price:.2f} <= long put ${long_put_strike}\n"
+                    f"DTE: {dte} — near maximum loss zone.\n\n"
+                    f"ACTION: BTC (Buy to Close) on Tastytrade immediately.\n"
+                    f"Entry credit: ${entry_credit}/share\n"
+                    f"Max loss if expired: "
+                    f"${round((SPREAD_WIDTH - entry_credit) * contracts * 100, 2)}"
+                )
+            )
+
+        elif action == 'ROLLOVER':
+            def _rollover_body():
+                roll = suggest_rollover(
+                    ticker, short_put_strike, entry_credit,
+                    current_expiry=row['expiry_date'], long_put_strike=long_put_strike,
+                )
+                close_line = (
+                    f"Close current spread: ${roll['close_debit']}/share debit (natural)\n"
+                    if roll['close_debit'] is not None else
+                    "Close current spread: quotes unavailable — price legs manually\n"
+                )
+                return (
+                    f"SHORT PUT ITM: price ${current_price:.2f} < short put ${short_put_strike}\n"
+                    f"DTE: {dte}\n"
+                    f"{close_line}\n"
+                    f"ROLLOVER PRIORITY:\n"
+                    f"  1번: {roll['priority_1']}\n"
+                    f"  2번: {roll['priority_2']}\n"
+                    f"  Fallback: BTC immediately if neither viable"
+                )
+
+            _alert(
+                alert_state, position_id, 'ROLLOVER', {'zone': zone, 'action': action},
+                subject=f"⚠️ [{position_id}] ROLLOVER TRIGGERED — Short Put ITM",
+                body_fn=_rollover_body,
+            )
+
+    # ---- 3. Routine review (all tiers) ----
+    if dte <= BASE_DTE_ACTION:
+        _alert(
+            alert_state, position_id, 'ROUTINE_REVIEW', {'zone': zone, 'expiry_day': dte <= 0},
+            subject=f"📋 [{position_id}] ROUTINE REVIEW — DTE {dte}",
+            body_fn=lambda: (
+                f"DTE {dte} — review close or rollover on Tastytrade.\n\n"
+                f"Price: ${current_price:.2f} | Short put: ${short_put_strike} | Long put: ${long_put_strike}\n"
+                f"Entry credit: ${entry_credit}/share\n"
+                f"If OTM and theta decayed ≥ 80%, close for profit."
+            )
+        )
+
+    return dte
+
+
 def monitor_positions():
     """
     Daily position monitor. Schedule via cron at US market open.
@@ -308,6 +700,9 @@ def monitor_positions():
     Cron example (server in US/Central):
         30 8 * * 1-5 /usr/bin/python3 /path/to/position_tracker.py
     """
+    if not _is_trading_day(date.today()):
+        print(f"[MONITOR] {date.today()} is not a trading day (weekend / NYSE holiday) — skipping.")
+        return
     df = _load()
     open_positions = df[df['status'] == 'OPEN']
 
@@ -317,87 +712,371 @@ def monitor_positions():
 
     print(f"\n[MONITOR] {len(open_positions)} open position(s) — {datetime.now().strftime('%Y-%m-%d %H:%M CT')}")
 
+    alert_state = _load_alert_state()
     for _, row in open_positions.iterrows():
-        ticker           = row['ticker']
-        tier             = row['tier']
-        short_put_strike = float(row['short_put_strike'])
-        long_put_strike  = float(row['long_put_strike'])
-        expiry_date      = datetime.strptime(row['expiry_date'], '%Y-%m-%d').date()
-        entry_credit     = float(row['entry_credit'])
-        contracts        = int(row['contracts'])
-        position_id      = row['position_id']
-        dte              = (expiry_date - date.today()).days
-
-        current_price = _get_current_price(ticker)
+        position_id   = row['position_id']
+        current_price = _get_current_price(row['ticker'])
         if current_price is None:
             print(f"[MONITOR] {position_id}: price fetch failed. Skipping.")
             continue
+        _check_position(row, current_price, alert_state)
 
-        print(f"[MONITOR] {position_id}: price=${current_price:.2f} | DTE={dte} | short={short_put_strike} | long={long_put_strike}")
-
-        # ---- 1. Profit target hint (all tiers) ----
-        if current_price > short_put_strike * 1.05 and dte <= 14:
-            notify(
-                subject=f"[{position_id}] 💰 PROFIT TARGET CHECK",
-                body=(
-                    f"Price ${current_price:.2f} is >5% above short put ${short_put_strike}\n"
-                    f"DTE: {dte} | Entry credit: ${entry_credit}/share\n\n"
-                    f"Check Tastytrade: if current debit <= "
-                    f"${round(entry_credit*(1-EARLY_CLOSE_PROFIT_PCT),2)}/share, "
-                    f"close now for 80% profit target."
-                )
-            )
+    _save_alert_state(alert_state, open_ids=set(open_positions['position_id']))
+    print("[MONITOR] Done.")
 
-        # ---- 2. Tier 2 emergency checks ----
-        if tier == 'TIER2_WATCH':
-            eval_result = evaluate_tier2_position(
-                ticker, current_price, short_put_strike, expiry_date, entry_credit
-            )
-            action = eval_result['action']
-
-            if action == 'EMERGENCY_CLOSE':
-                notify(
-                    subject=f"🚨 [{position_id}] EMERGENCY CLOSE — DEEP ITM",
-                    body=(
-                        f"DEEP ITM: price ${current_price:.2f} <= long put ${long_put_strike}\n"
-                        f"DTE: {dte} — near maximum loss zone.\n\n"
-                        f"ACTION: BTC (Buy to Close) on Tastytrade immediately.\n"
-                        f"Entry credit: ${entry_credit}/share\n"
-                        f"Max loss if expired: "
-                        f"${round((SPREAD_WIDTH - entry_credit) * contracts * 100, 2)}"
-                    )
-                )
 
-            elif action == 'ROLLOVER':
-                roll = suggest_rollover(ticker, short_put_strike, entry_credit)
-                notify(
-                    subject=f"⚠️ [{position_id}] ROLLOVER TRIGGERED — Short Put ITM",
-                    body=(
-                        f"SHORT PUT ITM: price ${current_price:.2f} < short put ${short_put_strike}\n"
-                        f"DTE: {dte}\n\n"
-                        f"ROLLOVER PRIORITY:\n"
-                        f"  1번: Net credit roll → lower strike + {roll['suggested_expiry']} "
-                        f"(DTE {roll['suggested_dte']}) — receive credit\n"
-                        f"  2번: Same strike ({short_put_strike}) + {roll['suggested_expiry']} — "
-                        f"max debit ${roll['max_rollover_debit']}/share "
-                        f"(${roll['max_rollover_debit_usd']}/contract)\n"
-                        f"  Fallback: BTC immediately if neither viable"
-                    )
-                )
+# ============ ADAPTIVE SCHEDULER ============
+# Intraday alternative to the single daily cron tick. Every open position sits
+# in a priority queue keyed by its next due time; each poll re-scores the
+# position and reschedules it. Risky positions (short put near/through the
+# strike, low DTE, Tier 2) are polled every few minutes, safe ones a couple
+# of times a day. Positions sharing a ticker share one quote per poll.
+#
+# Risk score (0 = safe, 1 = at/through the long put):
+#   strike proximity : (price - short_put) / ATR, scaled over RISK_ATR_SPAN ATRs
+#   time             : DTE scaled over RISK_DTE_SPAN days
+#   tier             : Tier 2 weighted 1.0, Tier 1 RISK_TIER1_WEIGHT
 
-        # ---- 3. Routine review (all tiers) ----
-        if dte <= BASE_DTE_ACTION:
-            notify(
-                subject=f"📋 [{position_id}] ROUTINE REVIEW — DTE {dte}",
-                body=(
-                    f"DTE {dte} — review close or rollover on Tastytrade.\n\n"
-                    f"Price: ${current_price:.2f} | Short put: ${short_put_strike} | Long put: ${long_put_strike}\n"
-                    f"Entry credit: ${entry_credit}/share\n"
-                    f"If OTM and theta decayed ≥ 80%, close for profit."
-                )
+MARKET_OPEN_CT  = dt_time(8, 30)
+MARKET_CLOSE_CT = dt_time(15, 0)
+
+# NYSE full-day closures (rule-based, so the list never needs a yearly update).
+# Early closes (1 PM ET) are treated as full sessions.
+NYSE_HOLIDAY_RULES = [
+    Holiday('NewYearsDay', month=1, day=1, observance=sunday_to_monday),
+    USMartinLutherKingJr,
+    USPresidentsDay,
+    GoodFriday,
+    USMemorialDay,
+    Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+    Holiday('IndependenceDay', month=7, day=4, observance=nearest_workday),
+    USLaborDay,
+    USThanksgivingDay,
+    Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+]
+
+RISK_ATR_SPAN     = 3.0   # price this many ATRs above the short put = no proximity risk
+RISK_DTE_SPAN     = 30    # DTE at or beyond this = no time risk
+RISK_TIER1_WEIGHT = 0.8
+
+# (min risk score, poll interval in minutes) — first match wins
+RISK_POLL_MINUTES = [
+    (0.75, 5),
+    (0.50, 15),
+    (0.25, 60),
+    (0.00, 240),
+]
+
+_SCHEDULER_IDLE_SECONDS = 60
+
+
+def _get_atr(ticker: str) -> float | None:
+    try:
+        data = yf.download(ticker, period='3mo', interval='1d', progress=False, group_by=False)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.droplevel(0)
+        data.columns = [c.capitalize() for c in data.columns]
+        prev_close = data['Close'].shift(1)
+        tr = pd.concat([
+            data['High'] - data['Low'],
+            (data['High'] - prev_close).abs(),
+            (data['Low'] - prev_close).abs(),
+        ], axis=1).max(axis=1)
+        atr = float(tr.ewm(alpha=1.0 / ATR_PERIOD, adjust=False).mean().iloc[-1])
+        return atr if atr > 0 else None
+    except Exception:
+        return None
+
+
+def risk_score(
+    current_price: float,
+    short_put_strike: float,
+    long_put_strike: float,
+    atr: float | None,
+    dte: int,
+    tier: str,
+) -> float:
+    """
+    Score a position's monitoring urgency in [0, 1].
+    ATR unavailable falls back to 2% of price so a failed fetch never
+    silently demotes a position to the slowest poll bucket.
+    """
+    if current_price <= long_put_strike or dte <= 0:
+        return 1.0
+    if not atr or atr <= 0:
+        atr = current_price * 0.02
+
+    atr_distance = (current_price - short_put_strike) / atr
+    proximity    = min(1.0, max(0.0, 1.0 - atr_distance / RISK_ATR_SPAN))
+    time_risk    = min(1.0, max(0.0, 1.0 - dte / RISK_DTE_SPAN))
+    tier_weight  = 1.0 if tier == 'TIER2_WATCH' else RISK_TIER1_WEIGHT
+
+    return round(tier_weight * (0.65 * proximity + 0.35 * time_risk), 3)
+
+
+def poll_interval(score: float) -> timedelta:
+    for min_score, minutes in RISK_POLL_MINUTES:
+        if score >= min_score:
+            return timedelta(minutes=minutes)
+    return timedelta(minutes=RISK_POLL_MINUTES[-1][1])
+
+
+@lru_cache(maxsize=None)
+def _market_holidays(year: int) -> frozenset:
+    return frozenset(
+        d.date() for rule in NYSE_HOLIDAY_RULES
+        for d in rule.dates(f'{year}-01-01', f'{year}-12-31')
+    )
+
+
+def _is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in _market_holidays(day.year)
+
+
+def _is_market_open(now: datetime) -> bool:
+    return _is_trading_day(now.date()) and MARKET_OPEN_CT <= now.time() < MARKET_CLOSE_CT
+
+
+def _next_market_open(now: datetime) -> datetime:
+    candidate = datetime.combine(now.date(), MARKET_OPEN_CT)
+    if now >= candidate:
+        candidate += timedelta(days=1)
+    while not _is_trading_day(candidate.date()):
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def run_adaptive_monitor(max_polls: int = None, clock=datetime.now, sleep=time.sleep):
+    """
+    Intraday monitor driven by a risk-keyed priority queue.
+    Run once per trading day (e.g. cron at 8:25 AM CT); exits at market close.
+
+    Queue entries are (next_due, -risk, position_id). The ledger is re-read
+    whenever positions.csv changes, so positions added or closed during the
+    session join or leave the queue without a restart. ATR is fetched once
+    per ticker per session.
+
+    max_polls : stop after this many position polls (None = until close)
+    clock / sleep : injectable for dry runs
+    """
+    now = clock()
+    if not _is_market_open(now):
+        print(f"[SCHEDULER] Market closed — next open {_next_market_open(now).strftime('%Y-%m-%d %H:%M CT')}.")
+        return
+
+    queue         = []
+    rows          = {}
+    atr_cache     = {}
+    alert_state   = _load_alert_state()
+    ledger_mtime  = None
+    polls         = 0
+    quotes        = 0
+
+    while True:
+        now = clock()
+        if not _is_market_open(now):
+            break
+
+        # ---- Sync queue with ledger ----
+        mtime = os.path.getmtime(POSITIONS_FILE) if os.path.exists(POSITIONS_FILE) else None
+        if mtime != ledger_mtime:
+            ledger_mtime = mtime
+            df   = _load()
+            open_rows = {r['position_id']: r for _, r in df[df['status'] == 'OPEN'].iterrows()}
+            for pid in open_rows.keys() - rows.keys():
+                heapq.heappush(queue, (now, 0.0, pid))   # new positions polled immediately
+            rows = open_rows
+            print(f"[SCHEDULER] Ledger loaded — {len(rows)} open position(s).")
+
+        # Drop entries for positions closed since they were queued
+        while queue and queue[0][2] not in rows:
+            heapq.heappop(queue)
+        if not queue:
+            print("[SCHEDULER] No open positions.")
+            break
+
+        if queue[0][0] > now:
+            wait = (queue[0][0] - now).total_seconds()
+            sleep(min(wait, _SCHEDULER_IDLE_SECONDS))
+            continue
+
+        # ---- Pop every due position; one quote per ticker ----
+        due = []
+        while queue and queue[0][0] <= now:
+            _, _, pid = heapq.heappop(queue)
+            if pid in rows:
+                due.append(pid)
+
+        prices = {}
+        for ticker in {rows[pid]['ticker'] for pid in due}:
+            prices[ticker] = _get_current_price(ticker)
+            quotes += 1
+            if ticker not in atr_cache:
+                atr_cache[ticker] = _get_atr(ticker)
+
+        for pid in due:
+            row           = rows[pid]
+            current_price = prices.get(row['ticker'])
+            if current_price is None:
+                print(f"[SCHEDULER] {pid}: price fetch failed. Retrying in {RISK_POLL_MINUTES[0][1]}m.")
+                heapq.heappush(queue, (now + timedelta(minutes=RISK_POLL_MINUTES[0][1]), -1.0, pid))
+                continue
+
+            dte   = _check_position(row, current_price, alert_state)
+            score = risk_score(
+                current_price,
+                float(row['short_put_strike']),
+                float(row['long_put_strike']),
+                atr_cache.get(row['ticker']),
+                dte,
+                row['tier'],
             )
+            next_due = now + poll_interval(score)
+            heapq.heappush(queue, (next_due, -score, pid))
+            print(f"[SCHEDULER] {pid}: risk={score:.2f} → next poll {next_due.strftime('%H:%M')}")
+
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                print(f"[SCHEDULER] Poll limit reached — {polls} poll(s), {quotes} quote request(s).")
+                _save_alert_state(alert_state, open_ids=set(rows))
+                return
+
+    _save_alert_state(alert_state, open_ids=set(rows))
+    print(f"[SCHEDULER] Session ended — {polls} poll(s), {quotes} quote request(s).")
+
+
+# ============ ROLLOVER CAMPAIGNS ============
+# A campaign is one original entry plus every roll that followed it, linked
+# through roll_to_position_id (entry → roll → roll → final close).
+# campaigns.csv persists position_id → campaign_id (the root position_id) so
+# summaries are a single groupby instead of a chain walk. The index is built
+# in one linear pass when missing or stale, and updated incrementally by
+# add_position() / update_position() afterwards.
+
+CAMPAIGN_INDEX_FILE = 'campaigns.csv'
+
+
+def build_campaign_index(df: pd.DataFrame) -> dict:
+    """
+    Rebuild {position_id: campaign_id} from roll links in O(n).
+    Each position has at most one successor and one predecessor, so every
+    chain is walked exactly once starting from its root. Positions caught in
+    a malformed link (cycle, dangling target) fall back to their own campaign.
+    """
+    nxt = {
+        pid: to for pid, to in zip(df['position_id'], df['roll_to_position_id'])
+        if isinstance(to, str) and to
+    }
+    targets = set(nxt.values())
+    index = {}
+    for pid in df['position_id']:
+        if pid in targets:
+            continue
+        cur = pid
+        while cur and cur not in index:
+            index[cur] = pid
+            cur = nxt.get(cur)
+    for pid in df['position_id']:
+        index.setdefault(pid, pid)
+    return index
 
-    print("[MONITOR] Done.")
+
+def _save_campaign_index(index: dict):
+    pd.DataFrame(
+        list(index.items()), columns=['position_id', 'campaign_id']
+    ).to_csv(CAMPAIGN_INDEX_FILE, index=False)
+
+
+def _load_campaign_index(df: pd.DataFrame) -> dict:
+    index = {}
+    if os.path.exists(CAMPAIGN_INDEX_FILE):
+        try:
+            idx_df = pd.read_csv(CAMPAIGN_INDEX_FILE, dtype=str)
+            index  = dict(zip(idx_df['position_id'], idx_df['campaign_id']))
+        except Exception as e:
+            print(f"[CAMPAIGN] Could not read {CAMPAIGN_INDEX_FILE} ({e}) — rebuilding.")
+            index = {}
+    if not set(df['position_id']) <= index.keys():
+        index = build_campaign_index(df)
+        _save_campaign_index(index)
+    return index
+
+
+def _index_new_position(position_id: str):
+    if not os.path.exists(CAMPAIGN_INDEX_FILE):
+        return   # built lazily on first summary
+    index = dict(pd.read_csv(CAMPAIGN_INDEX_FILE, dtype=str).itertuples(index=False, name=None))
+    index.setdefault(position_id, position_id)
+    _save_campaign_index(index)
+
+
+def _index_roll(df: pd.DataFrame, from_id: str, to_id: str):
+    """Attach to_id (and any chain already hanging off it) to from_id's campaign."""
+    index    = _load_campaign_index(df)
+    campaign = index.get(from_id, from_id)
+    nxt      = dict(zip(df['position_id'], df['roll_to_position_id']))
+    cur      = to_id
+    while cur and index.get(cur) != campaign:
+        index[cur] = campaign
+        cur = nxt.get(cur) if isinstance(nxt.get(cur), str) else None
+    _save_campaign_index(index)
+
+
+def campaign_summary(df: pd.DataFrame = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns (campaigns, by_ticker_tier).
+
+    campaigns      : one row per campaign — ticker, tier, legs, rolls, status,
+                     entry_date, end_date, days_in_trade, pnl_usd
+    by_ticker_tier : campaigns, rolls, total / avg P&L, avg days, win rate
+                     over closed campaigns, grouped by ticker and tier
+    """
+    if df is None:
+        df = _load()
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    index = _load_campaign_index(df)
+    work  = df.assign(
+        campaign_id = df['position_id'].map(index),
+        pnl         = pd.to_numeric(df['pnl_usd'], errors='coerce').fillna(0.0),
+        entry       = pd.to_datetime(df['entry_date'], errors='coerce'),
+        close       = pd.to_datetime(df['close_date'], errors='coerce'),
+        is_open     = df['status'] == 'OPEN',
+        is_roll     = df['status'] == 'ROLLED',
+    )
+    roots = work[work['position_id'] == work['campaign_id']].set_index('campaign_id')
+
+    campaigns = work.groupby('campaign_id').agg(
+        legs       = ('position_id', 'size'),
+        rolls      = ('is_roll', 'sum'),
+        open_legs  = ('is_open', 'sum'),
+        entry_date = ('entry', 'min'),
+        end_date   = ('close', 'max'),
+        pnl_usd    = ('pnl', 'sum'),
+    )
+    campaigns['ticker'] = roots['ticker'].reindex(campaigns.index)
+    campaigns['tier']   = roots['tier'].reindex(campaigns.index)
+    campaigns['status'] = campaigns['open_legs'].gt(0).map({True: 'OPEN', False: 'CLOSED'})
+    today = pd.Timestamp(date.today())
+    end   = campaigns['end_date'].where(campaigns['status'] == 'CLOSED', today)
+    campaigns['days_in_trade'] = (end - campaigns['entry_date']).dt.days
+    campaigns = campaigns.drop(columns='open_legs').round({'pnl_usd': 2})
+
+    closed = campaigns[campaigns['status'] == 'CLOSED']
+    by_ticker_tier = campaigns.groupby(['ticker', 'tier']).agg(
+        campaigns = ('legs', 'size'),
+        rolls     = ('rolls', 'sum'),
+        total_pnl = ('pnl_usd', 'sum'),
+        avg_pnl   = ('pnl_usd', 'mean'),
+        avg_days  = ('days_in_trade', 'mean'),
+    )
+    by_ticker_tier['win_rate'] = (
+        closed.assign(win=closed['pnl_usd'] > 0)
+        .groupby(['ticker', 'tier'])['win'].mean()
+        .reindex(by_ticker_tier.index)
+    )
+    return campaigns, by_ticker_tier.round(2)
 
 
 # ============ SUMMARY ============
@@ -424,6 +1103,14 @@ def print_summary():
         print("\nCLOSED/ROLLED:")
         print(closed_pos[['position_id','tier','close_reason','pnl_usd']].to_string(index=False))
 
+    campaigns, by_ticker_tier = campaign_summary(df)
+    if not campaigns.empty and campaigns['rolls'].gt(0).any():
+        print("\nROLLOVER CAMPAIGNS (entry → rolls → close):")
+        print(campaigns[['ticker','tier','legs','rolls','status','days_in_trade','pnl_usd']].to_string())
+    if not by_ticker_tier.empty:
+        print("\nCAMPAIGN P&L BY TICKER / TIER:")
+        print(by_ticker_tier.to_string())
+
 
 if __name__ == '__main__':
     monitor_positions()
@@ -0,0 +1,218 @@
+"""
+price_store.py
+--------------
+Local daily OHLCV cache shared by the offline analytics (stress test,
+backtests, correlation guard). One CSV per ticker under PRICE_CACHE_DIR.
+
+A cached ticker is served straight from disk while the file is younger than
+PRICE_CACHE_TTL_HOURS. After that only the missing tail is downloaded (from a
+few bars before the last cached bar, to absorb late revisions) and merged in.
+A full download happens only when the cache is missing or does not reach back
+far enough for the requested period. The period of each full download is kept
+next to the CSV (<ticker>.period); a ticker with less history than that (a
+recent IPO) is then known to start at its first available bar and counts as
+covered for any period up to it, instead of being re-downloaded on every call.
+
+prefetch() refreshes a large universe in batched multi-ticker downloads
+(PREFETCH_BATCH symbols per request) instead of one request per ticker.
+
+Usage:
+    from price_store import get_history, get_close_panel, prefetch
+
+    spx   = get_history('^GSPC', period='5y')
+    close = get_close_panel(['NVDA', 'COST'], period='1y')
+    ready = prefetch(universe, period='1y')   # tickers now served from disk
+"""
+
+import os
+import pandas as pd
+import yfinance as yf
+from datetime import datetime, timedelta
+
+# ============ CONFIG ============
+PRICE_CACHE_DIR       = 'price_cache'
+PRICE_CACHE_TTL_HOURS = 12
+_REFRESH_OVERLAP_DAYS = 5
+PREFETCH_BATCH        = 200
+_OHLCV_COLUMNS        = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_PERIOD_DAYS = {
+    '1mo': 31, '3mo': 92, '6mo': 183,
+    '1y': 366, '2y': 731, '5y': 1827, '10y': 3653,
+}
+
+
+def _cache_path(ticker: str) -> str:
+    safe = ticker.replace('^', '_').replace('/', '_')
+    return os.path.join(PRICE_CACHE_DIR, f'{safe}.csv')
+
+
+def _period_path(ticker: str) -> str:
+    return _cache_path(ticker)[:-len('.csv')] + '.period'
+
+
+def _period_days(period: str) -> float:
+    return float('inf') if period == 'max' else _PERIOD_DAYS.get(period, 366)
+
+
+def _downloaded_period(ticker: str) -> str | None:
+    try:
+        with open(_period_path(ticker)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _record_period(ticker: str, period: str, replace: bool = False) -> None:
+    """Remember the longest period the cached file was fully downloaded for (replace: the file was rewritten)."""
+    known = None if replace else _downloaded_period(ticker)
+    if known is None or _period_days(period) > _period_days(known):
+        with open(_period_path(ticker), 'w') as f:
+            f.write(period)
+
+
+def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+    if isinstance(data.columns, pd.MultiIndex):
+        level0 = {str(c).capitalize() for c in data.columns.get_level_values(0)}
+        data.columns = data.columns.get_level_values(0 if level0 & set(_OHLCV_COLUMNS) else 1)
+    data.columns = [str(c).capitalize() for c in data.columns]
+    data = data[[c for c in _OHLCV_COLUMNS if c in data.columns]].copy()
+    data.index = pd.to_datetime(data.index).tz_localize(None)
+    data.index.name = 'Date'
+    return data.dropna(subset=['Close'])
+
+
+def _download(ticker: str, **kwargs) -> pd.DataFrame:
+    data = yf.download(ticker, interval='1d', progress=False, auto_adjust=False, **kwargs)
+    if data is None or data.empty:
+        return pd.DataFrame(columns=_OHLCV_COLUMNS)
+    return _normalize(data)
+
+
+def _read_cache(ticker: str) -> pd.DataFrame | None:
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+    except Exception:
+        return None
+
+
+def _need_start(period: str):
+    return (
+        None if period == 'max'
+        else pd.Timestamp(datetime.today() - timedelta(days=_PERIOD_DAYS.get(period, 366)))
+    )
+
+
+def _covers(ticker: str, cached, period: str) -> bool:
+    """Cache reaches back to the start of `period`, or to the first bar a download of a period at least as long returned."""
+    if cached is None or cached.empty:
+        return False
+    need_start = _need_start(period)
+    if need_start is None or cached.index[0] <= need_start + timedelta(days=7):
+        return True
+    known = _downloaded_period(ticker)
+    return known is not None and _period_days(known) >= _period_days(period)
+
+
+def is_fresh(ticker: str, period: str = '1y') -> bool:
+    """True when get_history(ticker, period) would be served from disk without a download."""
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return False
+    if (datetime.now().timestamp() - os.path.getmtime(path)) / 3600.0 >= PRICE_CACHE_TTL_HOURS:
+        return False
+    try:
+        first = pd.read_csv(path, index_col='Date', parse_dates=['Date'], nrows=1)   # coverage needs the first bar only
+    except Exception:
+        return False
+    return _covers(ticker, first, period)
+
+
+def get_history(ticker: str, period: str = '1y') -> pd.DataFrame:
+    """
+    Daily OHLCV for ticker covering at least `period` ('1y', '5y', 'max', ...).
+    Returns an empty DataFrame if nothing could be loaded — never raises.
+    """
+    os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+    path   = _cache_path(ticker)
+    cached = _read_cache(ticker)
+    need_start = _need_start(period)
+
+    try:
+        if not _covers(ticker, cached, period):
+            data = _download(ticker, period=period)
+            if not data.empty:
+                data.to_csv(path)
+                _record_period(ticker, period, replace=True)
+        elif (datetime.now().timestamp() - os.path.getmtime(path)) / 3600.0 < PRICE_CACHE_TTL_HOURS:
+            data = cached
+        else:
+            start = (cached.index[-1] - timedelta(days=_REFRESH_OVERLAP_DAYS)).strftime('%Y-%m-%d')
+            tail  = _download(ticker, start=start)
+            if tail.empty:
+                data = cached
+                os.utime(path)   # checked, no new bars — restart the TTL
+            else:
+                data = pd.concat([cached[cached.index < tail.index[0]], tail])
+                data.to_csv(path)
+    except Exception as e:
+        print(f"[PRICE-STORE] {ticker}: refresh failed ({e}) — using cached data.")
+        data = cached if cached is not None else pd.DataFrame(columns=_OHLCV_COLUMNS)
+
+    if need_start is not None and not data.empty:
+        data = data[data.index >= need_start]
+    return data
+
+
+def get_close_panel(tickers, period: str = '1y', field: str = 'Close') -> pd.DataFrame:
+    """Wide dates × tickers frame of one OHLCV field. Tickers with no data are dropped."""
+    series = {}
+    for ticker in tickers:
+        hist = get_history(ticker, period)
+        if not hist.empty and field in hist.columns:
+            series[ticker] = hist[field]
+    if not series:
+        return pd.DataFrame()
+    return pd.DataFrame(series).sort_index()
+
+
+def prefetch(tickers, period: str = '1y', batch_size: int = PREFETCH_BATCH) -> list:
+    """
+    Refresh every ticker that is not is_fresh() with batched multi-ticker
+    downloads of `period`, merged over any older cached history. Returns the
+    tickers get_history() can now serve from disk; symbols with no data
+    (delisted, typos) are left out. Never raises.
+    """
+    os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+    tickers = list(dict.fromkeys(tickers))
+    stale   = [t for t in tickers if not is_fresh(t, period)]
+    for i in range(0, len(stale), batch_size):
+        batch = stale[i:i + batch_size]
+        try:
+            data = yf.download(batch, period=period, interval='1d', progress=False,
+                               auto_adjust=False, group_by='ticker', threads=True)
+        except Exception as e:
+            print(f"[PRICE-STORE] batch {i // batch_size + 1}: download failed ({e}).")
+            continue
+        if data is None or data.empty:
+            continue
+        multi = isinstance(data.columns, pd.MultiIndex)
+        for ticker in batch:
+            try:
+                if multi and ticker not in data.columns.get_level_values(0):
+                    continue
+                hist = _normalize(data[ticker].copy() if multi else data.copy())
+                if hist.empty:
+                    continue
+                cached = _read_cache(ticker)
+                if cached is not None and not cached.empty:
+                    hist = pd.concat([cached[cached.index < hist.index[0]], hist])
+                hist.to_csv(_cache_path(ticker))
+                _record_period(ticker, period)
+            except Exception as e:
+                print(f"[PRICE-STORE] {ticker}: batch refresh failed ({e}).")
+    stale = set(stale)
+    return [t for t in tickers if t not in stale or is_fresh(t, period)]
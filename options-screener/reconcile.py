@@ -0,0 +1,278 @@
+"""
+reconcile.py
+------------
+Ledger-to-broker reconciliation: matches every put spread in positions.csv
+against the option fills in Fidelity transaction exports.
+
+Fidelity symbols (e.g. -NVDA250328P94) are parsed by the options-analysis
+loader into (underlying, expiry, strike, put/call). Broker fills are folded
+into one row per account and contract with a single groupby, each ledger
+position is expanded into its short and long leg, and the two sides are
+hash-joined on (account, ticker, expiry, strike) — one linear pass however
+many fills there are. The ledger has no account column: a position belongs to
+the one account holding both of its legs, else the only account holding
+either. Fills are never summed across accounts.
+
+Every fill in the exports is used; the options-analysis DATE_START/DATE_END
+window does not apply here.
+
+Per position the broker side yields:
+    broker_credit   per-share credit from the opening fill prices
+                    (short sold − long bought, weighted by contracts)
+    broker_debit    per-share cost to close from the closing fill prices
+                    (expired / assigned legs count at $0)
+    broker_status   OPEN | CLOSED | EXPIRED | MISSING
+
+Flags (comma-joined in the `issues` column):
+    MISSING_AT_BROKER   no opening fill for either leg
+    MISSING_LEG         only one leg has an opening fill
+    QTY_MISMATCH        ledger contracts != contracts opened at the broker
+    CREDIT_MISMATCH     |entry_credit − broker_credit| > PRICE_TOLERANCE
+    DEBIT_MISMATCH      |close_debit − broker_debit| > PRICE_TOLERANCE
+    STATUS_MISMATCH     ledger OPEN but closed at broker, or the reverse
+    AMBIGUOUS           several ledger positions share the same contracts
+    MULTI_ACCOUNT       the legs are held in more than one account — resolve by hand
+Broker put spreads with no ledger entry are returned separately (untracked).
+
+Usage:
+    python reconcile.py                      # report only
+    python reconcile.py --autofill           # also fill blank close_debit / pnl_usd
+
+    from reconcile import reconcile
+    report, untracked = reconcile(['../options-analysis/data/Accounts_History.csv'])
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from position_tracker import _load, _save
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'options-analysis'))
+from analysis import load_and_clean, enrich   # noqa: E402
+
+# ============ CONFIG ============
+BROKER_EXPORT_GLOB = os.path.join('..', 'options-analysis', 'data', 'Accounts_History*.csv')
+PRICE_TOLERANCE    = 0.02       # $/share difference tolerated before flagging
+UNTRACKED_SHOWN    = 20         # untracked broker shorts printed (all are returned)
+OPEN_ACTIONS       = ['SELL_OPEN', 'BUY_OPEN']
+CLOSE_ACTIONS      = ['BUY_CLOSE', 'SELL_CLOSE', 'EXPIRED', 'ASSIGNED']
+
+# Broker root -> ledger ticker
+_ROOT_ALIASES = {'SPXW': 'SPX'}
+
+_KEY         = ['ticker', 'expiry', 'strike']
+_ACCOUNT_KEY = ['account'] + _KEY
+_MULTI       = '*'      # position account marker: legs held in several accounts
+
+
+# ============ BROKER SIDE ============
+def broker_contracts(fills: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per put contract per account (account, ticker, expiry, strike)
+    with the opening and closing quantity / premium on each side. Premiums are price × contracts.
+    """
+    puts = fills[(fills['put_call'] == 'PUT') & fills['expiry'].notna()]
+    qty  = puts['Quantity'].abs()
+    act  = puts['action_type'].astype(str)
+    prem = puts['Price'] * qty
+    close_prem = np.where(act.isin(['EXPIRED', 'ASSIGNED']), 0.0, prem)   # worthless / settled in stock
+
+    legs = pd.DataFrame({
+        'account':         puts['Account'].astype(str),
+        'ticker':          puts['underlying'].astype(str).replace(_ROOT_ALIASES),
+        'expiry':          puts['expiry'].dt.strftime('%Y-%m-%d'),
+        'strike':          puts['strike'].astype(float),
+        'short_open_qty':  np.where(act == 'SELL_OPEN', qty, 0.0),
+        'short_open_prem': np.where(act == 'SELL_OPEN', prem, 0.0),
+        'long_open_qty':   np.where(act == 'BUY_OPEN', qty, 0.0),
+        'long_open_prem':  np.where(act == 'BUY_OPEN', prem, 0.0),
+        # closes: positive quantity closes a short (BUY_CLOSE, expiry/assignment of a short)
+        'short_close_qty':  np.where(act.isin(CLOSE_ACTIONS) & (puts['Quantity'] > 0), qty, 0.0),
+        'short_close_prem': np.where(act.isin(CLOSE_ACTIONS) & (puts['Quantity'] > 0), close_prem, 0.0),
+        'long_close_qty':   np.where(act.isin(CLOSE_ACTIONS) & (puts['Quantity'] < 0), qty, 0.0),
+        'long_close_prem':  np.where(act.isin(CLOSE_ACTIONS) & (puts['Quantity'] < 0), close_prem, 0.0),
+        'expired':          act.isin(['EXPIRED']).astype(int),
+        'open_date':        puts['Run Date'].where(act.isin(OPEN_ACTIONS)),
+        'close_date':       puts['Run Date'].where(act.isin(CLOSE_ACTIONS)),
+    })
+    agg = {c: 'sum' for c in legs.columns if c.endswith(('_qty', '_prem')) or c == 'expired'}
+    agg.update({'open_date': 'min', 'close_date': 'max'})
+    return legs.groupby(_ACCOUNT_KEY, sort=False).agg(agg).reset_index()
+
+
+# ============ LEDGER SIDE ============
+def _ledger_legs(ledger: pd.DataFrame) -> pd.DataFrame:
+    pos = ledger.assign(
+        contracts_n = pd.to_numeric(ledger['contracts'], errors='coerce').fillna(0),
+        short_k     = pd.to_numeric(ledger['short_put_strike'], errors='coerce'),
+        long_k      = pd.to_numeric(ledger['long_put_strike'], errors='coerce'),
+        expiry      = pd.to_datetime(ledger['expiry_date'], errors='coerce').dt.strftime('%Y-%m-%d'),
+    )
+    short = pos[['position_id', 'ticker', 'expiry', 'short_k']].rename(columns={'short_k': 'strike'}).assign(leg='short')
+    long_ = pos[['position_id', 'ticker', 'expiry', 'long_k']].rename(columns={'long_k': 'strike'}).assign(leg='long')
+    return pd.concat([short, long_], ignore_index=True), pos.set_index('position_id')
+
+
+def _position_accounts(legs: pd.DataFrame, contracts: pd.DataFrame) -> pd.Series:
+    """
+    Broker account per position_id: the one account holding both legs, else
+    the only account holding either leg, else _MULTI. Positions with no broker
+    contract at all are absent.
+    """
+    held = legs.merge(contracts[_ACCOUNT_KEY], on=_KEY, how='inner')
+    per  = held.groupby(['position_id', 'account'], sort=False)['leg'].nunique().reset_index()
+    accounts = {}
+    for pid, g in per.groupby('position_id', sort=False):
+        both = g.loc[g['leg'] == 2, 'account']
+        accounts[pid] = (both.iloc[0] if len(both) == 1 else
+                         g['account'].iloc[0] if len(g) == 1 else _MULTI)
+    return pd.Series(accounts, dtype=object)
+
+
+# ============ RECONCILE ============
+def reconcile(export_files=None, ledger: pd.DataFrame = None, autofill: bool = False, verbose: bool = True):
+    """
+    Reconcile the ledger against Fidelity exports.
+
+    Returns (report, untracked):
+        report    : one row per ledger position — ledger vs broker credit /
+                    debit / status and an `issues` column ('' = clean)
+        untracked : broker put contracts opened short with no ledger position
+    With autofill=True, CLOSED/ROLLED ledger rows whose close_debit or pnl_usd
+    is blank are filled from the broker fills (pnl uses the ledger formula)
+    and positions.csv is saved.
+    """
+    if export_files is None:
+        export_files = sorted(glob.glob(BROKER_EXPORT_GLOB))
+    if not export_files:
+        print("[RECONCILE] No broker export files found.")
+        return pd.DataFrame(), pd.DataFrame()
+    if ledger is None:
+        ledger = _load()
+
+    contracts = broker_contracts(enrich(load_and_clean(export_files, use_cache=False, date_range=None)))
+    legs, pos = _ledger_legs(ledger)
+    accounts  = _position_accounts(legs, contracts)
+    legs['account'] = legs['position_id'].map(accounts)
+
+    joined = legs.merge(contracts, on=_ACCOUNT_KEY, how='left')      # hash join
+    short  = joined[joined['leg'] == 'short'].set_index('position_id')
+    long_  = joined[joined['leg'] == 'long'].set_index('position_id')
+
+    multi  = pd.Series(accounts, dtype=object).reindex(pos.index).eq(_MULTI)
+    report = pos[['ticker', 'tier', 'expiry', 'short_k', 'long_k', 'contracts_n', 'status',
+                  'entry_credit', 'close_debit', 'pnl_usd']].copy()
+    n   = report['contracts_n'].replace(0, np.nan)
+    s_o = short['short_open_qty'].reindex(report.index).fillna(0)
+    l_o = long_['long_open_qty'].reindex(report.index).fillna(0)
+    s_c = short['short_close_qty'].reindex(report.index).fillna(0)
+    l_c = long_['long_close_qty'].reindex(report.index).fillna(0)
+
+    report.insert(0, 'account', accounts.reindex(report.index).replace(_MULTI, 'MULTIPLE'))
+    report['broker_contracts'] = s_o
+    report['broker_credit'] = ((short['short_open_prem'].reindex(report.index).fillna(0) -
+                                long_['long_open_prem'].reindex(report.index).fillna(0)) / n).round(2)
+    report['broker_debit'] = ((short['short_close_prem'].reindex(report.index).fillna(0) -
+                               long_['long_close_prem'].reindex(report.index).fillna(0)) / n).round(2)
+    fully_closed = (s_o > 0) & (s_c >= s_o) & (l_c >= l_o)
+    expired = fully_closed & (short['expired'].reindex(report.index).fillna(0) > 0)
+    report['broker_status'] = np.select(
+        [multi, s_o + l_o == 0, expired, fully_closed], ['MULTI_ACCOUNT', 'MISSING', 'EXPIRED', 'CLOSED'], 'OPEN')
+    report['broker_close_date'] = short['close_date'].reindex(report.index).where(fully_closed)
+    report.loc[report['broker_status'].isin(['MULTI_ACCOUNT', 'MISSING', 'OPEN']), 'broker_debit'] = np.nan
+    report.loc[multi, ['broker_contracts', 'broker_credit']] = np.nan
+
+    entry  = pd.to_numeric(report['entry_credit'], errors='coerce')
+    debit  = pd.to_numeric(report['close_debit'], errors='coerce')
+    ledger_closed = report['status'].isin(['CLOSED', 'ROLLED'])
+    broker_closed = report['broker_status'].isin(['CLOSED', 'EXPIRED'])
+    dup_keys = legs[legs['leg'] == 'short'].duplicated(_ACCOUNT_KEY, keep=False)   # same contracts, same account
+    ambiguous = legs[legs['leg'] == 'short'].loc[dup_keys, 'position_id']
+
+    checks = {
+        'MISSING_AT_BROKER': report['broker_status'] == 'MISSING',
+        'MISSING_LEG':       (s_o > 0) != (l_o > 0),
+        'QTY_MISMATCH':      (s_o > 0) & (s_o != report['contracts_n']),
+        'CREDIT_MISMATCH':   (s_o > 0) & ((entry - report['broker_credit']).abs() > PRICE_TOLERANCE),
+        'DEBIT_MISMATCH':    debit.notna() & report['broker_debit'].notna() &
+                             ((debit - report['broker_debit']).abs() > PRICE_TOLERANCE),
+        'STATUS_MISMATCH':   ~report['broker_status'].isin(['MISSING', 'MULTI_ACCOUNT']) &
+                             (ledger_closed != broker_closed),
+        'AMBIGUOUS':         report.index.isin(ambiguous),
+        'MULTI_ACCOUNT':     multi,
+    }
+    flags = pd.DataFrame(checks)
+    report['issues'] = flags.apply(lambda r: ','.join(flags.columns[r.to_numpy()]), axis=1) if len(flags) else ''
+
+    # Broker short puts that no ledger leg points at (contracts of MULTI_ACCOUNT
+    # positions are already flagged on the position and not listed again)
+    known = pd.concat([legs.loc[legs['account'] != _MULTI, _ACCOUNT_KEY],
+                       contracts[_ACCOUNT_KEY].merge(legs.loc[legs['account'] == _MULTI, _KEY], on=_KEY)])
+    untracked = contracts[contracts['short_open_qty'] > 0].merge(
+        known.drop_duplicates(), on=_ACCOUNT_KEY, how='left', indicator=True)
+    untracked = untracked[untracked['_merge'] == 'left_only'].drop(columns='_merge')
+    untracked = untracked[['account', 'ticker', 'expiry', 'strike', 'short_open_qty', 'short_open_prem', 'open_date']]
+
+    if autofill:
+        _autofill(ledger, report)
+    if verbose:
+        print_reconciliation(report, untracked)
+    return report.reset_index(), untracked.reset_index(drop=True)
+
+
+def _autofill(ledger: pd.DataFrame, report: pd.DataFrame):
+    fill = report[report['status'].isin(['CLOSED', 'ROLLED']) &
+                  report['broker_status'].isin(['CLOSED', 'EXPIRED']) &
+                  ~report['issues'].str.contains('AMBIGUOUS|MULTI_ACCOUNT|MISSING_LEG|QTY_MISMATCH')]
+    blank_debit = fill['close_debit'].fillna('').astype(str).str.strip() == ''
+    blank_pnl   = fill['pnl_usd'].fillna('').astype(str).str.strip() == ''
+    fill = fill[blank_debit | blank_pnl]
+    if fill.empty:
+        print("[RECONCILE] Nothing to auto-fill.")
+        return
+
+    idx = ledger.reset_index().set_index('position_id')['index']
+    for pid, row in fill.iterrows():
+        i = idx[pid]
+        debit = float(row['broker_debit'])
+        if str(ledger.at[i, 'close_debit']).strip() in ('', 'nan'):
+            ledger.at[i, 'close_debit'] = str(debit)
+        else:
+            debit = float(ledger.at[i, 'close_debit'])
+        if str(ledger.at[i, 'pnl_usd']).strip() in ('', 'nan'):
+            pnl = round((float(row['entry_credit']) - debit) * int(row['contracts_n']) * 100, 2)
+            ledger.at[i, 'pnl_usd'] = str(pnl)
+        print(f"[RECONCILE] Filled {pid}: close_debit={ledger.at[i, 'close_debit']} pnl_usd={ledger.at[i, 'pnl_usd']}")
+    _save(ledger)
+
+
+def print_reconciliation(report: pd.DataFrame, untracked: pd.DataFrame):
+    issues = report[report['issues'] != '']
+    print(f"\n{'='*60}")
+    print("LEDGER ↔ BROKER RECONCILIATION")
+    print(f"{'='*60}")
+    print(f"Ledger positions : {len(report)}")
+    print(f"Clean            : {len(report) - len(issues)}")
+    print(f"With issues      : {len(issues)}")
+    print(f"Untracked shorts : {len(untracked)}")
+    print('='*60)
+    if not issues.empty:
+        print("\nISSUES:")
+        print(issues[['account', 'status', 'broker_status', 'entry_credit', 'broker_credit',
+                      'close_debit', 'broker_debit', 'issues']].to_string())
+    if not untracked.empty:
+        print(f"\nBROKER SHORT PUTS NOT IN LEDGER (latest {min(len(untracked), UNTRACKED_SHOWN)}):")
+        print(untracked.sort_values('open_date', ascending=False).head(UNTRACKED_SHOWN).to_string(index=False))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconcile positions.csv against Fidelity exports.')
+    parser.add_argument('files', nargs='*', help=f'export CSVs (default: {BROKER_EXPORT_GLOB})')
+    parser.add_argument('--autofill', action='store_true', help='fill blank close_debit / pnl_usd from broker fills')
+    args = parser.parse_args()
+    reconcile(args.files or None, autofill=args.autofill)
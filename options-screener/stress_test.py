@@ -0,0 +1,229 @@
+"""
+stress_test.py
+--------------
+Portfolio stress test for every OPEN put credit spread in the position ledger.
+
+Scenarios (each combined with every IV shock in IV_SHOCKS_PTS):
+    GRID : instantaneous SPX move from SPX_SHOCKS_PCT, passed to each ticker
+           through its beta to SPX (trailing BETA_LOOKBACK daily returns)
+    HIST : the HIST_GAP_COUNT worst SPX overnight gaps (Open vs prior Close)
+           in the cached history. Each ticker takes its own gap from that
+           morning when it has data for the date, beta × SPX gap otherwise.
+
+Every spread is revalued with Black-Scholes (option_pricing.put_spread_value)
+at its current DTE, base vol = trailing HV_30 of the underlying. The whole
+scenario × position grid is priced in one vectorized call, so hundreds of
+positions × thousands of scenarios run in well under a second once prices
+are in the local price store.
+
+Usage:
+    python stress_test.py
+
+    from stress_test import run_stress_test
+    scenarios, summary = run_stress_test()
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+
+from option_pricing import put_spread_value
+from price_store import get_history
+from position_tracker import _load
+from options_premium_screener import SPX_TICKER
+
+# ============ CONFIG ============
+SPX_SHOCKS_PCT = np.round(np.arange(-15.0, 5.0 + 1e-9, 0.25), 2)   # 81 grid points
+IV_SHOCKS_PTS  = np.arange(0, 45, 5)                               # +0 … +40 vol points
+HIST_GAP_COUNT = 50
+HISTORY_PERIOD = '10y'
+BETA_LOOKBACK  = 252
+HV_LOOKBACK    = 30
+_DEFAULT_SIGMA = 0.30   # when an underlying has too little history for HV
+
+# Ledger tickers that are quoted under a different symbol
+_PRICE_SYMBOL = {'SPX': SPX_TICKER}
+
+
+# ============ MARKET INPUTS ============
+def _market_inputs(tickers):
+    """
+    Per-ticker spot, HV (decimal), beta to SPX and overnight-gap series
+    from the local price store. Returns (inputs DataFrame, spx history,
+    overnight-gap returns: dates × tickers, open / prior close - 1).
+    """
+    spx = get_history(SPX_TICKER, HISTORY_PERIOD)
+    spx_ret = spx['Close'].pct_change()
+
+    rows, gaps = {}, {}
+    for ticker in tickers:
+        hist = spx if _PRICE_SYMBOL.get(ticker, ticker) == SPX_TICKER else \
+            get_history(_PRICE_SYMBOL.get(ticker, ticker), HISTORY_PERIOD)
+        if hist.empty:
+            rows[ticker] = {'spot': np.nan, 'sigma': np.nan, 'beta': 1.0}
+            continue
+
+        ret     = hist['Close'].pct_change()
+        log_ret = np.log1p(ret.dropna())
+        sigma   = float(log_ret.tail(HV_LOOKBACK).std() * np.sqrt(252)) if len(log_ret) > HV_LOOKBACK else np.nan
+
+        joined = pd.concat([ret, spx_ret], axis=1, keys=['r', 'm']).dropna().tail(BETA_LOOKBACK)
+        beta   = float(joined['r'].cov(joined['m']) / joined['m'].var()) if len(joined) > 20 else 1.0
+
+        rows[ticker] = {'spot': float(hist['Close'].iloc[-1]), 'sigma': sigma, 'beta': beta}
+        gaps[ticker] = hist['Open'] / hist['Close'].shift(1) - 1.0
+
+    inputs = pd.DataFrame.from_dict(rows, orient='index')
+    inputs['sigma'] = inputs['sigma'].fillna(_DEFAULT_SIGMA)
+    return inputs, spx, pd.DataFrame(gaps)
+
+
+def _scenario_grid(inputs, spx, gaps):
+    """
+    Build (meta DataFrame, underlying returns [n_scen × n_tickers], IV shocks [n_scen]).
+    """
+    betas = inputs['beta'].to_numpy()
+
+    # GRID — SPX shock × beta
+    grid_moves = SPX_SHOCKS_PCT[:, None] / 100.0 * betas[None, :]
+    grid_meta  = pd.DataFrame({'kind': 'GRID', 'date': '', 'spx_move_pct': SPX_SHOCKS_PCT})
+
+    # HIST — worst SPX overnight gaps, each ticker's own gap where available
+    spx_gap   = (spx['Open'] / spx['Close'].shift(1) - 1.0).dropna()
+    worst     = spx_gap.nsmallest(HIST_GAP_COUNT)
+    own       = gaps.reindex(index=worst.index, columns=inputs.index).to_numpy()
+    fallback  = worst.to_numpy()[:, None] * betas[None, :]
+    hist_moves = np.where(np.isnan(own), fallback, own)
+    hist_meta  = pd.DataFrame({
+        'kind': 'HIST',
+        'date': [d.strftime('%Y-%m-%d') for d in worst.index],
+        'spx_move_pct': np.round(worst.to_numpy() * 100.0, 2),
+    })
+
+    moves = np.vstack([grid_moves, hist_moves])
+    meta  = pd.concat([grid_meta, hist_meta], ignore_index=True)
+
+    # Cross with IV shocks
+    n_base = len(meta)
+    meta   = meta.loc[meta.index.repeat(len(IV_SHOCKS_PTS))].reset_index(drop=True)
+    meta['iv_shock_pts'] = np.tile(IV_SHOCKS_PTS, n_base)
+    moves  = np.repeat(moves, len(IV_SHOCKS_PTS), axis=0)
+    return meta, moves, meta['iv_shock_pts'].to_numpy() / 100.0
+
+
+# ============ STRESS ENGINE ============
+def stress_positions(positions: pd.DataFrame, inputs: pd.DataFrame, meta, moves, iv_shocks):
+    """
+    Revalue every position under every scenario.
+
+    Returns (pnl [n_scen × n_pos] in USD, positive = gain vs. current mark,
+             base_value [n_pos] $/share).
+    """
+    col      = inputs.index.get_indexer(positions['ticker'])
+    spot     = inputs['spot'].to_numpy()[col]
+    sigma    = inputs['sigma'].to_numpy()[col]
+    short_k  = positions['short_put_strike'].astype(float).to_numpy()
+    long_k   = positions['long_put_strike'].astype(float).to_numpy()
+    qty      = positions['contracts'].astype(int).to_numpy() * 100
+    expiry   = pd.to_datetime(positions['expiry_date']).dt.date
+    t_years  = np.array([(e - date.today()).days for e in expiry], dtype=float).clip(min=0) / 365.0
+
+    base    = put_spread_value(spot, short_k, long_k, t_years, sigma)
+    shocked = put_spread_value(
+        spot[None, :] * (1.0 + moves[:, col]),
+        short_k[None, :], long_k[None, :], t_years[None, :],
+        sigma[None, :] + iv_shocks[:, None],
+    )
+    pnl = (base[None, :] - shocked) * qty[None, :]
+    return pnl, base
+
+
+def run_stress_test(positions: pd.DataFrame = None, verbose: bool = True):
+    """
+    Stress every OPEN ledger position.
+
+    Returns (scenarios, summary):
+        scenarios : one row per scenario — kind, date, spx_move_pct, iv_shock_pts,
+                    book_pnl, worst_position, worst_position_pnl
+        summary   : dict — positions, scenarios, max book loss (+ scenario),
+                    loss percentiles, theoretical max loss (all spreads at width)
+    """
+    if positions is None:
+        df = _load()
+        positions = df[df['status'] == 'OPEN'].reset_index(drop=True)
+    if positions.empty:
+        print("[STRESS] No open positions.")
+        return pd.DataFrame(), {}
+
+    inputs, spx, gaps = _market_inputs(sorted(positions['ticker'].unique()))
+    missing = inputs.index[inputs['spot'].isna()].tolist()
+    if missing:
+        print(f"[STRESS] No price history for {', '.join(missing)} — excluded.")
+        positions = positions[~positions['ticker'].isin(missing)].reset_index(drop=True)
+        inputs    = inputs.drop(index=missing)
+        if positions.empty:
+            return pd.DataFrame(), {}
+
+    meta, moves, iv_shocks = _scenario_grid(inputs, spx, gaps)
+
+    started = datetime.now()
+    pnl, _  = stress_positions(positions, inputs, meta, moves, iv_shocks)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    worst_idx = pnl.argmin(axis=1)
+    scenarios = meta.assign(
+        book_pnl           = pnl.sum(axis=1).round(2),
+        worst_position     = positions['position_id'].to_numpy()[worst_idx],
+        worst_position_pnl = pnl[np.arange(len(pnl)), worst_idx].round(2),
+    )
+
+    book       = scenarios['book_pnl']
+    worst_row  = scenarios.loc[book.idxmin()]
+    width      = positions['short_put_strike'].astype(float) - positions['long_put_strike'].astype(float)
+    max_theory = float(((width - positions['entry_credit'].astype(float)) *
+                        positions['contracts'].astype(int) * 100).sum())
+    summary = {
+        'positions':         len(positions),
+        'scenarios':         len(scenarios),
+        'elapsed_sec':       round(elapsed, 3),
+        'max_book_loss':     round(float(book.min()), 2),
+        'max_loss_scenario': (f"{worst_row['kind']} SPX {worst_row['spx_move_pct']:+.2f}% "
+                              f"IV +{worst_row['iv_shock_pts']} {worst_row['date']}").strip(),
+        'loss_p50':          round(float(book.quantile(0.50)), 2),
+        'loss_p05':          round(float(book.quantile(0.05)), 2),
+        'loss_p01':          round(float(book.quantile(0.01)), 2),
+        'theoretical_max_loss': round(-max_theory, 2),
+    }
+
+    if verbose:
+        print_stress_report(scenarios, summary)
+    return scenarios, summary
+
+
+def print_stress_report(scenarios: pd.DataFrame, summary: dict):
+    print(f"\n{'='*60}")
+    print(f"PORTFOLIO STRESS TEST — {datetime.now().strftime('%Y-%m-%d')}")
+    print(f"{'='*60}")
+    print(f"Positions        : {summary['positions']}")
+    print(f"Scenarios        : {summary['scenarios']} (revalued in {summary['elapsed_sec']}s)")
+    print(f"Max book loss    : ${summary['max_book_loss']:,.2f}  ({summary['max_loss_scenario']})")
+    print(f"P&L 1% / 5% / 50%: ${summary['loss_p01']:,.2f} / ${summary['loss_p05']:,.2f} / ${summary['loss_p50']:,.2f}")
+    print(f"Theoretical max  : ${summary['theoretical_max_loss']:,.2f} (every spread at full width)")
+    print('='*60)
+
+    grid = scenarios[scenarios['kind'] == 'GRID']
+    table = grid.pivot_table(index='spx_move_pct', columns='iv_shock_pts', values='book_pnl')
+    shown = [m for m in (-15.0, -10.0, -7.0, -5.0, -3.0, -2.0, -1.0, 0.0, 2.0, 5.0) if m in table.index]
+    print("\nBOOK P&L — SPX move (rows) × IV shock in vol pts (cols):")
+    print(table.loc[shown].round(0).to_string())
+
+    hist = scenarios[(scenarios['kind'] == 'HIST') & (scenarios['iv_shock_pts'] == 0)]
+    if not hist.empty:
+        print("\nWORST HISTORICAL SPX OVERNIGHT GAPS (no IV shock):")
+        print(hist.nsmallest(10, 'book_pnl')[
+            ['date', 'spx_move_pct', 'book_pnl', 'worst_position', 'worst_position_pnl']
+        ].to_string(index=False))
+
+
+if __name__ == '__main__':
+    run_stress_test()
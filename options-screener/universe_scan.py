@@ -0,0 +1,282 @@
+"""
+universe_scan.py
+----------------
+Full-universe scan (S&P 500 / Russell 1000 sized ticker files) with the
+entry rules of screen_tickers().
+
+The per-ticker pipeline of the screener (download, indicators, earnings,
+IV chain, expiry lookup) costs several requests per name, so it runs in
+three stages:
+
+    1. prefetch   price_store.prefetch() refreshes the daily cache in
+                  batched multi-ticker downloads (a few requests in total).
+    2. prefilter  backtest.build_panel() computes the indicators for the
+                  whole universe as one dates × tickers panel; the price-only
+                  gates (history, oversold, uptrend, liquidity, lower BB,
+                  ATR%, volume surge, Tier 2 ATR cap) run on the last row as
+                  array masks with the live VIX-regime thresholds.
+    3. confirm    survivors, strongest Signal_Strength first, go through the
+                  earnings blackout, compute_iv_rank() / _apply_iv_filters()
+                  and get_target_expiry() on a small thread pool. A bounded
+                  heap keeps the best UNIVERSE_TOP_K; once it is full and no
+                  remaining survivor can beat its weakest entry, or the time
+                  budget runs out, the scan stops.
+
+Universe names are not curated, so they are screened with the Tier 2 rules
+(ATR% cap, Tier 2 delta target). SPX stays with screen_spx().
+
+Ticker file: one symbol per line (or comma separated); '#' starts a comment,
+a 'Symbol' / 'Ticker' header is skipped and class shares are mapped to
+Yahoo's form (BRK.B -> BRK-B).
+
+Usage:
+    python universe_scan.py sp500.txt
+    python universe_scan.py russell1000.txt --top 40 --budget 300 --workers 8
+
+    from universe_scan import run_universe_scan
+    signals = run_universe_scan('sp500.txt')
+"""
+
+import argparse
+import heapq
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from backtest import build_panel, gate_masks, load_ohlcv
+from price_store import prefetch
+from options_premium_screener import (
+    TIER2_DELTA_MIN, TIER2_DELTA_MAX, T2_ROLLOVER_DTE, T2_EMERGENCY_CLOSE_DTE,
+    MAX_ROLLOVER_DEBIT_PCT, get_vix, get_adjusted_params, get_vix_regime,
+    get_earnings_date, is_earnings_blackout, compute_iv_rank, _apply_iv_filters,
+    get_target_expiry, calculate_signal_strength, check_cluster_risk, add_pop_estimates,
+    _open_position_tickers,
+)
+
+# ============ CONFIG ============
+UNIVERSE_PERIOD          = '1y'          # same lookback screen_tickers() downloads
+UNIVERSE_TIER            = 'TIER2_WATCH'
+UNIVERSE_TOP_K           = 25
+UNIVERSE_TIME_BUDGET_SEC = 240
+UNIVERSE_WORKERS         = 8             # threads for the network-bound confirm stage
+PRICE_GATES = [
+    'history', 'oversold', 'uptrend', 'liquid', 'near_lower_bb',
+    'adequate_vol', 'volume_surge', 'tier2_atr_cap',
+]
+_HEADER_TOKENS = {'SYMBOL', 'TICKER'}
+
+
+def load_universe(path: str) -> list:
+    """Unique Yahoo symbols from a ticker file, in file order."""
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            for token in line.split('#', 1)[0].replace(',', ' ').split():
+                token = token.strip().upper().replace('.', '-')
+                if token and token not in _HEADER_TOKENS:
+                    tickers.append(token)
+    return list(dict.fromkeys(tickers))
+
+
+# ============ STAGE 2: PRICE-ONLY PREFILTER ============
+def prefilter(tickers, adjusted_params: dict, period: str = UNIVERSE_PERIOD):
+    """
+    Last-bar price gates for the whole universe.
+
+    Returns (candidates, funnel): candidates is a DataFrame indexed by ticker
+    with the indicator values the screener reports and Signal_Strength,
+    strongest first; funnel maps gate -> tickers still passing after it.
+    """
+    ohlcv = load_ohlcv(tickers, period)
+    if ohlcv['Close'].empty:
+        return pd.DataFrame(), {}
+    panel = build_panel(ohlcv, pd.Series(dtype=float))   # IV proxy unused: live IV runs in stage 3
+    names = np.array(panel['tickers'])
+    last  = {k: v[-1] for k, v in panel['data'].items()}
+    last['sma_200'] = np.where(np.isin(names, tickers), last['sma_200'], np.nan)   # SPX is loaded, not screened
+
+    gates = gate_masks(
+        last, names == 'SPX', np.full(len(names), UNIVERSE_TIER == 'TIER2_WATCH'),
+        adjusted_params['rsi_threshold'], adjusted_params['bb_threshold'],
+        adjusted_params['spx_rsi_threshold'],
+    )
+    funnel, mask = {}, np.ones(len(names), dtype=bool)
+    for name in PRICE_GATES:
+        mask &= gates[name]
+        funnel[name] = int(mask.sum())
+
+    candidates = pd.DataFrame({
+        'RSI':         last['rsi'][mask],
+        'Price':       last['close'][mask],
+        'SMA_200':     last['sma_200'][mask],
+        'BB_Position': last['bb_position'][mask],
+        'ATR_%':       last['atr_pct'][mask],
+        'Vol_Surge':   last['vol_surge'][mask],
+    }, index=pd.Index(names[mask], name='Ticker'))
+    candidates['Signal_Strength'] = [
+        calculate_signal_strength(*v) for v in
+        candidates[['RSI', 'BB_Position', 'Vol_Surge', 'ATR_%']].itertuples(index=False)
+    ]
+    candidates = candidates.sort_values('Signal_Strength', ascending=False, kind='stable')
+    return candidates, funnel
+
+
+# ============ STAGE 3: CONFIRM SURVIVORS ============
+def _confirm(ticker: str, cand: pd.Series, vix, adjusted_params: dict):
+    """Earnings, IV and expiry stages of screen_tickers() for one survivor. None = rejected."""
+    label = '[UNIVERSE]'
+    try:
+        earnings_date = get_earnings_date(ticker)
+        if is_earnings_blackout(earnings_date):
+            print(f"{label} {ticker}: earnings blackout ({earnings_date}) — skipped.")
+            return None
+        iv_data = compute_iv_rank(ticker)
+        if _apply_iv_filters(ticker, iv_data, label):
+            return None
+        expiry_info = get_target_expiry(ticker, earnings_date)
+    except Exception as e:
+        print(f"{label} {ticker}: confirm stage failed ({e}).")
+        return None
+
+    return {
+        'Tier': UNIVERSE_TIER, 'Signal_Strength': int(cand['Signal_Strength']),
+        'RSI': round(cand['RSI'], 2), 'Price': round(cand['Price'], 2),
+        'SMA_200': round(cand['SMA_200'], 2), 'BB_Position': round(cand['BB_Position'], 2),
+        'ATR_%': round(cand['ATR_%'], 2), 'Vol_Surge': round(cand['Vol_Surge'], 2),
+        'VIX': vix, 'VIX_Regime': get_vix_regime(vix),
+        'RSI_Threshold_Used': adjusted_params['rsi_threshold'],
+        'BB_Threshold_Used':  adjusted_params['bb_threshold'],
+        'IV_Rank':      iv_data.get('iv_rank'),
+        'IV_Pct':       iv_data.get('iv_pct'),
+        'HV_30':        iv_data.get('hv_30'),
+        'IV_HV_Ratio':  iv_data.get('iv_hv_ratio'),
+        'IV_Skip_Reason': iv_data.get('skipped_reason'),
+        'Delta_Target': f'{TIER2_DELTA_MIN}–{TIER2_DELTA_MAX}',
+        'Expiry_Date':  str(expiry_info[0]) if expiry_info else 'N/A (earnings conflict)',
+        'Expiry_DTE':   expiry_info[1] if expiry_info else None,
+        'Is_Monthly':   expiry_info[2] if expiry_info else None,
+        'Earnings_Avoided':  str(earnings_date) if expiry_info and expiry_info[3] else 'N/A',
+        'Earnings_Blackout': False,
+        'Position_Mgmt': (
+            f'Stage1(DTE<={T2_ROLLOVER_DTE}+price<short_put): '
+            f'1st net credit roll, 2nd debit<={int(MAX_ROLLOVER_DEBIT_PCT*100)}% of credit, fallback close | '
+            f'Stage2(DTE<={T2_EMERGENCY_CLOSE_DTE}+price<=long_put): emergency close'
+        ),
+    }
+
+
+def confirm_top_k(candidates: pd.DataFrame, vix, adjusted_params: dict, top_k: int,
+                  deadline: float, workers: int = UNIVERSE_WORKERS):
+    """
+    Run _confirm() over candidates (strongest first) in waves of `workers`.
+    Returns (rows, checked, stop_reason) with rows the best top_k confirmed
+    signals, strongest first.
+    """
+    heap, checked, reason = [], 0, 'exhausted'
+    items = list(candidates.iterrows())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while checked < len(items):
+            if datetime.now().timestamp() >= deadline:
+                reason = 'time budget'
+                break
+            if len(heap) >= top_k and items[checked][1]['Signal_Strength'] <= heap[0][0]:
+                reason = 'top-K full'
+                break
+            wave = items[checked:checked + workers]
+            rows = pool.map(lambda item: _confirm(item[0], item[1], vix, adjusted_params), wave)
+            for seq, ((ticker, _), row) in enumerate(zip(wave, rows), start=checked):
+                if row is None:
+                    continue
+                entry = (row['Signal_Strength'], -seq, ticker, row)   # earlier = stronger on ties
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heappushpop(heap, entry)
+            checked += len(wave)
+    ranked = sorted(heap, reverse=True)
+    return {ticker: row for _, _, ticker, row in ranked}, checked, reason
+
+
+# ============ RUNNER ============
+def run_universe_scan(path: str, top_k: int = UNIVERSE_TOP_K, budget_sec: float = UNIVERSE_TIME_BUDGET_SEC,
+                      workers: int = UNIVERSE_WORKERS, verbose: bool = True, save: bool = True) -> pd.DataFrame:
+    """
+    Scan every symbol in the ticker file at `path`. Returns the confirmed
+    top_k signals (screener columns + Monte Carlo PoP), strongest first.
+    """
+    started  = datetime.now()
+    deadline = started.timestamp() + budget_sec
+    universe = load_universe(path)
+
+    ready = prefetch(universe, UNIVERSE_PERIOD)
+    fetched = datetime.now()
+    vix = get_vix()
+    adjusted_params, regime = get_adjusted_params(vix)
+    candidates, funnel = prefilter(ready, adjusted_params)
+    filtered = datetime.now()
+
+    rows, checked, reason = ({}, 0, 'no candidates') if candidates.empty else \
+        confirm_top_k(candidates, vix, adjusted_params, top_k, deadline, workers)
+    results = pd.DataFrame.from_dict(rows, orient='index')
+    if not results.empty:
+        results.index.name = 'Ticker'
+        results['Scan_Date']    = started.strftime('%Y-%m-%d')
+        results['Scan_Time']    = started.strftime('%H:%M:%S')
+        cluster_info = check_cluster_risk(rows, _open_position_tickers())
+        results['Cluster_Risk'] = cluster_info['cluster_risk']
+        for cl in cluster_info['corr_clusters']:
+            results.loc[cl['signals'], 'Corr_Cluster']     = cl['id']
+            results.loc[cl['signals'], 'Cluster_Eff_Bets'] = cl['effective_bets']
+        results = add_pop_estimates(results)
+    done = datetime.now()
+
+    stats = {
+        'universe': len(universe), 'with_data': len(ready), 'regime': regime, 'funnel': funnel,
+        'candidates': len(candidates), 'checked': checked, 'stop_reason': reason, 'signals': len(results),
+        'prefetch_sec':  (fetched - started).total_seconds(),
+        'prefilter_sec': (filtered - fetched).total_seconds(),
+        'confirm_sec':   (done - filtered).total_seconds(),
+    }
+    if save and not results.empty:
+        output_file = f'universe_signals_{started.strftime("%Y%m%d")}.csv'
+        results.to_csv(output_file)
+        stats['output_file'] = output_file
+    if verbose:
+        print_universe_report(results, stats, top_k)
+    return results
+
+
+def print_universe_report(results: pd.DataFrame, stats: dict, top_k: int):
+    print(f"\n{'='*60}")
+    print(f"UNIVERSE SCAN — {stats['regime']} regime")
+    print(f"{'='*60}")
+    print(f"Universe         : {stats['universe']:,} symbols ({stats['with_data']:,} with price data)")
+    print(f"Prefetch         : {stats['prefetch_sec']:.1f}s")
+    print(f"Prefilter        : {stats['candidates']:,} survivors in {stats['prefilter_sec']:.1f}s")
+    print(f"Confirm          : {stats['checked']:,} checked in {stats['confirm_sec']:.1f}s "
+          f"(stopped: {stats['stop_reason']})")
+    print(f"Signals          : {stats['signals']} (top {top_k})")
+    if stats.get('output_file'):
+        print(f"Saved            : {stats['output_file']}")
+    print('='*60)
+
+    print("\nPRICE GATE FUNNEL (tickers passing every gate so far):")
+    for name, n in stats['funnel'].items():
+        print(f"  {name:<14} {n:>6,}")
+    if results.empty:
+        return
+    cols = ['Signal_Strength', 'RSI', 'Price', 'BB_Position', 'ATR_%', 'Vol_Surge',
+            'IV_Rank', 'IV_HV_Ratio', 'Expiry_Date', 'Expiry_DTE', 'PoP', 'Expected_PnL']
+    print("\nTOP SIGNALS:")
+    print(results[[c for c in cols if c in results.columns]].to_string())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan a full ticker universe with the screener entry rules.')
+    parser.add_argument('path', help='ticker file: one symbol per line or comma separated')
+    parser.add_argument('--top', type=int, default=UNIVERSE_TOP_K, help='signals to keep')
+    parser.add_argument('--budget', type=float, default=UNIVERSE_TIME_BUDGET_SEC, help='time budget in seconds')
+    parser.add_argument('--workers', type=int, default=UNIVERSE_WORKERS, help='threads for the confirm stage')
+    args = parser.parse_args()
+    run_universe_scan(args.path, top_k=args.top, budget_sec=args.budget, workers=args.workers)
@@ -1,168 +1,395 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+import argparse
 import glob
+import hashlib
+import json
+import os
+
+# ============ CONFIG ============
+FULL_DPI          = 300
+PREVIEW_DPI       = 80
+RENDER_CACHE_FILE = '.render_cache.json'   # output file -> hash of render inputs + dpi
+SIGNAL_FILE_GLOB  = 'signals_*.csv'
+
+# Only these columns are parsed from each day's file for the history report
+HISTORY_COLUMNS = ['Ticker', 'Scan_Date', 'Tier', 'VIX_Regime', 'Signal_Strength', 'RSI', 'IV_Rank']
+HISTORY_DTYPES  = {
+    'Ticker': 'string', 'Scan_Date': 'string', 'Tier': 'string', 'VIX_Regime': 'string',
+    'Signal_Strength': 'float64', 'RSI': 'float64', 'IV_Rank': 'float64',
+}
+HISTORY_TOP_TICKERS = 20
+REGIME_COLORS = {'LOW': '#2ecc71', 'NORMAL': '#3498db', 'ELEVATED': '#f39c12', 'HIGH': '#e74c3c'}
 
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['figure.facecolor'] = 'white'
 
-# Find the most recent signals file
-signal_files = glob.glob('signals_*.csv')
-if not signal_files:
-    print("❌ No signal files found. Run the screener first.")
-    exit()
-
-latest_file = max(signal_files)
-print(f"📊 Analyzing: {latest_file}")
-
-# Read the signals
-df = pd.read_csv(latest_file, index_col='Ticker')
-
-if df.empty:
-    print("❌ No signals found in the file.")
-    exit()
-
-print(f"✓ Found {len(df)} signals to analyze")
-
-# Create comprehensive visualization
-fig = plt.figure(figsize=(16, 12))
-gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
-
-# ============ 1. SIGNAL STRENGTH RANKING ============
-ax1 = fig.add_subplot(gs[0, :2])
-top_10 = df.nsmallest(10, 'RSI').sort_values('Signal_Strength', ascending=True)
-colors = plt.cm.RdYlGn(top_10['Signal_Strength'] / 100)
-ax1.barh(range(len(top_10)), top_10['Signal_Strength'], color=colors)
-ax1.set_yticks(range(len(top_10)))
-ax1.set_yticklabels(top_10.index)
-ax1.set_xlabel('Signal Strength Score', fontsize=11, fontweight='bold')
-ax1.set_title('Top 10 Signals by Strength (100 = Highest Quality)', fontsize=12, fontweight='bold')
-ax1.set_xlim(0, 100)
-for i, (idx, row) in enumerate(top_10.iterrows()):
-    ax1.text(row['Signal_Strength'] + 1, i, f"{row['Signal_Strength']:.0f}", 
-             va='center', fontsize=9, fontweight='bold')
-
-# ============ 2. SUMMARY STATS ============
-ax2 = fig.add_subplot(gs[0, 2])
-ax2.axis('off')
-stats_text = f"""
-SCREENING SUMMARY
-{'='*25}
-
-Total Signals: {len(df)}
-Scan Date: {df['Scan_Date'].iloc[0]}
-
-QUALITY METRICS
-{'='*25}
-Avg Signal Strength: {df['Signal_Strength'].mean():.1f}/100
-Avg RSI: {df['RSI'].mean():.1f}
-Avg ATR: {df['ATR_%'].mean():.1f}%
-Avg Vol Surge: {df['Vol_Surge'].mean():.1f}x
-
-PRICE RANGE
-{'='*25}
-Min: ${df['Price'].min():.2f}
-Median: ${df['Price'].median():.2f}
-Max: ${df['Price'].max():.2f}
-"""
-ax2.text(0.05, 0.95, stats_text, transform=ax2.transAxes, 
-         fontsize=10, verticalalignment='top', family='monospace',
-         bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
-
-# ============ 3. RSI DISTRIBUTION ============
-ax3 = fig.add_subplot(gs[1, 0])
-ax3.hist(df['RSI'], bins=15, color='#FF6B6B', edgecolor='black', alpha=0.7)
-ax3.axvline(df['RSI'].mean(), color='blue', linestyle='--', linewidth=2, 
-            label=f'Mean: {df["RSI"].mean():.1f}')
-ax3.axvline(30, color='red', linestyle=':', linewidth=2, label='Oversold (30)')
-ax3.set_xlabel('RSI Value', fontsize=10, fontweight='bold')
-ax3.set_ylabel('Frequency', fontsize=10, fontweight='bold')
-ax3.set_title('RSI Distribution', fontsize=11, fontweight='bold')
-ax3.legend()
-ax3.grid(True, alpha=0.3)
-
-# ============ 4. BOLLINGER BAND POSITION ============
-ax4 = fig.add_subplot(gs[1, 1])
-ax4.hist(df['BB_Position'], bins=15, color='#4ECDC4', edgecolor='black', alpha=0.7)
-ax4.axvline(0.5, color='gray', linestyle='--', linewidth=2, label='Middle (0.5)')
-ax4.axvline(df['BB_Position'].mean(), color='red', linestyle='--', linewidth=2,
-            label=f'Mean: {df["BB_Position"].mean():.2f}')
-ax4.set_xlabel('BB Position (0=Lower, 1=Upper)', fontsize=10, fontweight='bold')
-ax4.set_ylabel('Frequency', fontsize=10, fontweight='bold')
-ax4.set_title('Bollinger Band Position', fontsize=11, fontweight='bold')
-ax4.legend()
-ax4.grid(True, alpha=0.3)
-
-# ============ 5. ATR % DISTRIBUTION ============
-ax5 = fig.add_subplot(gs[1, 2])
-ax5.hist(df['ATR_%'], bins=15, color='#95E1D3', edgecolor='black', alpha=0.7)
-ax5.axvline(df['ATR_%'].mean(), color='red', linestyle='--', linewidth=2,
-            label=f'Mean: {df["ATR_%"].mean():.1f}%')
-ax5.set_xlabel('ATR as % of Price', fontsize=10, fontweight='bold')
-ax5.set_ylabel('Frequency', fontsize=10, fontweight='bold')
-ax5.set_title('Average True Range (Volatility)', fontsize=11, fontweight='bold')
-ax5.legend()
-ax5.grid(True, alpha=0.3)
-
-# ============ 6. VOLUME SURGE ANALYSIS ============
-ax6 = fig.add_subplot(gs[2, 0])
-ax6.scatter(df['Vol_Surge'], df['Signal_Strength'], alpha=0.6, s=100, c=df['RSI'], 
-            cmap='RdYlGn_r', edgecolors='black', linewidth=0.5)
-ax6.axvline(1.5, color='red', linestyle='--', linewidth=1, alpha=0.5, label='1.5x threshold')
-ax6.set_xlabel('Volume Surge Ratio', fontsize=10, fontweight='bold')
-ax6.set_ylabel('Signal Strength', fontsize=10, fontweight='bold')
-ax6.set_title('Volume Surge vs Signal Quality', fontsize=11, fontweight='bold')
-ax6.legend()
-ax6.grid(True, alpha=0.3)
-cbar = plt.colorbar(ax6.collections[0], ax=ax6)
-cbar.set_label('RSI', fontsize=9)
-
-# ============ 7. PRICE vs SMA 200 ============
-ax7 = fig.add_subplot(gs[2, 1])
-ax7.scatter(df['SMA_200'], df['Price'], alpha=0.6, s=100, c=df['Signal_Strength'], 
-            cmap='RdYlGn', edgecolors='black', linewidth=0.5)
-min_val = min(df['SMA_200'].min(), df['Price'].min())
-max_val = max(df['SMA_200'].max(), df['Price'].max())
-ax7.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, alpha=0.5, 
-         label='Price = SMA')
-ax7.set_xlabel('200-Day SMA ($)', fontsize=10, fontweight='bold')
-ax7.set_ylabel('Current Price ($)', fontsize=10, fontweight='bold')
-ax7.set_title('Price vs Long-term Trend', fontsize=11, fontweight='bold')
-ax7.legend()
-ax7.grid(True, alpha=0.3)
-cbar = plt.colorbar(ax7.collections[0], ax=ax7)
-cbar.set_label('Signal Strength', fontsize=9)
-
-# ============ 8. SUPPORT DISTANCE ANALYSIS ============
-ax8 = fig.add_subplot(gs[2, 2])
-ax8.scatter(df['Distance_to_Support_%'], df['Signal_Strength'], alpha=0.6, s=100, 
-            c=df['BB_Position'], cmap='coolwarm', edgecolors='black', linewidth=0.5)
-ax8.axvline(5, color='red', linestyle='--', linewidth=1, alpha=0.5, label='5% threshold')
-ax8.set_xlabel('Distance to Support (%)', fontsize=10, fontweight='bold')
-ax8.set_ylabel('Signal Strength', fontsize=10, fontweight='bold')
-ax8.set_title('Proximity to Support Level', fontsize=11, fontweight='bold')
-ax8.legend()
-ax8.grid(True, alpha=0.3)
-cbar = plt.colorbar(ax8.collections[0], ax=ax8)
-cbar.set_label('BB Position', fontsize=9)
-
-# Main title
-fig.suptitle(f'Options Premium Screener Analysis - {datetime.now().strftime("%Y-%m-%d")}', 
-             fontsize=16, fontweight='bold', y=0.995)
-
-# Save
-output_filename = f'signal_analysis_{datetime.now().strftime("%Y%m%d")}.png'
-plt.savefig(output_filename, dpi=300, bbox_inches='tight', facecolor='white')
-print(f"\n✅ Visualization saved: {output_filename}")
-
-# Display summary
-print("\n" + "="*50)
-print("ANALYSIS COMPLETE")
-print("="*50)
-print(f"Signals Analyzed: {len(df)}")
-print(f"Average Signal Strength: {df['Signal_Strength'].mean():.1f}/100")
-print(f"Best Signal: {df['Signal_Strength'].max():.0f}/100 ({df['Signal_Strength'].idxmax()})")
-print(f"Most Oversold: RSI {df['RSI'].min():.1f} ({df['RSI'].idxmin()})")
-print("="*50)
+
+# ============ RENDER CACHE ============
+# A chart is re-rendered only when its inputs or the dpi changed since the
+# last render that wrote the same output file. The snapshot hashes the signal
+# file's bytes; the history report hashes each file's name, size and mtime.
+def _render_key(signal_file, dpi):
+    with open(signal_file, 'rb') as f:
+        return hashlib.sha1(f.read() + f'|{dpi}'.encode()).hexdigest()
+
+
+def _history_render_key(files, dpi):
+    stamp = '|'.join(f'{fp}:{os.path.getsize(fp)}:{os.path.getmtime(fp)}' for fp in files)
+    return hashlib.sha1(f'{stamp}|{dpi}'.encode()).hexdigest()
+
+
+def _load_render_cache():
+    try:
+        with open(RENDER_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_render_cache(cache):
+    with open(RENDER_CACHE_FILE, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def plot_signal_snapshot(df, output_filename, dpi=FULL_DPI):
+    """Eight-panel analysis of one screener run (df indexed by Ticker)."""
+    # Create comprehensive visualization
+    fig = plt.figure(figsize=(16, 12))
+    gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
+
+    # ============ 1. SIGNAL STRENGTH RANKING ============
+    ax1 = fig.add_subplot(gs[0, :2])
+    top_10 = df.nsmallest(10, 'RSI').sort_values('Signal_Strength', ascending=True)
+    colors = plt.cm.RdYlGn(top_10['Signal_Strength'] / 100)
+    ax1.barh(range(len(top_10)), top_10['Signal_Strength'], color=colors)
+    ax1.set_yticks(range(len(top_10)))
+    ax1.set_yticklabels(top_10.index)
+    ax1.set_xlabel('Signal Strength Score', fontsize=11, fontweight='bold')
+    ax1.set_title('Top 10 Signals by Strength (100 = Highest Quality)', fontsize=12, fontweight='bold')
+    ax1.set_xlim(0, 100)
+    for i, (idx, row) in enumerate(top_10.iterrows()):
+        ax1.text(row['Signal_Strength'] + 1, i, f"{row['Signal_Strength']:.0f}", 
+                 va='center', fontsize=9, fontweight='bold')
+
+    # ============ 2. SUMMARY STATS ============
+    ax2 = fig.add_subplot(gs[0, 2])
+    ax2.axis('off')
+    stats_text = f"""
+    SCREENING SUMMARY
+    {'='*25}
+
+    Total Signals: {len(df)}
+    Scan Date: {df['Scan_Date'].iloc[0]}
+
+    QUALITY METRICS
+    {'='*25}
+    Avg Signal Strength: {df['Signal_Strength'].mean():.1f}/100
+    Avg RSI: {df['RSI'].mean():.1f}
+    Avg ATR: {df['ATR_%'].mean():.1f}%
+    Avg Vol Surge: {df['Vol_Surge'].mean():.1f}x
+
+    PRICE RANGE
+    {'='*25}
+    Min: ${df['Price'].min():.2f}
+    Median: ${df['Price'].median():.2f}
+    Max: ${df['Price'].max():.2f}
+    """
+    ax2.text(0.05, 0.95, stats_text, transform=ax2.transAxes, 
+             fontsize=10, verticalalignment='top', family='monospace',
+             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
+
+    # ============ 3. RSI DISTRIBUTION ============
+    ax3 = fig.add_subplot(gs[1, 0])
+    ax3.hist(df['RSI'], bins=15, color='#FF6B6B', edgecolor='black', alpha=0.7)
+    ax3.axvline(df['RSI'].mean(), color='blue', linestyle='--', linewidth=2, 
+                label=f'Mean: {df["RSI"].mean():.1f}')
+    ax3.axvline(30, color='red', linestyle=':', linewidth=2, label='Oversold (30)')
+    ax3.set_xlabel('RSI Value', fontsize=10, fontweight='bold')
+    ax3.set_ylabel('Frequency', fontsize=10, fontweight='bold')
+    ax3.set_title('RSI Distribution', fontsize=11, fontweight='bold')
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    # ============ 4. BOLLINGER BAND POSITION ============
+    ax4 = fig.add_subplot(gs[1, 1])
+    ax4.hist(df['BB_Position'], bins=15, color='#4ECDC4', edgecolor='black', alpha=0.7)
+    ax4.axvline(0.5, color='gray', linestyle='--', linewidth=2, label='Middle (0.5)')
+    ax4.axvline(df['BB_Position'].mean(), color='red', linestyle='--', linewidth=2,
+                label=f'Mean: {df["BB_Position"].mean():.2f}')
+    ax4.set_xlabel('BB Position (0=Lower, 1=Upper)', fontsize=10, fontweight='bold')
+    ax4.set_ylabel('Frequency', fontsize=10, fontweight='bold')
+    ax4.set_title('Bollinger Band Position', fontsize=11, fontweight='bold')
+    ax4.legend()
+    ax4.grid(True, alpha=0.3)
+
+    # ============ 5. ATR % DISTRIBUTION ============
+    ax5 = fig.add_subplot(gs[1, 2])
+    ax5.hist(df['ATR_%'], bins=15, color='#95E1D3', edgecolor='black', alpha=0.7)
+    ax5.axvline(df['ATR_%'].mean(), color='red', linestyle='--', linewidth=2,
+                label=f'Mean: {df["ATR_%"].mean():.1f}%')
+    ax5.set_xlabel('ATR as % of Price', fontsize=10, fontweight='bold')
+    ax5.set_ylabel('Frequency', fontsize=10, fontweight='bold')
+    ax5.set_title('Average True Range (Volatility)', fontsize=11, fontweight='bold')
+    ax5.legend()
+    ax5.grid(True, alpha=0.3)
+
+    # ============ 6. VOLUME SURGE ANALYSIS ============
+    ax6 = fig.add_subplot(gs[2, 0])
+    ax6.scatter(df['Vol_Surge'], df['Signal_Strength'], alpha=0.6, s=100, c=df['RSI'], 
+                cmap='RdYlGn_r', edgecolors='black', linewidth=0.5)
+    ax6.axvline(1.5, color='red', linestyle='--', linewidth=1, alpha=0.5, label='1.5x threshold')
+    ax6.set_xlabel('Volume Surge Ratio', fontsize=10, fontweight='bold')
+    ax6.set_ylabel('Signal Strength', fontsize=10, fontweight='bold')
+    ax6.set_title('Volume Surge vs Signal Quality', fontsize=11, fontweight='bold')
+    ax6.legend()
+    ax6.grid(True, alpha=0.3)
+    cbar = plt.colorbar(ax6.collections[0], ax=ax6)
+    cbar.set_label('RSI', fontsize=9)
+
+    # ============ 7. PRICE vs SMA 200 ============
+    ax7 = fig.add_subplot(gs[2, 1])
+    ax7.scatter(df['SMA_200'], df['Price'], alpha=0.6, s=100, c=df['Signal_Strength'], 
+                cmap='RdYlGn', edgecolors='black', linewidth=0.5)
+    min_val = min(df['SMA_200'].min(), df['Price'].min())
+    max_val = max(df['SMA_200'].max(), df['Price'].max())
+    ax7.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, alpha=0.5, 
+             label='Price = SMA')
+    ax7.set_xlabel('200-Day SMA ($)', fontsize=10, fontweight='bold')
+    ax7.set_ylabel('Current Price ($)', fontsize=10, fontweight='bold')
+    ax7.set_title('Price vs Long-term Trend', fontsize=11, fontweight='bold')
+    ax7.legend()
+    ax7.grid(True, alpha=0.3)
+    cbar = plt.colorbar(ax7.collections[0], ax=ax7)
+    cbar.set_label('Signal Strength', fontsize=9)
+
+    # ============ 8. SUPPORT DISTANCE ANALYSIS ============
+    ax8 = fig.add_subplot(gs[2, 2])
+    ax8.scatter(df['Distance_to_Support_%'], df['Signal_Strength'], alpha=0.6, s=100, 
+                c=df['BB_Position'], cmap='coolwarm', edgecolors='black', linewidth=0.5)
+    ax8.axvline(5, color='red', linestyle='--', linewidth=1, alpha=0.5, label='5% threshold')
+    ax8.set_xlabel('Distance to Support (%)', fontsize=10, fontweight='bold')
+    ax8.set_ylabel('Signal Strength', fontsize=10, fontweight='bold')
+    ax8.set_title('Proximity to Support Level', fontsize=11, fontweight='bold')
+    ax8.legend()
+    ax8.grid(True, alpha=0.3)
+    cbar = plt.colorbar(ax8.collections[0], ax=ax8)
+    cbar.set_label('BB Position', fontsize=9)
+
+    # Main title
+    fig.suptitle(f'Options Premium Screener Analysis - {datetime.now().strftime("%Y-%m-%d")}', 
+                 fontsize=16, fontweight='bold', y=0.995)
+
+    # Save
+    plt.savefig(output_filename, dpi=dpi, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+
+
+# ============ SIGNAL HISTORY ============
+def _file_date(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return pd.to_datetime(stem.rsplit('_', 1)[-1], format='%Y%m%d', errors='coerce')
+
+
+def list_signal_files(start=None, end=None):
+    """
+    Screener output files whose filename date (signals_YYYYMMDD.csv) falls in
+    [start, end], oldest first. Selection uses the name only — files outside
+    the range are never opened.
+    """
+    start = pd.Timestamp(start) if start else None
+    end   = pd.Timestamp(end) if end else None
+    dated = []
+    for fp in glob.glob(SIGNAL_FILE_GLOB):
+        d = _file_date(fp)
+        if pd.isna(d) or (start is not None and d < start) or (end is not None and d > end):
+            continue
+        dated.append((d, fp))
+    return [fp for _, fp in sorted(dated)]
+
+
+def load_signal_history(start=None, end=None, columns=HISTORY_COLUMNS):
+    """
+    One row per (scan day, signal) across every signal file in the range.
+
+    Only `columns` are parsed (usecols), with fixed dtypes; columns an older
+    file predates (e.g. IV_Rank) come back as NaN. Scan_Date falls back to the
+    filename date. Ticker / Tier / VIX_Regime are returned as categoricals.
+    """
+    wanted = list(dict.fromkeys(['Ticker', 'Scan_Date'] + list(columns)))
+    frames = []
+    for fp in list_signal_files(start, end):
+        try:
+            part = pd.read_csv(fp, usecols=lambda c: c in wanted,
+                               dtype={c: t for c, t in HISTORY_DTYPES.items() if c in wanted})
+        except (OSError, ValueError, pd.errors.EmptyDataError) as e:
+            print(f"⚠️  Skipping {fp}: {e}")
+            continue
+        part = part.reindex(columns=wanted)
+        scan = pd.to_datetime(part['Scan_Date'], errors='coerce')
+        part['Scan_Date'] = scan.fillna(_file_date(fp))
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=wanted)
+    hist = pd.concat(frames, ignore_index=True)
+    for col in ('Ticker', 'Tier', 'VIX_Regime'):
+        if col in hist.columns:
+            hist[col] = hist[col].astype('category')
+    return hist
+
+
+def plot_signal_history(hist, output_filename, dpi=FULL_DPI):
+    """Four-panel trend view of a signal history frame from load_signal_history()."""
+    months = hist['Scan_Date'].dt.to_period('M').astype(str)
+    span   = f"{hist['Scan_Date'].min():%Y-%m-%d} – {hist['Scan_Date'].max():%Y-%m-%d}"
+
+    fig = plt.figure(figsize=(16, 11))
+    gs = fig.add_gridspec(2, 2, hspace=0.35, wspace=0.25)
+
+    # ============ 1. SIGNALS PER SCAN BY VIX REGIME ============
+    ax1 = fig.add_subplot(gs[0, 0])
+    regime  = hist['VIX_Regime'].astype('string').fillna('NORMAL')   # screener default when VIX is missing
+    per_day = (pd.crosstab(hist['Scan_Date'].dt.date, regime)
+               .reindex(columns=[r for r in REGIME_COLORS if r in set(regime)]))
+    per_day.plot(kind='bar', stacked=True, ax=ax1, width=0.9, legend=True,
+                 color=[REGIME_COLORS[r] for r in per_day.columns])
+    step = max(1, len(per_day) // 15)
+    ax1.set_xticks(range(0, len(per_day), step))
+    ax1.set_xticklabels([str(d) for d in per_day.index[::step]], rotation=45, ha='right', fontsize=8)
+    ax1.set_xlabel('Scan Date', fontsize=10, fontweight='bold')
+    ax1.set_ylabel('Signals', fontsize=10, fontweight='bold')
+    ax1.set_title('Signals per Scan by VIX Regime', fontsize=11, fontweight='bold')
+    ax1.legend(title='VIX Regime', fontsize=8)
+    ax1.grid(True, alpha=0.3)
+
+    # ============ 2. PER-TICKER FREQUENCY ============
+    ax2 = fig.add_subplot(gs[0, 1])
+    freq = hist['Ticker'].value_counts().head(HISTORY_TOP_TICKERS).sort_values()
+    ax2.barh(range(len(freq)), freq.values, color='#9b59b6')
+    ax2.set_yticks(range(len(freq)))
+    ax2.set_yticklabels(freq.index, fontsize=9)
+    ax2.set_xlabel('Days Signaled', fontsize=10, fontweight='bold')
+    ax2.set_title(f'Most Frequent Signals (Top {HISTORY_TOP_TICKERS})', fontsize=11, fontweight='bold')
+    ax2.grid(True, alpha=0.3)
+
+    # ============ 3. RSI BY MONTH ============
+    ax3 = fig.add_subplot(gs[1, 0])
+    sns.boxplot(x=months, y=hist['RSI'], ax=ax3, color='#FF6B6B')
+    ax3.axhline(30, color='red', linestyle=':', linewidth=2, label='Oversold (30)')
+    ax3.set_xlabel('Month', fontsize=10, fontweight='bold')
+    ax3.set_ylabel('RSI at Signal', fontsize=10, fontweight='bold')
+    ax3.set_title('RSI Distribution by Month', fontsize=11, fontweight='bold')
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    # ============ 4. IV RANK BY MONTH ============
+    ax4 = fig.add_subplot(gs[1, 1])
+    if hist['IV_Rank'].notna().any():
+        sns.boxplot(x=months, y=hist['IV_Rank'], ax=ax4, color='#4ECDC4')
+    else:
+        ax4.text(0.5, 0.5, 'No IV Rank data in range', ha='center', va='center', transform=ax4.transAxes)
+    ax4.set_xlabel('Month', fontsize=10, fontweight='bold')
+    ax4.set_ylabel('IV Rank at Signal', fontsize=10, fontweight='bold')
+    ax4.set_title('IV Rank Distribution by Month', fontsize=11, fontweight='bold')
+    ax4.grid(True, alpha=0.3)
+
+    fig.suptitle(f'Signal History — {span} ({hist["Scan_Date"].nunique()} scans, {len(hist)} signals)',
+                 fontsize=16, fontweight='bold', y=0.995)
+    plt.savefig(output_filename, dpi=dpi, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+
+
+def signal_history_report(start=None, end=None, preview=False, output_filename=None):
+    """
+    Render the multi-day history report for signal files dated in [start, end]
+    (either may be None / 'YYYY-MM-DD'). Skipped when no file in the range
+    changed since the last render. Returns (output file, history frame) or
+    (None, empty frame) when the range holds no signals.
+    """
+    files = list_signal_files(start, end)
+    if not files:
+        print("❌ No signal files in range.")
+        return None, pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    dpi = PREVIEW_DPI if preview else FULL_DPI
+    if output_filename is None:
+        first, last = _file_date(files[0]), _file_date(files[-1])
+        suffix = '_preview' if preview else ''
+        output_filename = f'signal_history_{first:%Y%m%d}_{last:%Y%m%d}{suffix}.png'
+
+    hist = load_signal_history(start, end)
+    print(f"📊 Signal history: {len(files)} files, {len(hist)} signals")
+    if hist.empty:
+        return None, hist
+
+    key   = _history_render_key(files, dpi)
+    cache = _load_render_cache()
+    if cache.get(output_filename) == key and os.path.exists(output_filename):
+        print(f"✅ Unchanged since last render: {output_filename}")
+    else:
+        plot_signal_history(hist, output_filename, dpi)
+        cache[output_filename] = key
+        _save_render_cache(cache)
+        print(f"✅ History report saved: {output_filename}")
+    return output_filename, hist
+
+
+def main(preview=False):
+    # Find the most recent signals file
+    signal_files = glob.glob(SIGNAL_FILE_GLOB)
+    if not signal_files:
+        print("❌ No signal files found. Run the screener first.")
+        return
+
+    latest_file = max(signal_files)
+    print(f"📊 Analyzing: {latest_file}")
+
+    # Read the signals
+    df = pd.read_csv(latest_file, index_col='Ticker')
+
+    if df.empty:
+        print("❌ No signals found in the file.")
+        return
+
+    print(f"✓ Found {len(df)} signals to analyze")
+
+    dpi    = PREVIEW_DPI if preview else FULL_DPI
+    suffix = '_preview' if preview else ''
+    output_filename = f'signal_analysis_{datetime.now().strftime("%Y%m%d")}{suffix}.png'
+    key    = _render_key(latest_file, dpi)
+    cache  = _load_render_cache()
+    if cache.get(output_filename) == key and os.path.exists(output_filename):
+        print(f"\n✅ Unchanged since last render: {output_filename}")
+    else:
+        plot_signal_snapshot(df, output_filename, dpi)
+        cache[output_filename] = key
+        _save_render_cache(cache)
+        print(f"\n✅ Visualization saved: {output_filename}")
+
+    # Display summary
+    print("\n" + "="*50)
+    print("ANALYSIS COMPLETE")
+    print("="*50)
+    print(f"Signals Analyzed: {len(df)}")
+    print(f"Average Signal Strength: {df['Signal_Strength'].mean():.1f}/100")
+    print(f"Best Signal: {df['Signal_Strength'].max():.0f}/100 ({df['Signal_Strength'].idxmax()})")
+    print(f"Most Oversold: RSI {df['RSI'].min():.1f} ({df['RSI'].idxmin()})")
+    print("="*50)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chart screener signals.')
+    parser.add_argument('--preview', action='store_true', help=f'render at {PREVIEW_DPI} dpi')
+    parser.add_argument('--history', action='store_true', help='multi-day trend report instead of the latest snapshot')
+    parser.add_argument('--start', help='first scan date (YYYY-MM-DD) for --history')
+    parser.add_argument('--end', help='last scan date (YYYY-MM-DD) for --history')
+    args = parser.parse_args()
+    if args.history:
+        signal_history_report(args.start, args.end, preview=args.preview)
+    else:
+        main(preview=args.preview)